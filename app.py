@@ -1,22 +1,189 @@
-from flask import Flask, request, jsonify, session
+from flask import Flask, Response, request, jsonify, session, send_file, g
+from flask.json.provider import DefaultJSONProvider
+from werkzeug.middleware.proxy_fix import ProxyFix
 from flask_cors import CORS
-from datetime import datetime
+from datetime import datetime, timedelta
 import os
 import json
 import uuid
+import heapq
+import math
 from functools import wraps
+from itertools import islice
+import atexit
+from report_store import ReportStore, UserDirectory, encode_cursor, decode_cursor
+from report_record import ReportRecord, report_json
+from report_archive import ReportArchive, ReportArchiver
+from audit_log import AuditLog
+from persistence import ReportJournal
+from report_sqlite import SqliteDatabase, SqliteReportStore, SqliteUserDirectory
+from auth import RevocationList, TokenSessionInterface, TOKEN_TTL, load_admins, check_admin
+from metrics import RequestMetrics, SamplingProfiler
+from rate_limit import Limit, MemoryBuckets, SqliteBuckets, RateLimiter, AdmissionControl, Overloaded
+from report_stats import ReportStats
+from report_search import SearchIndex
+from report_geo import GeoIndex
+from report_dedup import DuplicateDetector
+from translations import TranslationRegistry
+from report_batch import IdempotencyIndex, parse_batch
+from audio_store import AudioStore, UploadError
+from speech_jobs import SpeechJobQueue, QueueFull
+from report_classifier import ReportClassifier
+from report_export import iter_csv, iter_ndjson, iter_json, report_cursor
+from event_feed import EventBroadcaster
+from report_status import StatusCache, parse_reference, reference_number
+
+class ReportJSONProvider(DefaultJSONProvider):
+    # Stores hand out ReportRecords; jsonify them like the dicts they replace
+    @staticmethod
+    def default(o):
+        if isinstance(o, ReportRecord):
+            return o.to_dict()
+        return DefaultJSONProvider.default(o)
 
 app = Flask(__name__)
+app.json = ReportJSONProvider(app)
 app.secret_key = os.environ.get('SECRET_KEY', 'vocal-village-secret-key')
 CORS(app, supports_credentials=True, origins=["http://localhost:5500", "http://127.0.0.1:5500"])
 
-# In-memory storage (replace with database in production)
-reports_db = []
-users_db = {}
+# Behind a load balancer, trust this many X-Forwarded-For hops so
+# per-IP limits see the client address
+TRUSTED_PROXIES = int(os.environ.get('VOCAL_VILLAGE_TRUSTED_PROXIES', 0))
+if TRUSTED_PROXIES:
+    app.wsgi_app = ProxyFix(app.wsgi_app, x_for=TRUSTED_PROXIES)
+
+# Report/user storage. 'memory' keeps everything in this process behind a
+# write-ahead journal; 'sqlite' shares one database file between worker
+# processes. Routes only use the store interface, so either works.
+DATA_DIR = os.environ.get('VOCAL_VILLAGE_DATA_DIR', 'data')
+STORAGE_BACKEND = os.environ.get('VOCAL_VILLAGE_STORAGE', 'memory')
+if STORAGE_BACKEND == 'sqlite':
+    database = SqliteDatabase(os.environ.get('VOCAL_VILLAGE_DATABASE',
+                                             os.path.join(DATA_DIR, 'vocal_village.db')))
+    reports_db = SqliteReportStore(database)
+    users_db = SqliteUserDirectory(database)
+elif STORAGE_BACKEND == 'memory':
+    reports_db = ReportStore()
+    users_db = UserDirectory()
+else:
+    raise ValueError(f"Unknown storage backend: {STORAGE_BACKEND}")
+
+# Closed reports moved out of reports_db, in compressed segment files.
+# Single report lookups and exports read through to it.
+report_archive = ReportArchive(os.path.join(DATA_DIR, 'archive'))
+
+# Logins are signed short-lived tokens (cookie or bearer) checked against a
+# revocation list shared by all workers; admin password hashes load once
+app.session_interface = TokenSessionInterface(
+    RevocationList(os.path.join(DATA_DIR, 'auth.db')),
+    ttl=int(os.environ.get('VOCAL_VILLAGE_TOKEN_TTL', TOKEN_TTL))
+)
+admin_accounts = load_admins(os.environ.get('VOCAL_VILLAGE_ADMINS'))
+
+# Token buckets for submission and login, per client IP and per user or
+# login account; shared between workers with the SQLite backend. Set
+# VOCAL_VILLAGE_RATE_LIMITS=off for load tests.
+RATE_LIMITS = {
+    'submit': {'ip': Limit(rate=1.0, burst=120), 'user': Limit(rate=10 / 60, burst=20)},
+    'login': {'ip': Limit(rate=20 / 60, burst=20), 'account': Limit(rate=5 / 60, burst=5)},
+}
+if os.environ.get('VOCAL_VILLAGE_RATE_LIMITS', 'on') == 'off':
+    RATE_LIMITS = {}
+if STORAGE_BACKEND == 'sqlite':
+    rate_buckets = SqliteBuckets(os.path.join(DATA_DIR, 'rate_limits.db'))
+else:
+    rate_buckets = MemoryBuckets()
+rate_limiter = RateLimiter(rate_buckets, RATE_LIMITS)
+
+# Concurrency cap for the rate-limited routes in this worker
+admission = AdmissionControl(
+    max_active=int(os.environ.get('VOCAL_VILLAGE_MAX_ACTIVE', 16)),
+    max_queued=int(os.environ.get('VOCAL_VILLAGE_MAX_QUEUED', 32))
+)
+
+report_stats = ReportStats()
+reports_db.subscribe(report_stats)
+search_index = SearchIndex()
+reports_db.subscribe(search_index)
+geo_index = GeoIndex()
+reports_db.subscribe(geo_index)
+duplicate_detector = DuplicateDetector()
+reports_db.subscribe(duplicate_detector)
+idempotency_keys = IdempotencyIndex()
+reports_db.subscribe(idempotency_keys)
+status_cache = StatusCache(reports_db, archive=report_archive)
+reports_db.subscribe(status_cache)
+
+REPORT_STATUSES = ('submitted', 'pending', 'in_progress', 'resolved', 'rejected', 'duplicate')
+MAX_PAGE_SIZE = 200
+MAX_RADIUS_M = 50000
+MAX_JOB_WAIT = 30
+MAX_PROFILE_SECONDS = 300
+RESCORE_BATCH = 1000
+
+# Language bundles (en.json, hi.json, ...) live next to this file
+TRANSLATIONS_DIR = os.environ.get('VOCAL_VILLAGE_TRANSLATIONS_DIR', os.path.dirname(os.path.abspath(__file__)))
+translation_registry = TranslationRegistry(TRANSLATIONS_DIR)
+
+# Durable write-ahead log behind reports_db/users_db; the SQLite backend
+# commits each write itself and only replays changes to the listeners
+journal = database if STORAGE_BACKEND == 'sqlite' else ReportJournal(DATA_DIR)
+journal.recover(reports_db, users_db)
+journal.start(reports_db, users_db)
+atexit.register(journal.close)
+
+# Live report events for the admin dashboard; subscribed after recovery so
+# replayed history is not pushed to clients. Event ids are SQLite change
+# ids, the same in every worker; the memory backend counts per process.
+report_events = EventBroadcaster(event_ids=reports_db.last_change if STORAGE_BACKEND == 'sqlite' else None)
+reports_db.subscribe(report_events)
+atexit.register(report_events.close)
+
+# Reports resolved or rejected more than ARCHIVE_AFTER_DAYS ago move from
+# reports_db to the archive (0 turns archiving off)
+ARCHIVE_AFTER_DAYS = int(os.environ.get('VOCAL_VILLAGE_ARCHIVE_AFTER_DAYS', 30))
+archiver = ReportArchiver(reports_db, report_archive, after_days=ARCHIVE_AFTER_DAYS,
+                          interval=int(os.environ.get('VOCAL_VILLAGE_ARCHIVE_INTERVAL', 3600)))
+if ARCHIVE_AFTER_DAYS:
+    archiver.start()
+    atexit.register(archiver.stop)
+
+# Admin actions, recorded off the request path by a background writer
+audit_log = AuditLog(os.path.join(DATA_DIR, 'audit'))
+atexit.register(audit_log.close)
+
+# Category/urgency suggestions, trained on the lexicon plus recovered reports
+report_classifier = ReportClassifier()
+report_classifier.fit_store(reports_db)
+
+# Speech post-processing runs in worker processes, off the request threads
+speech_jobs = SpeechJobQueue(
+    engine=os.environ.get('VOCAL_VILLAGE_SPEECH_ENGINE', 'local'),
+    max_workers=int(os.environ.get('VOCAL_VILLAGE_SPEECH_WORKERS', 2))
+)
+atexit.register(speech_jobs.shutdown)
+
+# Uploaded voice recordings, content-addressed under the data directory
+audio_store = AudioStore(os.path.join(DATA_DIR, 'audio'))
+
+# Per-route latency/size histograms for /api/metrics, plus an on-demand
+# sampling profiler for slow endpoints
+request_metrics = RequestMetrics()
+request_metrics.init_app(app)
+request_metrics.gauge('reports', 'Reports in reports_db', lambda: len(reports_db))
+request_metrics.gauge('archived_reports', 'Reports moved to the archive', lambda: len(report_archive))
+request_metrics.gauge('users', 'Users in users_db', lambda: len(users_db))
+request_metrics.gauge('status_cache_entries', 'Cached status responses', lambda: len(status_cache))
+request_metrics.gauge('event_subscribers', 'Open admin event streams', report_events.subscribers)
+request_metrics.gauge('speech_jobs_pending', 'Queued or running speech jobs', speech_jobs.pending)
+request_metrics.gauge('admission_queued', 'Requests waiting for an admission slot', admission.queued)
+request_metrics.gauge('audit_pending', 'Audit entries not yet on disk', audit_log.pending)
+request_metrics.gauge('audit_dropped', 'Audit entries dropped on buffer overflow', lambda: audit_log.dropped)
+profiler = SamplingProfiler(request_metrics)
 
 class Report:
     def __init__(self, report_id, user_id, problem_type, description, 
-                 voice_text, location, language, status="pending"):
+                 voice_text, location, language, status="pending", audio=None):
         self.report_id = report_id
         self.user_id = user_id
         self.problem_type = problem_type
@@ -25,6 +192,7 @@ class Report:
         self.location = location
         self.language = language
         self.status = status
+        self.audio = audio
         self.created_at = datetime.now().isoformat()
         self.updated_at = datetime.now().isoformat()
     
@@ -38,10 +206,153 @@ class Report:
             "location": self.location,
             "language": self.language,
             "status": self.status,
+            "audio": self.audio,
             "created_at": self.created_at,
             "updated_at": self.updated_at
         }
 
+def add_report(report):
+    """Store a new report, folding it into a recent canonical report if it
+    looks like a duplicate. Returns the canonical report id or None."""
+    canonical_id = duplicate_detector.match(report)
+    if canonical_id is None:
+        reports_db.add(report)
+        return None
+    
+    report['status'] = 'duplicate'
+    report['duplicate_of'] = canonical_id
+    # Read and bump the count under the store lock (one transaction with
+    # SQLite), so concurrent duplicates do not lose increments
+    with reports_db.batch(), journal.group():
+        reports_db.add(report)
+        canonical = reports_db.get(canonical_id)
+        if canonical is not None:
+            reports_db.update(canonical_id, {
+                'duplicate_count': canonical.get('duplicate_count', 0) + 1
+            })
+    return canonical_id
+
+def find_report(report_id):
+    # Hot store first; closed reports may have moved to the archive
+    report = reports_db.get(report_id)
+    if report is None:
+        report = report_archive.get(report_id)
+    return report
+
+def restore_report(report_id):
+    # Writes only go to reports_db, so an archived report is moved back
+    # before it is changed. Until the archive forgets its copy the store
+    # copy wins, as after an interrupted archive pass.
+    if reports_db.get(report_id) is not None:
+        return
+    archived = report_archive.get(report_id)
+    if archived is None:
+        return
+    try:
+        with reports_db.batch():
+            if reports_db.get(report_id) is None:
+                reports_db.add(archived.to_dict(), restored=True)
+    except KeyError:
+        pass  # Restored by another worker
+    report_archive.forget([report_id])
+
+REQUIRED_REPORT_FIELDS = ('problem_type', 'description', 'location', 'language')
+
+def validate_report_data(data):
+    # Error message for a submitted payload, or None if it is usable
+    if not isinstance(data, dict):
+        return "Report must be a JSON object"
+    for field in REQUIRED_REPORT_FIELDS:
+        if field not in data:
+            return f"Missing required field: {field}"
+    key = data.get('idempotency_key')
+    if key is not None and (not isinstance(key, str) or not 0 < len(key) <= 128):
+        return "Invalid idempotency_key"
+    if data.get('audio_id') and audio_store.info(data['audio_id']) is None:
+        return "Unknown audio_id"
+    return None
+
+def audio_reference(audio_id):
+    if not audio_id:
+        return None
+    info = audio_store.info(audio_id)
+    return {"audio_id": audio_id, "content_type": info['content_type'], "size": info['size']}
+
+def build_report(data, user_id):
+    report = Report(
+        report_id=str(uuid.uuid4())[:8],
+        user_id=user_id,
+        problem_type=data['problem_type'],
+        description=data.get('description', ''),
+        voice_text=data.get('voice_text', ''),
+        location=data['location'],
+        language=data['language'],
+        status="submitted",
+        audio=audio_reference(data.get('audio_id'))
+    ).to_dict()
+    if data.get('idempotency_key'):
+        report['idempotency_key'] = data['idempotency_key']
+    # Queued offline submissions keep the device time separately so
+    # created_at stays in arrival order
+    if data.get('reported_at'):
+        report['reported_at'] = str(data['reported_at'])
+    report.update(report_classifier.score(report))
+    return report
+
+def submission_result(report_id, canonical_id=None, replayed=False):
+    result = {
+        "report_id": report_id,
+        "reference_number": reference_number(report_id)
+    }
+    if canonical_id:
+        result["duplicate_of"] = reference_number(canonical_id)
+    if replayed:
+        result["replayed"] = True
+    return result
+
+def too_many_requests(message, retry_after):
+    response = jsonify({"error": message, "retry_after": retry_after})
+    response.status_code = 429
+    response.headers['Retry-After'] = str(retry_after)
+    return response
+
+def batch_items():
+    # Parsed once per request: the rate limit charges a token per item
+    if 'batch_items' not in g:
+        g.batch_items = parse_batch(request.get_data(), request.content_type)
+    return g.batch_items
+
+def batch_cost():
+    try:
+        return max(1, len(batch_items()))
+    except ValueError:
+        # Rejected with a 400 by the route
+        return 1
+
+def login_account(field):
+    data = request.get_json(silent=True)
+    return data.get(field) if isinstance(data, dict) and isinstance(data.get(field), str) else None
+
+# Rate limit decorator: per-IP and per-client token buckets, then the
+# worker's admission cap. Rejections are immediate 429s with Retry-After.
+def rate_limited(rule, clients, cost=None):
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            retry_after = rate_limiter.check(rule, {'ip': request.remote_addr, **clients()},
+                                             cost() if cost else 1)
+            if retry_after == math.inf:
+                return jsonify({"error": "Request is larger than the rate limit allows"}), 413
+            if retry_after:
+                return too_many_requests("Too many requests, please try again later", retry_after)
+            try:
+                with admission:
+                    return f(*args, **kwargs)
+            except Overloaded:
+                return too_many_requests("Server is busy, please try again shortly", 1)
+        return decorated_function
+    return decorator
+
 # ✅ HOME ROUTE (OUTSIDE CLASS)
 @app.route('/')
 def home():
@@ -52,10 +363,17 @@ def home():
             "/api/login/manual",
             "/api/login/digilocker",
             "/api/report/submit",
+            "/api/report/submit/batch",
             "/api/report/user",
+            "/api/report/timeline",
+            "/api/report/status/<reference_number>",
             "/api/admin/login",
             "/api/admin/reports",
-            "/api/admin/stats"
+            "/api/admin/stats",
+            "/api/admin/reports/search",
+            "/api/admin/reports/nearby",
+            "/api/admin/reports/clusters",
+            "/api/metrics"
         ]
     })
 
@@ -63,7 +381,13 @@ def home():
 def health_check():
     return jsonify({"status": "healthy", "timestamp": datetime.now().isoformat()})
 
+# Prometheus scrape endpoint (per worker process)
+@app.route('/api/metrics', methods=['GET'])
+def get_metrics():
+    return Response(request_metrics.render(), mimetype='text/plain; version=0.0.4')
+
 @app.route('/api/login/digilocker', methods=['POST'])
+@rate_limited('login', lambda: {'account': login_account('aadhaar_number')})
 def digilocker_login():
     try:
         data = request.get_json()
@@ -73,6 +397,15 @@ def digilocker_login():
             return jsonify({"error": "Invalid Aadhaar number"}), 400
         
         user_id = f"user_{aadhaar_number[-4:]}"
+        if user_id not in users_db:
+            users_db[user_id] = {
+                "aadhaar_number": aadhaar_number,
+                "name": data.get('name', ''),
+                "phone": data.get('phone', ''),
+                "created_at": datetime.now().isoformat()
+            }
+            journal.sync(journal.log_user(user_id, users_db[user_id]))
+        
         session['user_id'] = user_id
         session['aadhaar_number'] = aadhaar_number
         session['login_method'] = 'digilocker'
@@ -86,6 +419,7 @@ def digilocker_login():
         return jsonify({"error": str(e)}), 500
 
 @app.route('/api/login/manual', methods=['POST'])
+@rate_limited('login', lambda: {'account': login_account('aadhaar_number')})
 def manual_login():
     try:
         data = request.get_json()
@@ -97,12 +431,14 @@ def manual_login():
             return jsonify({"error": "Invalid Aadhaar number"}), 400
         
         user_id = f"user_{aadhaar_number[-4:]}"
+        existing = users_db.get(user_id) or {}
         users_db[user_id] = {
             "aadhaar_number": aadhaar_number,
             "name": name,
             "phone": phone,
-            "created_at": datetime.now().isoformat()
+            "created_at": existing.get('created_at') or datetime.now().isoformat()
         }
+        journal.sync(journal.log_user(user_id, users_db[user_id]))
         
         session['user_id'] = user_id
         session['aadhaar_number'] = aadhaar_number
@@ -117,6 +453,7 @@ def manual_login():
         return jsonify({"error": str(e)}), 500
 
 @app.route('/api/report/submit', methods=['POST'])
+@rate_limited('submit', lambda: {'user': session.get('user_id')})
 def submit_report():
     try:
         if 'user_id' not in session:
@@ -124,31 +461,177 @@ def submit_report():
         
         data = request.get_json()
         
-        required_fields = ['problem_type', 'description', 'location', 'language']
-        for field in required_fields:
-            if field not in data:
-                return jsonify({"error": f"Missing required field: {field}"}), 400
-        
-        report_id = str(uuid.uuid4())[:8]
-        report = Report(
-            report_id=report_id,
-            user_id=session['user_id'],
-            problem_type=data['problem_type'],
-            description=data.get('description', ''),
-            voice_text=data.get('voice_text', ''),
-            location=data['location'],
-            language=data['language'],
-            status="submitted"
-        )
+        error = validate_report_data(data)
+        if error:
+            return jsonify({"error": error}), 400
         
-        reports_db.append(report.to_dict())
+        user_id = session['user_id']
+        existing_id = data.get('idempotency_key') and idempotency_keys.get(user_id, data['idempotency_key'])
+        if existing_id:
+            existing = reports_db.get(existing_id) or {}
+            return jsonify({
+                "success": True,
+                **submission_result(existing_id, existing.get('duplicate_of'), replayed=True),
+                "message": "Report already submitted"
+            })
         
-        return jsonify({
+        report = build_report(data, user_id)
+        canonical_id = add_report(report)
+        journal.sync()
+        
+        response = {
             "success": True,
-            "report_id": report_id,
-            "reference_number": f"VV-{report_id.upper()}",
+            **submission_result(report['report_id'], canonical_id),
             "message": "Report submitted successfully"
+        }
+        if canonical_id:
+            response["message"] = "This problem has already been reported; your report was added to it"
+        return jsonify(response)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/report/submit/batch', methods=['POST'])
+@rate_limited('submit', lambda: {'user': session.get('user_id')}, cost=batch_cost)
+def submit_report_batch():
+    try:
+        if 'user_id' not in session:
+            return jsonify({"error": "User not logged in"}), 401
+        
+        items = batch_items()
+        user_id = session['user_id']
+        
+        # Validate everything first so the store write below cannot fail
+        # half way through
+        results = [None] * len(items)
+        pending = []
+        seen_keys = {}
+        for index, data in enumerate(items):
+            error = validate_report_data(data)
+            key = data.get('idempotency_key') if not error else None
+            if error:
+                results[index] = {"index": index, "status": "error", "error": error}
+            elif key and key in seen_keys:
+                results[index] = {"index": index, "status": "replayed", "same_as": seen_keys[key]}
+            else:
+                if key:
+                    seen_keys[key] = index
+                pending.append((index, data))
+        
+        # Classify and hash new reports before taking the store lock; only
+        # the idempotency checks, duplicate lookups and inserts run under it
+        built = {index: build_report(data, user_id) for index, data in pending
+                 if not (data.get('idempotency_key')
+                         and idempotency_keys.get(user_id, data['idempotency_key']))}
+        duplicate_detector.prepare(built.values())
+        
+        created = 0
+        with reports_db.batch(), journal.group():
+            for index, data in pending:
+                key = data.get('idempotency_key')
+                existing_id = key and idempotency_keys.get(user_id, key)
+                if existing_id:
+                    existing = reports_db.get(existing_id) or {}
+                    results[index] = {"index": index, "status": "replayed",
+                                      **submission_result(existing_id, existing.get('duplicate_of'))}
+                    continue
+                report = built.get(index) or build_report(data, user_id)
+                canonical_id = add_report(report)
+                results[index] = {"index": index, "status": "created",
+                                  **submission_result(report['report_id'], canonical_id)}
+                created += 1
+        journal.sync()
+        
+        # Items repeating a key earlier in the same batch share its result
+        for result in results:
+            if result.get('same_as') is not None:
+                original = results[result.pop('same_as')]
+                result.update({k: v for k, v in original.items()
+                               if k in ('report_id', 'reference_number', 'duplicate_of')})
+        for index, data in enumerate(items):
+            if isinstance(data, dict) and data.get('idempotency_key'):
+                results[index]['idempotency_key'] = data['idempotency_key']
+        
+        return jsonify({
+            "success": True,
+            "results": results,
+            "received": len(items),
+            "created": created
         })
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+# ---------- voice recording uploads ----------
+
+def upload_error(e):
+    body = {"error": str(e)}
+    if e.offset is not None:
+        body["offset"] = e.offset
+    return jsonify(body), e.status
+
+@app.route('/api/audio/uploads', methods=['POST'])
+def create_audio_upload():
+    try:
+        if 'user_id' not in session:
+            return jsonify({"error": "User not logged in"}), 401
+        
+        data = request.get_json(silent=True) or {}
+        size = data.get('size')
+        upload_id = audio_store.create_upload(
+            session['user_id'], data.get('content_type'),
+            int(size) if size is not None else None
+        )
+        
+        return jsonify({"success": True, "upload_id": upload_id, "offset": 0}), 201
+    except UploadError as e:
+        return upload_error(e)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/audio/uploads/<upload_id>', methods=['GET'])
+def get_audio_upload(upload_id):
+    # Resume point for a client whose connection dropped mid-upload
+    try:
+        if 'user_id' not in session:
+            return jsonify({"error": "User not logged in"}), 401
+        
+        offset = audio_store.offset(upload_id, session['user_id'])
+        return jsonify({"success": True, "upload_id": upload_id, "offset": offset})
+    except UploadError as e:
+        return upload_error(e)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/audio/uploads/<upload_id>', methods=['PATCH', 'PUT'])
+def upload_audio_chunk(upload_id):
+    try:
+        if 'user_id' not in session:
+            return jsonify({"error": "User not logged in"}), 401
+        
+        offset = request.headers.get('Upload-Offset', request.args.get('offset'))
+        if offset is None or not offset.isdigit():
+            return jsonify({"error": "Upload-Offset header is required"}), 400
+        
+        # The body is copied to disk piece by piece, never read whole
+        new_offset = audio_store.write_chunk(upload_id, session['user_id'],
+                                             int(offset), request.stream)
+        return jsonify({"success": True, "upload_id": upload_id, "offset": new_offset})
+    except UploadError as e:
+        return upload_error(e)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/audio/uploads/<upload_id>/complete', methods=['POST'])
+def complete_audio_upload(upload_id):
+    try:
+        if 'user_id' not in session:
+            return jsonify({"error": "User not logged in"}), 401
+        
+        audio_id, size = audio_store.complete(upload_id, session['user_id'])
+        return jsonify({"success": True, "audio_id": audio_id, "size": size})
+    except UploadError as e:
+        return upload_error(e)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -159,9 +642,13 @@ def get_user_reports():
             return jsonify({"error": "User not logged in"}), 401
         
         user_id = session['user_id']
-        user_reports = [r for r in reports_db if r['user_id'] == user_id]
+        # Closed reports the archiver moved out are still the user's
+        archived = [report for report in report_archive.user_reports(user_id)
+                    if report['report_id'] not in reports_db]
+        user_reports = list(heapq.merge(archived, reports_db.scan(user_id=user_id),
+                                        key=lambda report: report.get('created_at') or ''))
         
-        return jsonify({
+        return report_list_response({
             "success": True,
             "reports": user_reports,
             "count": len(user_reports)
@@ -169,10 +656,53 @@ def get_user_reports():
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+def cached_json(entry, cache_control):
+    body, etag = entry
+    response = Response(body, mimetype='application/json')
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = cache_control
+    return response.make_conditional(request)
+
+def report_list_response(payload):
+    """JSON response for `payload` whose "reports" list is written by
+    joining each report's cached JSON instead of encoding it again."""
+    reports = payload.pop("reports")
+    rest = app.json.dumps(payload)[1:-1].encode('utf-8')
+    body = b''.join((b'{"reports":[', b','.join(report_json(report) for report in reports),
+                     b']', b',' if rest else b'', rest, b'}'))
+    return Response(body, mimetype='application/json')
+
+# Per-user report timeline with status history
+@app.route('/api/report/timeline', methods=['GET'])
+def get_report_timeline():
+    try:
+        if 'user_id' not in session:
+            return jsonify({"error": "User not logged in"}), 401
+        
+        return cached_json(status_cache.user_timeline(session['user_id']), 'private, no-cache')
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+# Public status lookup by reference number (VV-XXXXXXXX)
+@app.route('/api/report/status/<reference>', methods=['GET'])
+def get_report_status(reference):
+    try:
+        report_id = parse_reference(reference)
+        if report_id is None:
+            return jsonify({"error": "Invalid reference number"}), 400
+        
+        entry = status_cache.report_status(report_id)
+        if entry is None:
+            return jsonify({"error": "Report not found"}), 404
+        
+        return cached_json(entry, 'public, no-cache')
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
 @app.route('/api/report/<report_id>', methods=['GET'])
 def get_report(report_id):
     try:
-        report = next((r for r in reports_db if r['report_id'] == report_id), None)
+        report = find_report(parse_reference(report_id) or report_id)
         
         if not report:
             return jsonify({"error": "Report not found"}), 404
@@ -187,19 +717,16 @@ def get_report(report_id):
 @app.route('/api/translate/<language>', methods=['GET'])
 def get_translations(language):
     try:
-        file_path = f"../translations/{language}.json"
+        bundle = translation_registry.get(language)
         
-        if not os.path.exists(file_path):
+        if bundle is None:
             return jsonify({"error": "Language not supported"}), 404
         
-        with open(file_path, 'r', encoding='utf-8') as f:
-            translations = json.load(f)
-        
-        return jsonify({
-            "success": True,
-            "language": language,
-            "translations": translations
-        })
+        body, etag = bundle
+        response = Response(body, mimetype='application/json')
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'public, max-age=300, must-revalidate'
+        return response.make_conditional(request)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -234,17 +761,186 @@ def process_speech():
         data = request.get_json()
         text = data.get('text', '')
         
+        if not text.strip():
+            return jsonify({"error": "Text is required"}), 400
+        
+        job_id = speech_jobs.submit(text, data.get('language'))
+        
+        return jsonify({
+            "success": True,
+            "job_id": job_id,
+            "status": "queued",
+            "status_url": f"/api/speech/jobs/{job_id}"
+        }), 202
+    except QueueFull as e:
+        return jsonify({"error": str(e)}), 503, {'Retry-After': '1'}
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/speech/jobs/<job_id>', methods=['GET'])
+def get_speech_job(job_id):
+    # ?wait=N long-polls up to N seconds for the result
+    try:
+        wait = min(max(float(request.args.get('wait', 0)), 0), MAX_JOB_WAIT)
+        job = speech_jobs.get(job_id, wait=wait)
+        
+        if job is None:
+            return jsonify({"error": "Job not found"}), 404
+        
         return jsonify({
             "success": True,
-            "text": text,
-            "language": "en-IN",
-            "confidence": 0.85
+            "job_id": job_id,
+            "status": job['status'],
+            "result": job['result'],
+            "error": job['error']
         })
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 # ====================== ADMIN ROUTES ======================
 
+def get_status_counts():
+    # Served from the status index and the archive's counts, no scan
+    archived = report_archive.counts_by('status')
+    return {status: reports_db.count_where('status', status) + archived.get(status, 0)
+            for status in REPORT_STATUSES}
+
+def merge_counts(*counts):
+    merged = {}
+    for part in counts:
+        for value, count in part.items():
+            merged[value] = merged.get(value, 0) + count
+    return merged
+
+def parse_limit(args):
+    limit = int(args.get('limit', 50))
+    return max(1, min(limit, MAX_PAGE_SIZE))
+
+def parse_float(args, name, default=None):
+    value = args.get(name, default)
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"Missing or invalid parameter: {name}")
+
+def parse_bbox(args):
+    south, west = parse_float(args, 'south'), parse_float(args, 'west')
+    north, east = parse_float(args, 'north'), parse_float(args, 'east')
+    if south > north or west > east:
+        raise ValueError("Invalid bounding box")
+    return south, west, north, east
+
+def report_matcher(args):
+    # Equality filters for ids coming from a secondary index; None when
+    # there is nothing to filter on
+    status = args.get('status')
+    filters = {
+        'status': None if status == 'all' else status,
+        'problem_type': args.get('category'),
+        'language': args.get('language')
+    }
+    filters = {field: value for field, value in filters.items() if value}
+    if not filters:
+        return None
+    
+    def matches(report_id):
+        report = reports_db.get(report_id)
+        return report is not None and all(report.get(f) == v for f, v in filters.items())
+    return matches
+
+def parse_date_bound(value, end=False):
+    # ISO date or datetime -> string comparable with created_at. A bare
+    # date used as an upper bound covers that whole day.
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f"Invalid date: {value}")
+    if len(value) == 10:
+        day = parsed.date() + timedelta(days=1) if end else parsed.date()
+        return day.isoformat()
+    return parsed.isoformat()
+
+def parse_report_filters(args, **fixed):
+    # Equality filters plus created_at bounds shared by listings and exports
+    status = args.get('status')
+    filters = {
+        'status': None if status == 'all' else status,
+        'problem_type': args.get('category'),
+        'language': args.get('language'),
+        'since': parse_date_bound(args.get('from')),
+        'until': parse_date_bound(args.get('to'), end=True),
+    }
+    filters.update(fixed)
+    return filters
+
+def resolve_report_cursor(cursor, descending=False):
+    if not cursor:
+        return None
+    report_id, created_at = decode_cursor(cursor, str, str)
+    return reports_db.cursor_seq(report_id, created_at, descending)
+
+def page_reports(args, **fixed):
+    """One keyset page of reports for the filters in `args`.
+
+    Reads only the rows returned (plus one to detect a next page). The
+    legacy `page` parameter still works when no cursor is given, at the
+    cost of skipping the earlier rows. With more than one equality filter
+    the total means intersecting index buckets, which grows with the data,
+    so `count` and `total_pages` are null unless `total=exact` is passed.
+    """
+    filters = parse_report_filters(args, **fixed)
+    limit = parse_limit(args)
+    descending = args.get('order', 'asc') == 'desc'
+    cursor = args.get('cursor')
+    page = int(args.get('page', 1))
+    offset = 0 if cursor else (max(page, 1) - 1) * limit
+
+    by_priority = args.get('sort') == 'priority'
+
+    if by_priority:
+        after = None
+        if cursor:
+            report_id, created_at, priority = decode_cursor(cursor, str, str, (int, float))
+            after = reports_db.rank_key(priority, report_id, created_at)
+        rows = reports_db.scan_ranked(after=after, **filters)
+    else:
+        rows = reports_db.scan(after=resolve_report_cursor(cursor, descending),
+                               descending=descending, **filters)
+    reports = list(islice(rows, offset, offset + limit + 1))
+    has_more = len(reports) > limit
+    reports = reports[:limit]
+    equality = [field for field, value in filters.items()
+                if value is not None and field not in ('since', 'until')]
+    count = None
+    if len(equality) <= 1 or args.get('total') == 'exact':
+        count = reports_db.count(**filters)
+
+    next_cursor = None
+    if has_more:
+        last = reports[-1]
+        if by_priority:
+            next_cursor = encode_cursor(last['report_id'], last['created_at'], last.get('priority') or 0)
+        else:
+            next_cursor = report_cursor(last)
+    return {
+        "reports": reports,
+        "count": count,
+        "limit": limit,
+        "page": page,
+        "total_pages": (count + limit - 1) // limit if count is not None else None,
+        "has_more": has_more,
+        "next_cursor": next_cursor
+    }
+
+def audit(action, target=None, admin=None, **details):
+    # Queue an admin activity entry for the current request
+    return audit_log.record(admin or session.get('admin_username'), action, target=target,
+                            ip=request.remote_addr, **details)
+
 # Admin authentication decorator
 def admin_required(f):
     @wraps(f)
@@ -256,6 +952,7 @@ def admin_required(f):
 
 # Admin login
 @app.route('/api/admin/login', methods=['POST'])
+@rate_limited('login', lambda: {'account': login_account('username')})
 def admin_login():
     try:
         data = request.get_json()
@@ -263,20 +960,17 @@ def admin_login():
         password = data.get('password')
         
         # Validate admin credentials
-        valid_admins = {
-            'admin': 'admin123',
-            'villageadmin': 'village@2024'
-        }
-        
-        if username in valid_admins and valid_admins[username] == password:
+        if check_admin(admin_accounts, username, password):
             session['admin_logged_in'] = True
             session['admin_username'] = username
+            audit('login', admin=username)
             return jsonify({
                 "success": True,
                 "message": "Login successful",
                 "username": username
             })
         
+        audit('login_failed', admin=username if isinstance(username, str) else None)
         return jsonify({"error": "Invalid credentials"}), 401
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -284,6 +978,8 @@ def admin_login():
 # Admin logout
 @app.route('/api/admin/logout', methods=['POST'])
 def admin_logout():
+    if session.get('admin_logged_in'):
+        audit('logout')
     session.pop('admin_logged_in', None)
     session.pop('admin_username', None)
     return jsonify({"success": True, "message": "Logged out successfully"})
@@ -293,97 +989,70 @@ def admin_logout():
 @admin_required
 def get_all_reports():
     try:
-        # Get query parameters
-        status = request.args.get('status', 'all')
-        page = int(request.args.get('page', 1))
-        limit = int(request.args.get('limit', 50))
-        
-        # Filter reports based on parameters
-        filtered_reports = reports_db.copy()
-        
-        if status != 'all':
-            filtered_reports = [r for r in filtered_reports if r['status'] == status]
-        
-        # Pagination
-        start_index = (page - 1) * limit
-        end_index = start_index + limit
-        paginated_reports = filtered_reports[start_index:end_index]
+        result = page_reports(request.args)
         
         # Get counts by status
-        status_counts = {
-            'total': len(reports_db),
-            'submitted': len([r for r in reports_db if r['status'] == 'submitted']),
-            'pending': len([r for r in reports_db if r['status'] == 'pending']),
-            'in_progress': len([r for r in reports_db if r['status'] == 'in_progress']),
-            'resolved': len([r for r in reports_db if r['status'] == 'resolved']),
-            'rejected': len([r for r in reports_db if r['status'] == 'rejected'])
-        }
+        status_counts = {'total': len(reports_db) + len(report_archive), **get_status_counts()}
         
-        return jsonify({
+        return report_list_response({
             "success": True,
-            "reports": paginated_reports,
-            "count": len(filtered_reports),
-            "status_counts": status_counts,
-            "page": page,
-            "limit": limit,
-            "total_pages": (len(filtered_reports) + limit - 1) // limit
+            **result,
+            "status_counts": status_counts
         })
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+# Live feed of report events (Server-Sent Events)
+@app.route('/api/admin/events', methods=['GET'])
+@admin_required
+def report_event_stream():
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+    try:
+        last_event_id = int(last_event_id) if last_event_id else None
+    except ValueError:
+        return jsonify({"error": "Invalid Last-Event-ID"}), 400
+    
+    return Response(report_events.stream(last_event_id), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
 # Get admin dashboard statistics
 @app.route('/api/admin/stats', methods=['GET'])
 @admin_required
 def get_admin_stats():
     try:
         # Calculate statistics
-        total_reports = len(reports_db)
+        total_reports = len(reports_db) + len(report_archive)
         total_users = len(users_db)
         
         # Status counts
-        status_counts = {
-            'submitted': len([r for r in reports_db if r['status'] == 'submitted']),
-            'pending': len([r for r in reports_db if r['status'] == 'pending']),
-            'in_progress': len([r for r in reports_db if r['status'] == 'in_progress']),
-            'resolved': len([r for r in reports_db if r['status'] == 'resolved']),
-            'rejected': len([r for r in reports_db if r['status'] == 'rejected'])
-        }
+        status_counts = get_status_counts()
         
         # Category counts
-        categories = {}
-        for report in reports_db:
-            category = report['problem_type']
-            categories[category] = categories.get(category, 0) + 1
+        categories = merge_counts(reports_db.counts_by('problem_type'),
+                                  report_archive.counts_by('problem_type'))
         
         # Language distribution
-        languages = {}
-        for report in reports_db:
-            lang = report['language']
-            languages[lang] = languages.get(lang, 0) + 1
-        
-        # Recent activity (last 7 days)
-        recent_reports = []
-        week_ago = datetime.now().timestamp() - (7 * 24 * 60 * 60)
-        for report in reports_db:
-            try:
-                report_date = datetime.fromisoformat(report['created_at'].replace('Z', '+00:00'))
-                if report_date.timestamp() > week_ago:
-                    recent_reports.append(report)
-            except:
-                continue
+        languages = merge_counts(reports_db.counts_by('language'),
+                                 report_archive.counts_by('language'))
+        
+        # Resolution time over resolved reports
+        avg_days = report_stats.avg_resolution_days(report_archive.resolution_totals())
         
         return jsonify({
             "success": True,
             "stats": {
                 "total_reports": total_reports,
                 "total_users": total_users,
-                "recent_reports": len(recent_reports),
+                "recent_reports": report_stats.recent_count(),
                 "status_counts": status_counts,
                 "categories": categories,
                 "languages": languages,
-                "avg_resolution_time": "3.2 days",  # In production, calculate this
-                "villages_covered": 12,  # In production, extract from location data
-                "today_submissions": len([r for r in recent_reports if r['created_at'].startswith(datetime.now().date().isoformat())])
+                "avg_resolution_time": f"{avg_days:.1f} days" if avg_days is not None else "N/A",
+                "villages_covered": report_stats.villages_covered(report_archive.counts_by('village')),
+                "today_submissions": report_stats.day_count(),
+                "daily_submissions": report_stats.daily_counts()
             }
         })
     except Exception as e:
@@ -394,7 +1063,7 @@ def get_admin_stats():
 @admin_required
 def get_admin_report(report_id):
     try:
-        report = next((r for r in reports_db if r['report_id'] == report_id), None)
+        report = find_report(report_id)
         
         if not report:
             return jsonify({"error": "Report not found"}), 404
@@ -422,22 +1091,36 @@ def update_report_status(report_id):
         if not new_status:
             return jsonify({"error": "Status is required"}), 400
         
-        # Find and update report
-        for i, report in enumerate(reports_db):
-            if report['report_id'] == report_id:
-                reports_db[i]['status'] = new_status
-                reports_db[i]['updated_at'] = datetime.now().isoformat()
-                reports_db[i]['admin_notes'] = admin_notes
-                reports_db[i]['resolved_by'] = session.get('admin_username')
-                reports_db[i]['resolved_at'] = datetime.now().isoformat()
-                
-                return jsonify({
-                    "success": True,
-                    "message": f"Report status updated to {new_status}",
-                    "report": reports_db[i]
-                })
+        # Find and update report, recording the transition for the
+        # citizen's status history
+        restore_report(report_id)
+        now = datetime.now().isoformat()
+        with reports_db.batch():
+            current = reports_db.get(report_id)
+            changes = {
+                'status': new_status,
+                'updated_at': now,
+                'admin_notes': admin_notes,
+                'resolved_by': session.get('admin_username'),
+                'resolved_at': now
+            }
+            if current and current.get('status') != new_status:
+                changes['status_history'] = current.get('status_history', []) + [
+                    {'from': current.get('status'), 'status': new_status, 'at': now}
+                ]
+            report = reports_db.update(report_id, changes)
+        
+        if not report:
+            return jsonify({"error": "Report not found"}), 404
+        journal.sync()
+        audit('update_status', report_id, status=new_status,
+              previous=current.get('status') if current else None, notes=admin_notes)
         
-        return jsonify({"error": "Report not found"}), 404
+        return jsonify({
+            "success": True,
+            "message": f"Report status updated to {new_status}",
+            "report": report
+        })
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -446,33 +1129,209 @@ def update_report_status(report_id):
 @admin_required
 def get_all_users():
     try:
+        limit = parse_limit(request.args)
+        cursor = request.args.get('cursor')
         page = int(request.args.get('page', 1))
-        limit = int(request.args.get('limit', 50))
-        
-        # Convert users_db to list for pagination
-        users_list = []
-        for user_id, user_data in users_db.items():
-            user_entry = {"user_id": user_id, **user_data}
-            
-            # Add report count for this user
-            user_reports = [r for r in reports_db if r['user_id'] == user_id]
-            user_entry['report_count'] = len(user_reports)
-            
-            users_list.append(user_entry)
-        
-        # Pagination
-        start_index = (page - 1) * limit
-        end_index = start_index + limit
-        paginated_users = users_list[start_index:end_index]
+        if cursor:
+            after = decode_cursor(cursor, int)[0]
+        else:
+            after = (max(page, 1) - 1) * limit - 1
+        
+        # Only the users on this page are materialised
+        rows = users_db.page(after, limit + 1)
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        paginated_users = [
+            {"user_id": user_id, **user_data,
+             "report_count": reports_db.count_where('user_id', user_id)}
+            for _, user_id, user_data in rows
+        ]
         
         return jsonify({
             "success": True,
             "users": paginated_users,
-            "count": len(users_list),
+            "count": len(users_db),
             "page": page,
             "limit": limit,
-            "total_pages": (len(users_list) + limit - 1) // limit
+            "total_pages": (len(users_db) + limit - 1) // limit,
+            "has_more": has_more,
+            "next_cursor": encode_cursor(rows[-1][0]) if has_more else None
+        })
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+# Re-score every report with the current classifier (admin only)
+@app.route('/api/admin/reports/rescore', methods=['POST'])
+@admin_required
+def rescore_reports():
+    try:
+        retrain = (request.get_json(silent=True) or {}).get('retrain', True)
+        trained_on = report_classifier.fit_store(reports_db) if retrain else None
+        
+        scored = changed = 0
+        batch = []
+        
+        def flush():
+            nonlocal changed
+            for report, scores in zip(batch, report_classifier.score_many(batch)):
+                if any(report.get(field) != value for field, value in scores.items()):
+                    reports_db.update(report['report_id'], scores)
+                    changed += 1
+            batch.clear()
+        
+        for report in reports_db.scan():
+            batch.append(report)
+            scored += 1
+            if len(batch) == RESCORE_BATCH:
+                flush()
+        flush()
+        journal.sync()
+        audit('rescore', retrain=bool(retrain), scored=scored, changed=changed)
+        
+        return jsonify({
+            "success": True,
+            "scored": scored,
+            "changed": changed,
+            "trained_on": trained_on
+        })
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+# Full-text search over report text (admin only)
+@app.route('/api/admin/reports/search', methods=['GET'])
+@admin_required
+def search_reports():
+    try:
+        query = request.args.get('q', '').strip()
+        if not query:
+            return jsonify({"error": "Search query is required"}), 400
+        
+        limit = parse_limit(request.args)
+        offset = max(int(request.args.get('offset', 0)), 0)
+        matches = report_matcher(request.args)
+        
+        hits = search_index.search(query, limit=limit, offset=offset, predicate=matches)
+        results = []
+        for report_id, score in hits:
+            report = reports_db.get(report_id)
+            if report:
+                results.append({**report, "score": round(score, 4)})
+        
+        return jsonify({
+            "success": True,
+            "query": query,
+            "reports": results,
+            "count": len(results),
+            "limit": limit,
+            "offset": offset
+        })
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+# Play back a report's voice recording (admin only); supports Range
+@app.route('/api/admin/audio/<audio_id>', methods=['GET'])
+@admin_required
+def get_audio(audio_id):
+    try:
+        info = audio_store.info(audio_id)
+        if info is None:
+            return jsonify({"error": "Audio not found"}), 404
+        
+        # Content-addressed, so the file never changes under this URL
+        response = send_file(info['path'], mimetype=info['content_type'],
+                             conditional=True, etag=audio_id, max_age=31536000)
+        response.headers['Accept-Ranges'] = 'bytes'
+        return response
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+# Reports within a radius of a point (admin only)
+@app.route('/api/admin/reports/nearby', methods=['GET'])
+@admin_required
+def get_nearby_reports():
+    try:
+        lat, lng = parse_float(request.args, 'lat'), parse_float(request.args, 'lng')
+        radius = min(parse_float(request.args, 'radius', 500), MAX_RADIUS_M)
+        limit = parse_limit(request.args)
+        matches = report_matcher(request.args)
+        
+        results = []
+        for report_id, distance in geo_index.nearby(lat, lng, radius):
+            if matches is not None and not matches(report_id):
+                continue
+            # The index can briefly lag a delete (SQLite: until the poller
+            # catches up)
+            report = reports_db.get(report_id)
+            if report:
+                results.append({**report, "distance_m": round(distance, 1)})
+                if len(results) == limit:
+                    break
+        
+        return jsonify({
+            "success": True,
+            "reports": results,
+            "count": len(results),
+            "radius": radius
+        })
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+# Reports inside a bounding box (admin only)
+@app.route('/api/admin/reports/within', methods=['GET'])
+@admin_required
+def get_reports_within():
+    try:
+        south, west, north, east = parse_bbox(request.args)
+        limit = parse_limit(request.args)
+        matches = report_matcher(request.args)
+        
+        report_ids = geo_index.within(south, west, north, east)
+        if matches is not None:
+            report_ids = [rid for rid in report_ids if matches(rid)]
+        results = []
+        for report_id in report_ids:
+            report = reports_db.get(report_id)
+            if not report:
+                continue  # Deleted since the index was read
+            lat, lng = geo_index.location_of(report_id) or (None, None)
+            results.append({**report, "lat": lat, "lng": lng})
+            if len(results) == limit:
+                break
+        
+        return jsonify({
+            "success": True,
+            "reports": results,
+            "count": len(report_ids),
+            "limit": limit
+        })
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+# Aggregated report clusters for the map (admin only)
+@app.route('/api/admin/reports/clusters', methods=['GET'])
+@admin_required
+def get_report_clusters():
+    try:
+        south, west, north, east = parse_bbox(request.args)
+        zoom = int(request.args.get('zoom', 10))
+        clusters = geo_index.clusters(south, west, north, east, zoom)
+        
+        return jsonify({
+            "success": True,
+            "zoom": zoom,
+            "clusters": clusters,
+            "total": sum(cluster['count'] for cluster in clusters)
         })
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -481,14 +1340,15 @@ def get_all_users():
 @admin_required
 def get_reports_by_category(category):
     try:
-        filtered_reports = [r for r in reports_db if r['problem_type'] == category]
+        result = page_reports(request.args, problem_type=category)
         
-        return jsonify({
+        return report_list_response({
             "success": True,
             "category": category,
-            "reports": filtered_reports,
-            "count": len(filtered_reports)
+            **result
         })
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -497,11 +1357,21 @@ def get_reports_by_category(category):
 @admin_required
 def delete_report(report_id):
     try:
-        global reports_db
-        initial_length = len(reports_db)
-        reports_db = [r for r in reports_db if r['report_id'] != report_id]
-        
-        if len(reports_db) < initial_length:
+        report = reports_db.remove(report_id)
+        # Drop any archived copy too, whether the report had been archived
+        # or an interrupted archive pass left one behind
+        archived = report_archive.get(report_id)
+        if archived is not None:
+            report_archive.forget([report_id])
+            if report is None:
+                # Only archived: listeners that read the archive (status
+                # cache, event feed) still need to hear about it
+                report = archived
+                reports_db.forget(archived)
+        if report:
+            audit('delete_report', report_id, status=report.get('status'),
+                  problem_type=report.get('problem_type'))
+            journal.sync()
             return jsonify({
                 "success": True,
                 "message": f"Report {report_id} deleted successfully"
@@ -511,59 +1381,123 @@ def delete_report(report_id):
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+def archived_reports(cursor, filters):
+    # Archived reports for an export, resuming after `cursor`. Copies of
+    # reports that are back in reports_db are skipped.
+    after = None
+    if cursor:
+        report_id, created_at = decode_cursor(cursor, str, str)
+        after = (created_at, report_id)
+    for report in report_archive.scan(after=after, **filters):
+        if report['report_id'] not in reports_db:
+            yield report
+
 # Export reports (admin only)
 @app.route('/api/admin/reports/export', methods=['GET'])
 @admin_required
 def export_reports():
     try:
         format_type = request.args.get('format', 'json')
+        filters = parse_report_filters(request.args)
+        cursor = request.args.get('cursor')
+        after = resolve_report_cursor(cursor)
+        
+        # Rows are pulled from the store and the archive lazily as the
+        # response is written, merged in submission order
+        rows = heapq.merge(archived_reports(cursor, filters), reports_db.scan(after=after, **filters),
+                           key=lambda report: report.get('created_at') or '')
+        audit('export', format=format_type, cursor=cursor,
+              filters={key: value for key, value in filters.items() if value is not None})
         
         if format_type == 'csv':
-            # Simple CSV export
-            csv_data = "report_id,user_id,problem_type,status,created_at,location\n"
-            for report in reports_db:
-                csv_data += f"{report['report_id']},{report['user_id']},{report['problem_type']},{report['status']},{report['created_at']},{report['location']}\n"
-            
-            return csv_data, 200, {'Content-Type': 'text/csv', 'Content-Disposition': 'attachment; filename=reports.csv'}
-        
-        else:  # JSON export (default)
-            return jsonify({
-                "success": True,
-                "count": len(reports_db),
-                "reports": reports_db,
-                "exported_at": datetime.now().isoformat()
-            })
+            return Response(iter_csv(rows), mimetype='text/csv',
+                            headers={'Content-Disposition': 'attachment; filename=reports.csv'})
+        
+        if format_type == 'ndjson':
+            return Response(iter_ndjson(rows), mimetype='application/x-ndjson',
+                            headers={'Content-Disposition': 'attachment; filename=reports.ndjson'})
+        
+        # JSON export (default)
+        return Response(iter_json(rows, datetime.now().isoformat()), mimetype='application/json')
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
-# Admin activity log (simplified)
+# Admin activity log, newest first
 @app.route('/api/admin/activity', methods=['GET'])
 @admin_required
 def get_admin_activity():
     try:
-        # In production, store admin activities in a separate database
-        sample_activities = [
-            {
-                "admin": session.get('admin_username'),
-                "action": "logged_in",
-                "timestamp": datetime.now().isoformat(),
-                "details": "Admin logged into dashboard"
-            },
-            {
-                "admin": session.get('admin_username'),
-                "action": "viewed_reports",
-                "timestamp": datetime.now().isoformat(),
-                "details": "Viewed all reports"
-            }
-        ]
+        limit = parse_limit(request.args)
+        cursor = request.args.get('cursor')
+        before = decode_cursor(cursor, str)[0] if cursor else None
+        
+        activities, has_more = audit_log.query(
+            since=parse_date_bound(request.args.get('from')),
+            until=parse_date_bound(request.args.get('to'), end=True),
+            admin=request.args.get('admin'),
+            action=request.args.get('action'),
+            before=before,
+            limit=limit
+        )
         
         return jsonify({
             "success": True,
-            "activities": sample_activities
+            "activities": activities,
+            "count": len(activities),
+            "has_more": has_more,
+            "next_cursor": encode_cursor(activities[-1]['id']) if has_more else None
         })
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+# Sampling profiler: start for an endpoint, read hot stacks, stop
+@app.route('/api/admin/profiler', methods=['POST'])
+@admin_required
+def start_profiler():
+    try:
+        data = request.get_json(silent=True) or {}
+        endpoint = data.get('endpoint')
+        if endpoint is not None and endpoint not in app.view_functions:
+            return jsonify({"error": f"Unknown endpoint: {endpoint}"}), 400
+        seconds = min(max(float(data.get('seconds', 30)), 1), MAX_PROFILE_SECONDS)
+        interval = max(float(data.get('interval', 0.005)), 0.001)
+        
+        profiler.start(endpoint, seconds, interval)
+        audit('start_profiler', endpoint, seconds=seconds, interval=interval)
+        return jsonify({
+            "success": True,
+            "endpoint": endpoint,
+            "seconds": seconds,
+            "interval": interval
+        })
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/admin/profiler', methods=['GET'])
+@admin_required
+def get_profile():
+    try:
+        if request.args.get('format') == 'collapsed':
+            return Response(profiler.collapsed(), mimetype='text/plain')
+        return jsonify({"success": True, **profiler.report(parse_limit(request.args))})
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/admin/profiler', methods=['DELETE'])
+@admin_required
+def stop_profiler():
+    profiler.stop()
+    audit('stop_profiler')
+    return jsonify({"success": True, **profiler.report(0)})
+
 # Check admin authentication status
 @app.route('/api/admin/check-auth', methods=['GET'])
 def check_admin_auth():
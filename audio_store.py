@@ -0,0 +1,190 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+import uuid
+
+COPY_BUFFER = 64 * 1024
+MAX_AUDIO_SIZE = 25 * 1024 * 1024
+UPLOAD_TTL = 24 * 3600
+
+ALLOWED_AUDIO_TYPES = ('audio/webm', 'audio/ogg', 'audio/wav', 'audio/mpeg', 'audio/mp4', 'audio/aac')
+
+AUDIO_ID_RE = re.compile(r'^[0-9a-f]{64}$')
+UPLOAD_ID_RE = re.compile(r'^[0-9a-f]{32}$')
+
+
+class UploadError(Exception):
+    """Upload request that cannot be applied; `status` is the HTTP code."""
+
+    def __init__(self, message, status=400, offset=None):
+        super().__init__(message)
+        self.status = status
+        self.offset = offset
+
+
+class AudioStore:
+    """Resumable chunked uploads into content-addressed audio files.
+
+    An upload is a `.part` file under `uploads/` whose size is the resume
+    offset; chunks are streamed onto its end in fixed-size pieces. On
+    completion the file is hashed (again in pieces) and moved to
+    `blobs/<sha256[:2]>/<sha256>`, so identical recordings are stored once.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self.uploads_dir = os.path.join(root, 'uploads')
+        self.blobs_dir = os.path.join(root, 'blobs')
+        os.makedirs(self.uploads_dir, exist_ok=True)
+        os.makedirs(self.blobs_dir, exist_ok=True)
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+
+    # ---------- paths ----------
+
+    def _upload_paths(self, upload_id):
+        if not UPLOAD_ID_RE.match(upload_id or ''):
+            raise UploadError("Upload not found", 404)
+        base = os.path.join(self.uploads_dir, upload_id)
+        return base + '.part', base + '.json'
+
+    def _blob_path(self, audio_id):
+        return os.path.join(self.blobs_dir, audio_id[:2], audio_id)
+
+    def _lock_for(self, upload_id):
+        with self._locks_guard:
+            return self._locks.setdefault(upload_id, threading.Lock())
+
+    def _meta(self, upload_id, user_id):
+        part_path, meta_path = self._upload_paths(upload_id)
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+        except OSError:
+            raise UploadError("Upload not found", 404)
+        if meta['user_id'] != user_id:
+            raise UploadError("Upload not found", 404)
+        return meta, part_path, meta_path
+
+    # ---------- uploads ----------
+
+    def create_upload(self, user_id, content_type, size=None):
+        content_type = (content_type or '').split(';')[0].strip().lower()
+        if content_type not in ALLOWED_AUDIO_TYPES:
+            raise UploadError(f"Unsupported audio type: {content_type or 'missing'}", 415)
+        if size is not None and not 0 < size <= MAX_AUDIO_SIZE:
+            raise UploadError("Invalid audio size", 413)
+        self.purge_stale()
+        upload_id = uuid.uuid4().hex
+        part_path, meta_path = self._upload_paths(upload_id)
+        open(part_path, 'wb').close()
+        with open(meta_path, 'w', encoding='utf-8') as f:
+            json.dump({'user_id': user_id, 'content_type': content_type,
+                       'size': size, 'created_at': time.time()}, f)
+        return upload_id
+
+    def offset(self, upload_id, user_id):
+        _, part_path, meta_path = self._meta(upload_id, user_id)
+        # A resume check counts as activity even before the next chunk
+        os.utime(meta_path)
+        return os.path.getsize(part_path)
+
+    def write_chunk(self, upload_id, user_id, offset, stream):
+        """Append `stream` at `offset`, which must equal the current size."""
+        meta, part_path, _ = self._meta(upload_id, user_id)
+        limit = meta['size'] or MAX_AUDIO_SIZE
+        with self._lock_for(upload_id):
+            current = os.path.getsize(part_path)
+            if offset != current:
+                raise UploadError("Offset does not match upload", 409, offset=current)
+            with open(part_path, 'ab') as f:
+                written = current
+                while True:
+                    piece = stream.read(COPY_BUFFER)
+                    if not piece:
+                        break
+                    written += len(piece)
+                    if written > limit:
+                        f.truncate(current)
+                        raise UploadError("Audio exceeds the declared size", 413, offset=current)
+                    f.write(piece)
+                f.flush()
+                os.fsync(f.fileno())
+            return written
+
+    def complete(self, upload_id, user_id):
+        """Move a finished upload into the blob store; returns (audio_id, size)."""
+        meta, part_path, meta_path = self._meta(upload_id, user_id)
+        with self._lock_for(upload_id):
+            size = os.path.getsize(part_path)
+            if not size or (meta['size'] and size != meta['size']):
+                raise UploadError("Upload is incomplete", 409, offset=size)
+            digest = hashlib.sha256()
+            with open(part_path, 'rb') as f:
+                for piece in iter(lambda: f.read(COPY_BUFFER), b''):
+                    digest.update(piece)
+            audio_id = digest.hexdigest()
+            blob_path = self._blob_path(audio_id)
+            os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+            if os.path.exists(blob_path):
+                os.remove(part_path)
+            else:
+                os.replace(part_path, blob_path)
+                with open(blob_path + '.json', 'w', encoding='utf-8') as f:
+                    json.dump({'content_type': meta['content_type'], 'size': size}, f)
+            os.remove(meta_path)
+        with self._locks_guard:
+            self._locks.pop(upload_id, None)
+        return audio_id, size
+
+    def _last_activity(self, upload_id):
+        # Chunks touch the .part file, resume checks the .json one
+        times = []
+        for path in self._upload_paths(upload_id):
+            try:
+                times.append(os.path.getmtime(path))
+            except OSError:
+                continue
+        return max(times, default=0.0)
+
+    def purge_stale(self, max_age=UPLOAD_TTL):
+        """Remove uploads with no activity for `max_age` seconds, both
+        files at once, and forget their locks."""
+        cutoff = time.time() - max_age
+        upload_ids = {name.split('.')[0] for name in os.listdir(self.uploads_dir)}
+        for upload_id in upload_ids:
+            if not UPLOAD_ID_RE.match(upload_id) or self._last_activity(upload_id) >= cutoff:
+                continue
+            lock = self._lock_for(upload_id)
+            if not lock.acquire(blocking=False):
+                continue  # A chunk is being written right now
+            try:
+                if self._last_activity(upload_id) >= cutoff:
+                    continue
+                for path in self._upload_paths(upload_id):
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        continue
+            finally:
+                lock.release()
+            with self._locks_guard:
+                self._locks.pop(upload_id, None)
+
+    # ---------- blobs ----------
+
+    def info(self, audio_id):
+        """{'content_type', 'size', 'path'} for a stored recording, or None."""
+        if not AUDIO_ID_RE.match(audio_id or ''):
+            return None
+        blob_path = self._blob_path(audio_id)
+        try:
+            with open(blob_path + '.json', 'r', encoding='utf-8') as f:
+                info = json.load(f)
+        except OSError:
+            return None
+        info['path'] = blob_path
+        return info
@@ -0,0 +1,305 @@
+import heapq
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from bisect import bisect_left
+from collections import deque
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+SEGMENT_PREFIX = 'audit-'
+SEGMENT_SUFFIX = '.jsonl'
+
+# A writer starts a new segment once the current one reaches this size
+SEGMENT_BYTES = 16 * 1024 * 1024
+
+# Entries waiting for the writer; past this the oldest are dropped
+BUFFER_SIZE = 65536
+
+# Every this many entries a segment's sparse index records (id, time, offset)
+SPARSE_EVERY = 256
+
+READ_CHUNK = 65536
+
+# Segments written by other processes are picked up at most this often
+REFRESH_INTERVAL = 1.0
+
+# Seconds between retries after a failed write
+RETRY_INTERVAL = 1.0
+
+
+class _Segment:
+    """One append-only segment file and its sparse index."""
+
+    __slots__ = ('path', 'own', 'size', 'count', 'first_id', 'last_id',
+                 'first_at', 'last_at', 'marks')
+
+    def __init__(self, path, own):
+        self.path = path
+        self.own = own
+        self.size = 0
+        self.count = 0
+        self.first_id = self.last_id = None
+        self.first_at = self.last_at = None
+        # (id, timestamp, offset) of every SPARSE_EVERY-th entry
+        self.marks = []
+
+    def append(self, entry, offset, length):
+        if self.count % SPARSE_EVERY == 0:
+            self.marks.append((entry['id'], entry['timestamp'], offset))
+        if self.first_id is None:
+            self.first_id, self.first_at = entry['id'], entry['timestamp']
+        self.last_id, self.last_at = entry['id'], entry['timestamp']
+        self.count += 1
+        self.size = offset + length
+
+    def index_tail(self):
+        # Index complete lines appended since the last call
+        with open(self.path, 'rb') as f:
+            f.seek(self.size)
+            data = f.read()
+        offset = self.size
+        for line in data.splitlines(keepends=True):
+            if not line.endswith(b'\n'):
+                break
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                # Torn write from a crashed process; skip the line
+                self.size = offset + len(line)
+            else:
+                self.append(entry, offset, len(line))
+            offset += len(line)
+
+    def window(self, before=None, since=None, until=None):
+        # Byte range that can hold entries within the bounds
+        ids = [mark[0] for mark in self.marks]
+        times = [mark[1] for mark in self.marks]
+        start, end = 0, self.size
+        if since:
+            i = bisect_left(times, since) - 1
+            if i > 0:
+                start = self.marks[i][2]
+        if until:
+            i = bisect_left(times, until)
+            if i < len(self.marks):
+                end = min(end, self.marks[i][2])
+        if before:
+            i = bisect_left(ids, before)
+            if i < len(self.marks):
+                end = min(end, self.marks[i][2])
+        return start, end
+
+
+def _read_reverse(path, start, end):
+    """Lines of `path` between byte offsets `start` and `end`, last first."""
+    with open(path, 'rb') as f:
+        position = end
+        tail = b''
+        while position > start:
+            size = min(READ_CHUNK, position - start)
+            position -= size
+            f.seek(position)
+            lines = (f.read(size) + tail).split(b'\n')
+            tail = lines[0]
+            for line in reversed(lines[1:]):
+                if line:
+                    yield line
+        if tail:
+            yield tail
+
+
+def _entries(path, start, end):
+    for line in _read_reverse(path, start, end):
+        try:
+            yield json.loads(line)
+        except ValueError:
+            continue
+
+
+class AuditLog:
+    """Admin activity log: an in-memory ring buffer drained by a background
+    writer into append-only JSONL segments.
+
+    `record()` only appends to the buffer under a short lock, so request
+    threads never wait on the disk; the writer batches whatever has
+    queued up into one write and fsync. If the writer falls BUFFER_SIZE
+    entries behind, the oldest are dropped and counted. Entry ids are
+    nanosecond timestamps plus a per-process writer id, so they sort by
+    time and stay unique when several worker processes share the
+    directory, each appending to its own segments. Queries read segments
+    backwards from a position found in their sparse index and merge them
+    newest first with entries still in the buffer.
+    """
+
+    def __init__(self, directory, buffer_size=BUFFER_SIZE, segment_bytes=SEGMENT_BYTES):
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+        self._buffer = deque(maxlen=buffer_size)
+        self._writing = []
+        self._last_ns = 0
+        self._segments = {}
+        self._current = None
+        self._file = None
+        self._closed = False
+        self._refreshed_at = 0.0
+        self.writer_id = uuid.uuid4().hex[:8]
+        self.recorded = 0
+        self.dropped = 0
+
+        self.refresh()
+        self._writer = threading.Thread(target=self._run, name='audit-writer', daemon=True)
+        self._writer.start()
+
+    # ---------- recording ----------
+
+    def record(self, admin, action, target=None, ip=None, **details):
+        """Queue one entry; returns its id. Never touches the disk."""
+        with self._lock:
+            ns = max(time.time_ns(), self._last_ns + 1)
+            self._last_ns = ns
+            entry = {
+                "id": f"{ns:019d}-{self.writer_id}",
+                "timestamp": datetime.fromtimestamp(ns / 1e9).isoformat(),
+                "admin": admin,
+                "action": action,
+                "target": target,
+                "ip": ip,
+                "details": details
+            }
+            if len(self._buffer) == self._buffer.maxlen:
+                self.dropped += 1
+                if self.dropped % 1000 == 1:
+                    logger.warning("Audit buffer full; %d entries dropped so far", self.dropped)
+            self._buffer.append(entry)
+            self.recorded += 1
+            self._changed.notify()
+        return entry["id"]
+
+    def pending(self):
+        return len(self._buffer) + len(self._writing)
+
+    # ---------- writer ----------
+
+    def _run(self):
+        while True:
+            with self._lock:
+                while not self._buffer and not self._writing and not self._closed:
+                    self._changed.wait()
+                if not self._buffer and not self._writing:
+                    return
+                self._writing.extend(self._buffer)
+                self._buffer.clear()
+                # A batch that keeps failing still holds no more than the
+                # ring buffer would
+                excess = len(self._writing) - self._buffer.maxlen
+                if excess > 0:
+                    self.dropped += excess
+                    del self._writing[:excess]
+                batch = list(self._writing)
+            try:
+                self._write(batch)
+            except OSError:
+                logger.exception("Audit write failed; retrying in a new segment")
+                self._abandon_segment()
+                time.sleep(RETRY_INTERVAL)
+
+    def _write(self, entries):
+        if self._file is None:
+            name = f"{SEGMENT_PREFIX}{entries[0]['id']}{SEGMENT_SUFFIX}"
+            self._file = open(os.path.join(self.directory, name), 'ab')
+            segment = _Segment(self._file.name, own=True)
+            with self._lock:
+                self._segments[name] = self._current = segment
+        lines = [(json.dumps(entry, separators=(',', ':'), default=str) + '\n')
+                 .encode('ascii') for entry in entries]
+        self._file.write(b''.join(lines))
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        with self._lock:
+            offset = self._current.size
+            for entry, line in zip(entries, lines):
+                self._current.append(entry, offset, len(line))
+                offset += len(line)
+            del self._writing[:len(entries)]
+            full = self._current.size >= self.segment_bytes
+        if full:
+            self._file.close()
+            self._file = None
+
+    def _abandon_segment(self):
+        # After a failed write the file may end in a partial batch; the
+        # index stops before it and the retry starts a new segment
+        try:
+            if self._file is not None:
+                self._file.close()
+        except OSError:
+            pass
+        self._file = None
+
+    def close(self, timeout=5):
+        with self._lock:
+            self._closed = True
+            self._changed.notify()
+        self._writer.join(timeout)
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    # ---------- queries ----------
+
+    def refresh(self):
+        """Index segments written by other processes since the last call."""
+        with self._lock:
+            self._refreshed_at = time.monotonic()
+            for name in sorted(os.listdir(self.directory)):
+                if not (name.startswith(SEGMENT_PREFIX) and name.endswith(SEGMENT_SUFFIX)):
+                    continue
+                segment = self._segments.get(name)
+                if segment is None:
+                    segment = self._segments[name] = _Segment(os.path.join(self.directory, name), own=False)
+                if not segment.own and os.path.getsize(segment.path) > segment.size:
+                    segment.index_tail()
+
+    def query(self, since=None, until=None, admin=None, action=None, before=None, limit=50):
+        """Entries newest first, and whether there are more.
+
+        `since`/`until` bound the ISO timestamp (half-open), `before` is
+        an entry id to continue after (from the previous page's last
+        entry). `admin` and `action` filter by equality.
+        """
+        if time.monotonic() - self._refreshed_at > REFRESH_INTERVAL:
+            self.refresh()
+        with self._lock:
+            queued = list(self._writing) + list(self._buffer)
+            segments = [(segment.path, segment.window(before, since, until))
+                        for segment in self._segments.values()
+                        if segment.count
+                        and (not before or segment.first_id < before)
+                        and (not since or segment.last_at >= since)
+                        and (not until or segment.first_at < until)]
+
+        def matches(entry):
+            return ((not before or entry['id'] < before)
+                    and (not since or entry['timestamp'] >= since)
+                    and (not until or entry['timestamp'] < until)
+                    and (admin is None or entry['admin'] == admin)
+                    and (action is None or entry['action'] == action))
+
+        streams = [reversed(queued)]
+        streams += [_entries(path, start, end) for path, (start, end) in segments]
+        results = []
+        for entry in heapq.merge(*streams, key=lambda entry: entry['id'], reverse=True):
+            if matches(entry):
+                results.append(entry)
+                if len(results) > limit:
+                    break
+        return results[:limit], len(results) > limit
@@ -0,0 +1,159 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+from flask.sessions import SecureCookieSession, SessionInterface
+from itsdangerous import BadSignature, URLSafeTimedSerializer
+from werkzeug.security import check_password_hash
+
+# Access token lifetime; tokens older than half of it are re-issued on use
+TOKEN_TTL = 3600
+
+# Built-in admin accounts (admin/admin123, villageadmin/village@2024).
+# Override with a JSON file of {username: password_hash} via
+# VOCAL_VILLAGE_ADMINS; hashes come from werkzeug's generate_password_hash.
+DEFAULT_ADMINS = {
+    'admin': 'scrypt:32768:8:1$oF4JgcYtC9TnKNCT$883df1455f59831f12e853f14da48ebffc8a26c31fd7ddf6'
+             'dad8c01f28af247d6a239643624fed3c08c5692671a284ed6bbd25a230b5214361c1699d499ed036',
+    'villageadmin': 'scrypt:32768:8:1$PAP6cjInUJU3QVL2$e25813c96b518b977415e27d06b3c377b4f3e322d7b'
+                    '7efe30c2e2c8d45388bed7cccf4008a1c06a2a0a1de17679a18a60cc2e99a743f6240ca37ef6b74afb8f7',
+}
+
+# Compared against when the username is unknown, so response time does
+# not reveal which admin accounts exist
+_DUMMY_HASH = DEFAULT_ADMINS['admin']
+
+
+def load_admins(path=None):
+    """{username: password_hash}, read once at startup."""
+    if not path:
+        return dict(DEFAULT_ADMINS)
+    with open(path, 'r', encoding='utf-8') as f:
+        admins = json.load(f)
+    if not isinstance(admins, dict) or not all(isinstance(v, str) for v in admins.values()):
+        raise ValueError(f"{path} must map usernames to password hashes")
+    return admins
+
+
+def check_admin(admins, username, password):
+    if not isinstance(username, str) or not isinstance(password, str):
+        return False
+    password_hash = admins.get(username)
+    if password_hash is None:
+        check_password_hash(_DUMMY_HASH, password)
+        return False
+    return check_password_hash(password_hash, password)
+
+
+class RevocationList:
+    """Revoked token ids in a SQLite file shared by all worker processes.
+
+    Lookups are a primary-key probe on a per-thread connection; entries
+    are dropped once the token they revoke would have expired anyway.
+    """
+
+    def __init__(self, path):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self._local = threading.local()
+        self._purged_at = 0.0
+        self._connection().execute(
+            "CREATE TABLE IF NOT EXISTS revoked_tokens (jti TEXT PRIMARY KEY, expires_at REAL NOT NULL)")
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30.0, isolation_level=None,
+                                   check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def revoke(self, jti, expires_at):
+        conn = self._connection()
+        conn.execute("INSERT OR REPLACE INTO revoked_tokens (jti, expires_at) VALUES (?, ?)",
+                     (jti, expires_at))
+        now = time.time()
+        if now - self._purged_at > TOKEN_TTL:
+            self._purged_at = now
+            conn.execute("DELETE FROM revoked_tokens WHERE expires_at < ?", (now,))
+
+    def is_revoked(self, jti):
+        return self._connection().execute(
+            "SELECT 1 FROM revoked_tokens WHERE jti = ?", (jti,)).fetchone() is not None
+
+
+class TokenSession(SecureCookieSession):
+    jti = None
+    issued_at = None
+
+
+class TokenSessionInterface(SessionInterface):
+    """Flask sessions carried as signed, short-lived access tokens.
+
+    The session dict is the token's claims, so routes keep using
+    `session[...]` while no per-user state is held server side. A token is
+    accepted from `Authorization: Bearer ...` or the session cookie, must
+    be younger than `ttl`, and must not be on the revocation list (one
+    indexed lookup). Clearing the session, as logout does, revokes the
+    token. Changed or half-expired sessions get a fresh token in the cookie
+    and in the X-Access-Token response header.
+    """
+
+    session_class = TokenSession
+    salt = 'vocal-village-access-token'
+
+    def __init__(self, revocations, ttl=TOKEN_TTL):
+        self.revocations = revocations
+        self.ttl = ttl
+
+    def _serializer(self, app):
+        return URLSafeTimedSerializer(app.secret_key, salt=self.salt)
+
+    def open_session(self, app, request):
+        if not app.secret_key:
+            return None
+        header = request.headers.get('Authorization', '')
+        token = header[7:].strip() if header[:7].lower() == 'bearer ' else None
+        token = token or request.cookies.get(self.get_cookie_name(app))
+        if not token:
+            return self.session_class()
+        try:
+            claims, issued = self._serializer(app).loads(token, max_age=self.ttl, return_timestamp=True)
+        except BadSignature:
+            return self.session_class()
+        jti = claims.pop('jti', None)
+        if not jti or self.revocations.is_revoked(jti):
+            return self.session_class()
+        session = self.session_class(claims)
+        session.jti = jti
+        session.issued_at = issued.timestamp()
+        return session
+
+    def save_session(self, app, session, response):
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+        if not session:
+            if session.jti:
+                self.revocations.revoke(session.jti, session.issued_at + self.ttl)
+                response.delete_cookie(name, domain=domain, path=path)
+            return
+        stale = session.issued_at is None or time.time() - session.issued_at > self.ttl / 2
+        if not (session.modified or stale):
+            return
+        if session.modified and session.jti:
+            # Claims changed (e.g. admin logout with a user still logged
+            # in); the old token must not keep the old claims alive
+            self.revocations.revoke(session.jti, session.issued_at + self.ttl)
+        token = self._serializer(app).dumps({**session, 'jti': uuid.uuid4().hex})
+        response.set_cookie(name, token, max_age=self.ttl, domain=domain, path=path,
+                            httponly=self.get_cookie_httponly(app),
+                            secure=self.get_cookie_secure(app),
+                            samesite=self.get_cookie_samesite(app))
+        response.headers['X-Access-Token'] = token
+        response.vary.add('Cookie')
+        response.vary.add('Authorization')
@@ -0,0 +1,289 @@
+"""Load benchmark for the main API endpoints as the data set grows.
+
+Seeds synthetic multilingual reports into a throwaway data directory in
+steps (10k, 100k, 1M by default) and, at each scale, drives every
+endpoint through Flask's test client from concurrent threads, recording
+requests/s and p50/p99 latency. Results are written as JSON so runs can be
+diffed; --compare exits non-zero if any p99 regressed beyond --tolerance.
+
+    python bench_api.py [--scales 10000,100000,1000000] [--requests 200]
+                        [--concurrency 4] [--backend memory]
+                        [--output bench_api.json] [--compare baseline.json]
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+DATA_DIR = tempfile.mkdtemp(prefix='vv-bench-api-')
+os.environ['VOCAL_VILLAGE_DATA_DIR'] = DATA_DIR
+os.environ['VOCAL_VILLAGE_RATE_LIMITS'] = 'off'
+os.environ['VOCAL_VILLAGE_ARCHIVE_AFTER_DAYS'] = '0'
+
+CATEGORIES = ('water', 'electricity', 'road', 'health', 'education', 'agriculture', 'animal', 'other')
+STATUSES = ('submitted', 'submitted', 'pending', 'in_progress', 'resolved', 'resolved', 'rejected')
+
+# Short complaint templates per language; {n} keeps texts distinct
+PHRASES = {
+    'en': ("hand pump broken near school {n}", "no electricity since {n} days in ward",
+           "pothole on main road near temple {n}", "doctor not coming to clinic {n}",
+           "teacher absent again, {n} students waiting", "crop pest spreading in field {n}",
+           "stray dogs attacking children near well {n}"),
+    'hi': ("स्कूल के पास हैंडपंप खराब है {n}", "वार्ड में {n} दिन से बिजली नहीं है",
+           "मंदिर के पास सड़क पर गड्ढा {n}", "अस्पताल में डॉक्टर नहीं आते {n}",
+           "फसल में कीड़े लग गए {n}"),
+    'ta': ("பள்ளி அருகே கிணறு உடைந்துள்ளது {n}", "{n} நாட்களாக மின்சாரம் இல்லை",
+           "சாலை சேதமடைந்துள்ளது {n}"),
+    'te': ("పాఠశాల దగ్గర బావి పాడైంది {n}", "{n} రోజులుగా కరెంట్ లేదు", "రోడ్డు గుంతలు {n}"),
+    'bn': ("স্কুলের পাশে নলকূপ খারাপ {n}", "{n} দিন ধরে বিদ্যুৎ নেই", "রাস্তা ভাঙা {n}"),
+}
+LANGUAGES = tuple(PHRASES)
+
+# Seeded reports span this many days before the run
+SEED_DAYS = 90
+
+
+def percentile(samples, fraction):
+    if not samples:
+        return 0.0
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(fraction * len(samples)))]
+
+
+def make_report(app_module, rng, index, created_at):
+    language = rng.choice(LANGUAGES)
+    text = rng.choice(PHRASES[language]).format(n=index % 997)
+    report = app_module.Report(
+        report_id=f"{index:08x}",
+        user_id=f"user_{index % 5000:04d}",
+        problem_type=rng.choice(CATEGORIES),
+        description=text,
+        voice_text='',
+        location=f"{rng.uniform(8, 30):.5f},{rng.uniform(70, 90):.5f}",
+        language=language,
+        status=rng.choice(STATUSES)
+    ).to_dict()
+    report['created_at'] = report['updated_at'] = created_at.isoformat()
+    if report['status'] == 'resolved':
+        report['resolved_at'] = (created_at + timedelta(days=rng.uniform(0.5, 12))).isoformat()
+    return report
+
+
+def seed(app_module, start, stop, max_scale, rng, chunk=1000):
+    """Add reports [start, stop) spread evenly over SEED_DAYS, in
+    submission order, scoring them in batches like the rescore job."""
+    origin = datetime.now() - timedelta(days=SEED_DAYS)
+    step = timedelta(days=SEED_DAYS) / max_scale
+    for first in range(start, stop, chunk):
+        reports = [make_report(app_module, rng, i, origin + step * i)
+                   for i in range(first, min(first + chunk, stop))]
+        for report, scores in zip(reports, app_module.report_classifier.score_many(reports)):
+            report.update(scores)
+        with app_module.reports_db.batch():
+            for report in reports:
+                app_module.reports_db.add(report)
+    for i in range(min(start, 5000), min(stop, 5000)):
+        app_module.users_db[f"user_{i:04d}"] = {
+            "aadhaar_number": f"{i:012d}", "name": f"Citizen {i}", "phone": "",
+            "created_at": (origin + step * i).isoformat()
+        }
+
+
+def scenarios(app_module, rng):
+    """(name, method, url-or-callable, json body factory, max body bytes)."""
+    mid = app_module.reports_db.get(f"{len(app_module.reports_db) // 2:08x}")
+    deep = app_module.report_cursor(mid) if mid else ''
+    counter = iter(range(10 ** 9))
+
+    def submit_body():
+        language = rng.choice(LANGUAGES)
+        n = next(counter)
+        return {
+            "problem_type": rng.choice(CATEGORIES),
+            "description": rng.choice(PHRASES[language]).format(n=n) + f" bench {n}",
+            "location": f"{rng.uniform(8, 30):.5f},{rng.uniform(70, 90):.5f}",
+            "language": language
+        }
+
+    return [
+        ('submit_report', 'POST', '/api/report/submit', submit_body, None),
+        ('get_all_reports', 'GET', '/api/admin/reports?limit=50', None, None),
+        ('get_all_reports_deep_cursor', 'GET', f'/api/admin/reports?limit=50&cursor={deep}', None, None),
+        ('get_all_reports_filtered', 'GET',
+         '/api/admin/reports?limit=50&status=resolved&category=water&language=hi', None, None),
+        ('get_all_reports_by_priority', 'GET', '/api/admin/reports?limit=50&sort=priority', None, None),
+        ('get_admin_stats', 'GET', '/api/admin/stats', None, None),
+        ('get_all_users', 'GET', '/api/admin/users?limit=50', None, None),
+        ('get_all_users_page_50', 'GET', '/api/admin/users?limit=50&page=50', None, None),
+        ('export_reports_ndjson_64k', 'GET', '/api/admin/reports/export?format=ndjson', None, 65536),
+        ('export_reports_csv_filtered_64k', 'GET',
+         '/api/admin/reports/export?format=csv&status=pending&category=road', None, 65536),
+    ]
+
+
+def login(client):
+    client.post('/api/login/manual', json={"aadhaar_number": "123456789012", "name": "Bench"})
+    client.post('/api/admin/login', json={"username": "admin", "password": "admin123"})
+
+
+def call(client, method, url, body, max_bytes):
+    if method == 'POST':
+        response = client.post(url, json=body())
+        response.close()
+        return response.status_code
+    if max_bytes is None:
+        response = client.get(url)
+        response.close()
+        return response.status_code
+    # Streamed exports: time to read the first `max_bytes`
+    response = client.get(url, buffered=False)
+    read = 0
+    for chunk in response.response:
+        read += len(chunk)
+        if read >= max_bytes:
+            break
+    response.close()
+    return response.status_code
+
+
+def measure(app, scenario, requests, concurrency, warmup=5):
+    name, method, url, body, max_bytes = scenario
+    clients = [app.test_client() for _ in range(concurrency)]
+    for client in clients:
+        login(client)
+    for _ in range(warmup):
+        call(clients[0], method, url, body, max_bytes)
+
+    latencies, errors = [], [0]
+    lock = threading.Lock()
+    per_thread = max(1, requests // concurrency)
+
+    def run(client):
+        local, failed = [], 0
+        for _ in range(per_thread):
+            start = time.perf_counter()
+            status = call(client, method, url, body, max_bytes)
+            local.append(time.perf_counter() - start)
+            failed += status >= 400
+        with lock:
+            latencies.extend(local)
+            errors[0] += failed
+
+    threads = [threading.Thread(target=run, args=(client,)) for client in clients]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    return {
+        "requests": len(latencies),
+        "errors": errors[0],
+        "rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 0.5) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 3),
+        "mean_ms": round(sum(latencies) / len(latencies) * 1000, 3)
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except OSError:
+        return None
+
+
+def compare(results, baseline, tolerance):
+    """Lines describing p99 changes; second value is True on regression."""
+    lines, regressed = [], False
+    old = {(run['scale'], name): stats for run in baseline['runs']
+           for name, stats in run['endpoints'].items()}
+    for run in results['runs']:
+        for name, stats in run['endpoints'].items():
+            before = old.get((run['scale'], name))
+            if not before or not before['p99_ms']:
+                continue
+            change = stats['p99_ms'] / before['p99_ms'] - 1
+            flag = ''
+            if change > tolerance:
+                flag, regressed = '  REGRESSION', True
+            lines.append(f"{run['scale']:>9,} {name:34s} p99 {before['p99_ms']:9.2f} -> "
+                         f"{stats['p99_ms']:9.2f} ms ({change:+.0%}){flag}")
+    return lines, regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scales', default='10000,100000,1000000')
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--backend', choices=('memory', 'sqlite'), default='memory')
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--output', default='bench_api.json')
+    parser.add_argument('--compare')
+    parser.add_argument('--tolerance', type=float, default=0.25)
+    args = parser.parse_args()
+    scales = sorted(int(scale) for scale in args.scales.split(','))
+
+    os.environ['VOCAL_VILLAGE_STORAGE'] = args.backend
+    import app as app_module
+    app = app_module.app
+
+    results = {
+        "benchmark": "bench_api",
+        "commit": git_commit(),
+        "started_at": datetime.now().isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "backend": args.backend,
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "seed": args.seed,
+        "runs": []
+    }
+    rng = random.Random(args.seed)
+    try:
+        seeded = 0
+        for scale in scales:
+            start = time.perf_counter()
+            seed(app_module, seeded, scale, scales[-1], rng)
+            seeded = scale
+            seed_s = time.perf_counter() - start
+            print(f"seeded {scale:,} reports ({seed_s:.1f}s)", file=sys.stderr)
+            run = {"scale": scale, "seed_seconds": round(seed_s, 2), "endpoints": {}}
+            for scenario in scenarios(app_module, rng):
+                stats = measure(app, scenario, args.requests, args.concurrency)
+                run["endpoints"][scenario[0]] = stats
+                print(f"  {scenario[0]:34s} {stats['rps']:9,.1f} req/s  p50 {stats['p50_ms']:8.2f} ms  "
+                      f"p99 {stats['p99_ms']:8.2f} ms  errors {stats['errors']}", file=sys.stderr)
+            results["runs"].append(run)
+
+        if args.output == '-':
+            json.dump(results, sys.stdout, indent=2)
+        else:
+            with open(args.output, 'w', encoding='utf-8') as f:
+                json.dump(results, f, indent=2)
+            print(f"wrote {args.output}", file=sys.stderr)
+
+        if args.compare:
+            with open(args.compare, 'r', encoding='utf-8') as f:
+                lines, regressed = compare(results, json.load(f), args.tolerance)
+            print('\n'.join(lines), file=sys.stderr)
+            if regressed:
+                sys.exit(1)
+    finally:
+        app_module.journal.close()
+        shutil.rmtree(DATA_DIR, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,125 @@
+"""Audit log benchmark: cost on the request path, and history queries.
+
+Times the admin status-update endpoint through Flask's test client from
+concurrent threads with audit recording on and with `record()` replaced
+by a no-op, so the difference is what auditing adds to a request. Then
+fills the log with N entries and times activity queries: the newest
+page, a page deep in the history by cursor, and filtered scans.
+
+    python bench_audit.py [--requests 2000] [--concurrency 4] [--entries 1000000]
+"""
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+DATA_DIR = tempfile.mkdtemp(prefix='vv-bench-audit-')
+os.environ['VOCAL_VILLAGE_DATA_DIR'] = DATA_DIR
+os.environ['VOCAL_VILLAGE_RATE_LIMITS'] = 'off'
+
+ACTIONS = ('update_status', 'update_status', 'update_status', 'export', 'delete_report', 'login')
+ADMINS = ('admin', 'ward_officer', 'district_officer')
+STATUSES = ('pending', 'in_progress', 'resolved')
+
+
+def percentile(samples, fraction):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(fraction * len(samples)))]
+
+
+def drive(app, report_ids, requests, concurrency):
+    samples = []
+    lock = threading.Lock()
+
+    def worker(count, rng):
+        client = app.test_client()
+        client.post('/api/admin/login', json={'username': 'admin', 'password': 'admin123'})
+        mine = []
+        for _ in range(count):
+            report_id = rng.choice(report_ids)
+            start = time.perf_counter()
+            client.put(f'/api/admin/report/{report_id}/status', json={'status': rng.choice(STATUSES)})
+            mine.append(time.perf_counter() - start)
+        with lock:
+            samples.extend(mine)
+
+    threads = [threading.Thread(target=worker, args=(requests // concurrency, random.Random(i)))
+               for i in range(concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    return len(samples) / elapsed, percentile(samples, 0.5), percentile(samples, 0.99)
+
+
+def time_query(audit_log, repeat, **kwargs):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        audit_log.query(**kwargs)
+        samples.append(time.perf_counter() - start)
+    return percentile(samples, 0.5), percentile(samples, 0.99)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--entries', type=int, default=1000000)
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+
+    import app as app_module
+    app = app_module.app
+    audit_log = app_module.audit_log
+    try:
+        client = app.test_client()
+        client.post('/api/login/manual', json={'aadhaar_number': '123456789012', 'name': 'bench'})
+        report_ids = [client.post('/api/report/submit', json={
+            'problem_type': 'water', 'description': f'hand pump broken {i}',
+            'location': 'Ravet', 'language': 'en'}).json['report_id'] for i in range(200)]
+
+        print(f"status updates, {args.requests:,} requests x {args.concurrency} threads")
+        record = audit_log.record
+        for name in ("audit off", "audit on", "audit off", "audit on"):
+            audit_log.record = record if name == "audit on" else (lambda *args, **kwargs: None)
+            rps, p50, p99 = drive(app, report_ids, args.requests, args.concurrency)
+            print(f"  {name:10s} {rps:8.0f} req/s   p50 {p50 * 1000:7.3f} ms   p99 {p99 * 1000:7.3f} ms")
+        audit_log.record = record
+
+        rng = random.Random(7)
+        start = time.perf_counter()
+        for i in range(args.entries):
+            audit_log.record(rng.choice(ADMINS), rng.choice(ACTIONS), target=f"{i:08x}",
+                             ip='10.0.0.1', status=rng.choice(STATUSES))
+        record_s = time.perf_counter() - start
+        while audit_log.pending():
+            time.sleep(0.05)
+        flush_s = time.perf_counter() - start
+        print(f"recorded {args.entries:,} entries: {record_s / args.entries * 1e6:.2f} us/record, "
+              f"on disk after {flush_s:.1f}s, {audit_log.dropped:,} dropped")
+
+        middle, _ = audit_log.query(limit=args.entries // 2)
+        cursor = middle[-1]['id'] if middle else None
+        del middle
+        print(f"activity queries, {args.repeat} each")
+        for name, kwargs in (("newest page", {}),
+                             ("page mid-history", {'before': cursor}),
+                             ("admin filter", {'admin': 'ward_officer'}),
+                             ("rare action", {'action': 'login'}),
+                             ("empty range", {'since': '2000-01-01', 'until': '2000-01-02'})):
+            p50, p99 = time_query(audit_log, args.repeat, limit=50, **kwargs)
+            print(f"  {name:18s} p50 {p50 * 1000:8.3f} ms   p99 {p99 * 1000:8.3f} ms")
+    finally:
+        audit_log.close()
+        shutil.rmtree(DATA_DIR, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,66 @@
+"""Benchmark for batched report submission.
+
+Submits the same reports through /api/report/submit one by one and
+through /api/report/submit/batch in batches, using Flask's test client
+against a throwaway data directory.
+
+    python bench_batch.py [--reports 2000] [--batch-size 50]
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+DATA_DIR = tempfile.mkdtemp(prefix='vv-bench-batch-')
+os.environ['VOCAL_VILLAGE_DATA_DIR'] = DATA_DIR
+os.environ['VOCAL_VILLAGE_RATE_LIMITS'] = 'off'
+
+from app import app  # noqa: E402
+
+
+def make_items(count, prefix):
+    return [{
+        "problem_type": ("water", "road", "electricity", "health")[i % 4],
+        "description": f"{prefix} report {i}: pump {i * 7919} at ward {i % 97}",
+        "location": f"Ward {i % 97}",
+        "language": "en",
+        "idempotency_key": f"{prefix}-{i}"
+    } for i in range(count)]
+
+
+def login(client):
+    client.post('/api/login/manual', json={"aadhaar_number": "123456789012", "name": "Kiosk"})
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--reports', type=int, default=2000)
+    parser.add_argument('--batch-size', type=int, default=50)
+    args = parser.parse_args()
+
+    try:
+        client = app.test_client()
+        login(client)
+
+        items = make_items(args.reports, 'single')
+        start = time.perf_counter()
+        for item in items:
+            client.post('/api/report/submit', json=item)
+        single = time.perf_counter() - start
+
+        items = make_items(args.reports, 'batch')
+        start = time.perf_counter()
+        for i in range(0, len(items), args.batch_size):
+            client.post('/api/report/submit/batch', json=items[i:i + args.batch_size])
+        batched = time.perf_counter() - start
+
+        print(f"single: {args.reports / single:,.0f} reports/s")
+        print(f"batch of {args.batch_size}: {args.reports / batched:,.0f} reports/s "
+              f"({single / batched:.1f}x)")
+    finally:
+        shutil.rmtree(DATA_DIR, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
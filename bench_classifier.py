@@ -0,0 +1,61 @@
+"""Benchmark for the report classifier.
+
+Reports scored per second on the inline path (one report per call, as in
+submit_report) and the batch path used to re-score the backlog.
+
+    python bench_classifier.py [--reports 20000] [--batch-size 1000]
+"""
+import argparse
+import random
+import time
+
+from report_classifier import ReportClassifier
+from speech_engine import CATEGORY_KEYWORDS
+
+FILLER = ("near the school since two days please help village ward the "
+          "is not working broken no one came again").split()
+
+
+def make_reports(count, seed=11):
+    rng = random.Random(seed)
+    categories = list(CATEGORY_KEYWORDS)
+    for i in range(count):
+        category = rng.choice(categories)
+        words = [rng.choice(CATEGORY_KEYWORDS[category]) for _ in range(2)]
+        words += [rng.choice(FILLER) for _ in range(rng.randint(4, 14))]
+        rng.shuffle(words)
+        yield {"report_id": str(i), "problem_type": category, "description": ' '.join(words)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--reports', type=int, default=20000)
+    parser.add_argument('--batch-size', type=int, default=1000)
+    args = parser.parse_args()
+
+    reports = list(make_reports(args.reports))
+    classifier = ReportClassifier()
+    start = time.perf_counter()
+    classifier.fit([r['description'] for r in reports], [r['problem_type'] for r in reports])
+    print(f"trained on {len(reports):,} reports in {time.perf_counter() - start:.2f}s")
+
+    start = time.perf_counter()
+    for report in reports:
+        classifier.score(report)
+    single = len(reports) / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    correct = 0
+    for i in range(0, len(reports), args.batch_size):
+        chunk = reports[i:i + args.batch_size]
+        for report, scores in zip(chunk, classifier.score_many(chunk)):
+            correct += scores['suggested_problem_type'] == report['problem_type']
+    batch = len(reports) / (time.perf_counter() - start)
+
+    print(f"single: {single:,.0f} reports/s")
+    print(f"batch of {args.batch_size}: {batch:,.0f} reports/s ({batch / single:.1f}x)")
+    print(f"agreement with labels: {correct / len(reports):.1%}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+"""Benchmark for the report journal.
+
+Measures durable submit throughput (group commit) with several writer
+threads, and cold-start time against log size with and without a snapshot.
+
+    python bench_persistence.py [--sizes 10000,100000,1000000] [--threads 8]
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+
+from persistence import ReportJournal
+from report_store import ReportStore
+
+
+def make_report(i):
+    return {
+        "report_id": uuid.uuid4().hex[:12],
+        "user_id": f"user_{i % 5000:04d}",
+        "problem_type": ("water", "electricity", "road", "sanitation")[i % 4],
+        "description": "Hand pump near the school is broken",
+        "voice_text": "hand pump near the school is broken",
+        "location": "Near Village Panchayat",
+        "language": ("en", "hi")[i % 2],
+        "status": "submitted",
+        "created_at": "2024-01-01T00:00:00",
+        "updated_at": "2024-01-01T00:00:00",
+    }
+
+
+def bench_submit(data_dir, total, threads):
+    store, users = ReportStore(), {}
+    journal = ReportJournal(data_dir)
+    journal.recover(store, users)
+    journal.start(store, users)
+
+    per_thread = total // threads
+
+    def worker(offset):
+        for i in range(offset, offset + per_thread):
+            store.add(make_report(i))
+            journal.sync()
+
+    workers = [threading.Thread(target=worker, args=(t * per_thread,)) for t in range(threads)]
+    start = time.perf_counter()
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    elapsed = time.perf_counter() - start
+    journal.close()
+    return per_thread * threads / elapsed
+
+
+def fill(data_dir, size, snapshot):
+    # Writes `size` submits straight to the log without per-submit fsync
+    store, users = ReportStore(), {}
+    journal = ReportJournal(data_dir, snapshot_every=size + 1, commit_interval=0.05)
+    journal.recover(store, users)
+    journal.start(store, users)
+    for i in range(size):
+        store.add(make_report(i))
+        if i % 10 == 9:
+            store.update(store.ids_where('user_id', f"user_{i % 5000:04d}")[0],
+                         {"status": "resolved"})
+    if snapshot:
+        journal.checkpoint()
+    journal.close()
+
+
+def bench_cold_start(data_dir):
+    store, users = ReportStore(), {}
+    start = time.perf_counter()
+    ReportJournal(data_dir).recover(store, users)
+    return time.perf_counter() - start, len(store)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', default='10000,100000')
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--submits', type=int, default=4000)
+    args = parser.parse_args()
+
+    root = tempfile.mkdtemp(prefix='vv-bench-')
+    try:
+        rate = bench_submit(os.path.join(root, 'submit'), args.submits, args.threads)
+        print(f"durable submits: {rate:,.0f}/s with {args.threads} threads")
+
+        for size in (int(s) for s in args.sizes.split(',')):
+            for snapshot in (False, True):
+                data_dir = os.path.join(root, f"cold-{size}-{int(snapshot)}")
+                fill(data_dir, size, snapshot)
+                elapsed, count = bench_cold_start(data_dir)
+                label = 'snapshot' if snapshot else 'log only'
+                print(f"cold start {size:>9,} entries ({label:>8}): "
+                      f"{elapsed:.2f}s, {count:,} reports")
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
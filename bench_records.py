@@ -0,0 +1,127 @@
+"""Memory and encoding benchmark: ReportRecord vs one dict per report.
+
+Builds N synthetic scored reports both ways and reports the heap each
+layout holds (tracemalloc), then times encoding list pages the way the
+admin listing does: jsonify over dicts versus joining the records' cached
+JSON fragments (first call fills the cache; later calls reuse it).
+
+    python bench_records.py [--reports 200000] [--page 50] [--pages 2000]
+"""
+import argparse
+import gc
+import random
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+
+from report_record import ReportRecord, report_json
+
+CATEGORIES = ('water', 'electricity', 'road', 'health', 'education', 'agriculture', 'animal', 'other')
+STATUSES = ('submitted', 'pending', 'in_progress', 'resolved', 'rejected')
+LANGUAGES = ('en', 'hi', 'ta', 'te', 'bn')
+TEXTS = ("hand pump broken near school {n}", "स्कूल के पास हैंडपंप खराब है {n}",
+         "{n} நாட்களாக மின்சாரம் இல்லை", "రోడ్డు గుంతలు {n}", "রাস্তা ভাঙা {n}")
+
+
+def fresh(text):
+    # A new string object with the same value, like json.loads gives
+    return text.encode('utf-8').decode('utf-8')
+
+
+def make_reports(count, rng):
+    """Reports as the API builds them: dicts with fresh (not shared)
+    strings, as if each had been decoded from a request or the journal."""
+    origin = datetime(2026, 1, 1)
+    for i in range(count):
+        created_at = (origin + timedelta(seconds=i * 7)).isoformat()
+        category = rng.choice(CATEGORIES)
+        report = {
+            "report_id": f"{i:08x}",
+            "user_id": f"user_{i % 5000:04d}",
+            "problem_type": fresh(category),
+            "description": rng.choice(TEXTS).format(n=i % 997),
+            "voice_text": '',
+            "location": f"{rng.uniform(8, 30):.5f},{rng.uniform(70, 90):.5f}",
+            "language": fresh(rng.choice(LANGUAGES)),
+            "status": fresh(rng.choice(STATUSES)),
+            "audio": None,
+            "created_at": created_at,
+            "updated_at": created_at,
+            "suggested_problem_type": fresh(category),
+            "category_confidence": round(rng.random(), 3),
+            "urgency": fresh(rng.choice(('low', 'medium', 'high'))),
+            "priority": rng.randrange(100)
+        }
+        if report['status'] == 'resolved':
+            report.update(admin_notes='fixed', resolved_by='admin', resolved_at=created_at)
+        yield report
+
+
+def held_bytes(build):
+    gc.collect()
+    tracemalloc.start()
+    try:
+        data = build()
+        gc.collect()
+        current, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return data, current
+
+
+def time_pages(encode, reports, page, pages, rng):
+    starts = [rng.randrange(0, len(reports) - page) for _ in range(pages)]
+    samples = []
+    for start in starts:
+        begin = time.perf_counter()
+        encode(reports[start:start + page])
+        samples.append(time.perf_counter() - begin)
+    samples.sort()
+    return samples[len(samples) // 2], samples[min(len(samples) - 1, int(0.99 * len(samples)))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--reports', type=int, default=200000)
+    parser.add_argument('--page', type=int, default=50)
+    parser.add_argument('--pages', type=int, default=2000)
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    dicts, dict_bytes = held_bytes(lambda: list(make_reports(args.reports, random.Random(args.seed))))
+    del dicts
+    records, record_bytes = held_bytes(lambda: [ReportRecord(report) for report in
+                                                make_reports(args.reports, random.Random(args.seed))])
+    dicts = [record.to_dict() for record in records]
+
+    print(f"{args.reports:,} reports")
+    print(f"  dict per report  {dict_bytes / 2 ** 20:9.1f} MiB  {dict_bytes / args.reports:6.0f} B/report")
+    print(f"  ReportRecord     {record_bytes / 2 ** 20:9.1f} MiB  {record_bytes / args.reports:6.0f} B/report")
+
+    provider = DefaultJSONProvider(Flask(__name__))
+
+    def jsonify_page(page):
+        return provider.dumps({"success": True, "reports": page, "count": len(page)}).encode('utf-8')
+
+    def fragment_page(page):
+        rest = provider.dumps({"success": True, "count": len(page)})[1:-1].encode('utf-8')
+        return b''.join((b'{"reports":[', b','.join(report_json(report) for report in page),
+                         b'],', rest, b'}'))
+
+    print(f"encoding {args.pages:,} random pages of {args.page}")
+    for name, encode, reports in (("jsonify(dicts)", jsonify_page, dicts),
+                                  ("fragments, cold", fragment_page, records),
+                                  ("fragments, warm", fragment_page, records)):
+        p50, p99 = time_pages(encode, reports, args.page, args.pages, random.Random(args.seed))
+        print(f"  {name:18s} p50 {p50 * 1000:7.3f} ms   p99 {p99 * 1000:7.3f} ms")
+
+    cached = sum(sys.getsizeof(record.json()) for record in records)
+    print(f"cached JSON adds {cached / args.reports:.0f} B/report once a report has been listed")
+
+
+if __name__ == '__main__':
+    main()
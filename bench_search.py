@@ -0,0 +1,65 @@
+"""Benchmark for report search.
+
+Compares the BM25 inverted index with a naive case-insensitive substring
+scan over description/voice_text, on synthetic English and Hindi reports.
+
+    python bench_search.py [--reports 200000] [--repeat 5]
+"""
+import argparse
+import random
+import time
+
+from report_search import SearchIndex
+
+ENGLISH = ("hand pump broken water supply no electricity transformer road pothole "
+           "bridge damaged school teacher absent health center doctor medicine "
+           "drain blocked garbage street light cattle fodder crop seeds well dry").split()
+HINDI = ("हैंडपंप नल खराब पानी बिजली नहीं सड़क गड्ढा पुल टूटा स्कूल शिक्षक "
+         "अस्पताल डॉक्टर दवाई नाली कचरा बत्ती पशु चारा फसल बीज कुआँ सूखा").split()
+
+QUERIES = ("hand pump", "transformer", "नल", "कुआँ सूखा", "doctor medicine")
+
+
+def make_reports(count, seed=7):
+    rng = random.Random(seed)
+    for i in range(count):
+        words = HINDI if i % 3 == 0 else ENGLISH
+        text = ' '.join(rng.choice(words) for _ in range(rng.randint(5, 15)))
+        yield {"report_id": f"r{i:08d}", "description": text, "voice_text": text}
+
+
+def naive_search(reports, query):
+    needle = query.casefold()
+    return [r["report_id"] for r in reports
+            if needle in r["description"].casefold() or needle in r["voice_text"].casefold()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--reports', type=int, default=200000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    reports = list(make_reports(args.reports))
+    index = SearchIndex()
+    start = time.perf_counter()
+    for report in reports:
+        index.on_add(report)
+    print(f"indexed {len(reports):,} reports in {time.perf_counter() - start:.1f}s")
+
+    for query in QUERIES:
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            hits = index.search(query, limit=20)
+        indexed_ms = (time.perf_counter() - start) / args.repeat * 1000
+
+        start = time.perf_counter()
+        matches = naive_search(reports, query)
+        naive_ms = (time.perf_counter() - start) * 1000
+
+        print(f"{query!r:>20}: index {indexed_ms:8.2f} ms ({len(hits)} shown), "
+              f"substring scan {naive_ms:8.1f} ms ({len(matches):,} matches)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,131 @@
+"""Load benchmark for the storage backends.
+
+Starts N worker processes (like Gunicorn workers), each importing the app
+with the chosen backend and running T threads of mixed traffic through
+Flask's test client: report submissions and cursor-paged admin listings.
+With the SQLite backend all workers share one database, and the stored
+count is compared with the number of submissions at the end.
+
+    python bench_storage.py [--backend sqlite] [--workers 4] [--threads 4]
+                            [--seconds 10] [--write-ratio 0.3]
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import shutil
+import tempfile
+import threading
+import time
+
+from report_sqlite import SqliteDatabase, SqliteReportStore
+
+
+def percentile(samples, fraction):
+    if not samples:
+        return 0.0
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(fraction * len(samples)))]
+
+
+def worker(number, args, data_dir, results):
+    os.environ['VOCAL_VILLAGE_DATA_DIR'] = data_dir
+    os.environ['VOCAL_VILLAGE_STORAGE'] = args.backend
+    os.environ['VOCAL_VILLAGE_RATE_LIMITS'] = 'off'
+    import app as application
+    app = application.app
+
+    latencies = {'submit': [], 'list': []}
+    errors = [0]
+    lock = threading.Lock()
+    deadline = time.monotonic() + args.seconds
+
+    def run(thread):
+        rng = random.Random(number * 1000 + thread)
+        client = app.test_client()
+        client.post('/api/login/manual', json={
+            "aadhaar_number": f"{number:04d}{thread:04d}0000", "name": f"Load {number}.{thread}"})
+        client.post('/api/admin/login', json={"username": "admin", "password": "admin123"})
+        cursor = None
+        i = 0
+        local = {'submit': [], 'list': []}
+        failed = 0
+        while time.monotonic() < deadline:
+            i += 1
+            start = time.perf_counter()
+            if rng.random() < args.write_ratio:
+                kind = 'submit'
+                response = client.post('/api/report/submit', json={
+                    "problem_type": rng.choice(("water", "road", "electricity", "health")),
+                    "description": f"worker {number} thread {thread} report {i} ward {rng.randrange(500)}",
+                    "location": f"{18 + rng.random():.5f},{73 + rng.random():.5f}",
+                    "language": "en"
+                })
+            else:
+                kind = 'list'
+                url = '/api/admin/reports?limit=50' + (f'&cursor={cursor}' if cursor else '')
+                response = client.get(url)
+                cursor = response.get_json().get('next_cursor') if response.status_code == 200 else None
+            local[kind].append(time.perf_counter() - start)
+            failed += response.status_code != 200
+        with lock:
+            for kind, samples in local.items():
+                latencies[kind].extend(samples)
+            errors[0] += failed
+
+    threads = [threading.Thread(target=run, args=(t,)) for t in range(args.threads)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    results.put((latencies, errors[0]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--backend', choices=('sqlite', 'memory'), default='sqlite')
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--write-ratio', type=float, default=0.3)
+    args = parser.parse_args()
+    if args.backend == 'memory' and args.workers > 1:
+        print("note: memory workers do not share data; counts are per worker")
+
+    data_dir = tempfile.mkdtemp(prefix='vv-bench-storage-')
+    try:
+        context = multiprocessing.get_context('spawn')
+        results = context.Queue()
+        processes = [context.Process(target=worker, args=(n, args, data_dir, results))
+                     for n in range(args.workers)]
+        for process in processes:
+            process.start()
+        collected = [results.get() for _ in processes]
+        for process in processes:
+            process.join()
+
+        latencies = {'submit': [], 'list': []}
+        errors = 0
+        for worker_latencies, worker_errors in collected:
+            for kind, samples in worker_latencies.items():
+                latencies[kind].extend(samples)
+            errors += worker_errors
+
+        print(f"{args.backend}: {args.workers} workers x {args.threads} threads, {args.seconds:g}s")
+        for kind, samples in latencies.items():
+            print(f"  {kind:6s} {len(samples) / args.seconds:8,.0f} req/s   "
+                  f"p50 {percentile(samples, 0.5) * 1000:6.1f} ms   "
+                  f"p99 {percentile(samples, 0.99) * 1000:6.1f} ms")
+        print(f"  errors {errors}")
+        if args.backend == 'sqlite':
+            # Nothing may be lost between workers
+            database = SqliteDatabase(os.path.join(data_dir, 'vocal_village.db'))
+            stored = len(SqliteReportStore(database))
+            database.close()
+            print(f"  stored {stored:,} reports, submitted {len(latencies['submit']):,}")
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
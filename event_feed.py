@@ -0,0 +1,150 @@
+import json
+import threading
+from collections import deque
+
+HISTORY_SIZE = 1000
+SUBSCRIBER_BUFFER = 256
+KEEPALIVE_S = 15
+
+
+def _summary(report):
+    return {
+        "report_id": report['report_id'],
+        "problem_type": report.get('problem_type'),
+        "status": report.get('status'),
+        "language": report.get('language'),
+        "priority": report.get('priority'),
+        "duplicate_of": report.get('duplicate_of'),
+        "created_at": report.get('created_at')
+    }
+
+
+class _Subscriber:
+    def __init__(self, after):
+        self.after = after
+        self.buffer = deque()
+        self.overflowed = False
+
+
+class EventBroadcaster:
+    """Fan-out of report events to Server-Sent Events streams.
+
+    Each event is serialised once, kept in a short history for
+    Last-Event-ID resumes, and appended to every subscriber's bounded
+    buffer. A subscriber that falls SUBSCRIBER_BUFFER events behind is
+    told to resync and dropped instead of holding memory. Idle streams
+    just wait on a condition and send a keepalive comment now and then.
+
+    Event ids come from `event_ids`, called as each event is published:
+    with several workers it must number the change being delivered the
+    same way in all of them (the SQLite backend's change ids), so a
+    reconnect can resume from Last-Event-ID on any worker. Ids may skip
+    but must increase. Without it ids count up in this process, which
+    only suits a single worker (the memory backend).
+    """
+
+    def __init__(self, history_size=HISTORY_SIZE, buffer_size=SUBSCRIBER_BUFFER, event_ids=None):
+        self.buffer_size = buffer_size
+        self._event_ids = event_ids
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+        self._history = deque(maxlen=history_size)
+        self._subscribers = set()
+        self._last_id = (event_ids() if event_ids else None) or 0
+        # Events up to this id are not in the history (published before
+        # this process started, or pushed out since)
+        self._history_start = self._last_id
+        self._closed = False
+
+    # ---------- store listener ----------
+
+    def on_add(self, report):
+        self.publish('report.created', {"report": _summary(report)})
+
+    def on_update(self, old_report, report):
+        if old_report.get('status') != report.get('status'):
+            self.publish('report.status_changed', {
+                "report_id": report['report_id'],
+                "old_status": old_report.get('status'),
+                "status": report.get('status'),
+                "updated_at": report.get('updated_at'),
+                "updated_by": report.get('resolved_by')
+            })
+
+    def on_remove(self, report):
+        self.publish('report.deleted', {"report_id": report['report_id']})
+
+    def on_archive(self, report):
+        self.publish('report.archived', {"report_id": report['report_id']})
+
+    def on_forget(self, report):
+        self.publish('report.deleted', {"report_id": report['report_id']})
+
+    def on_restore(self, report):
+        self.publish('report.restored', {"report": _summary(report)})
+
+    # ---------- fan-out ----------
+
+    def publish(self, event, data):
+        with self._lock:
+            event_id = self._event_ids() if self._event_ids else None
+            self._last_id = event_id if event_id is not None else self._last_id + 1
+            frame = (self._last_id,
+                     f"id: {self._last_id}\nevent: {event}\ndata: "
+                     f"{json.dumps(data, ensure_ascii=False)}\n\n")
+            if len(self._history) == self._history.maxlen:
+                self._history_start = self._history[0][0]
+            self._history.append(frame)
+            for subscriber in self._subscribers:
+                if frame[0] <= subscriber.after:
+                    # The client saw it on another worker before reconnecting here
+                    continue
+                if len(subscriber.buffer) >= self.buffer_size:
+                    subscriber.overflowed = True
+                else:
+                    subscriber.buffer.append(frame[1])
+            self._changed.notify_all()
+
+    def subscribers(self):
+        return len(self._subscribers)
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+            self._changed.notify_all()
+
+    def stream(self, last_event_id=None, keepalive=KEEPALIVE_S):
+        """Generator of SSE frames, starting after `last_event_id`."""
+        subscriber = _Subscriber(-1 if last_event_id is None else last_event_id)
+        with self._lock:
+            # Counted ids restart with the process, so one newer than ours
+            # is from before a restart
+            if last_event_id is not None and (last_event_id < self._history_start or (
+                    self._event_ids is None and last_event_id > self._last_id)):
+                subscriber.after = -1
+                subscriber.buffer.append("event: resync\ndata: {}\n\n")
+            elif last_event_id is not None:
+                subscriber.buffer.extend(text for event_id, text in self._history
+                                         if event_id > last_event_id)
+            self._subscribers.add(subscriber)
+        try:
+            yield "retry: 3000\n\n"
+            while True:
+                with self._lock:
+                    if not subscriber.buffer and not subscriber.overflowed and not self._closed:
+                        self._changed.wait(keepalive)
+                    frames = list(subscriber.buffer)
+                    subscriber.buffer.clear()
+                    overflowed, closed = subscriber.overflowed, self._closed
+                if frames:
+                    yield ''.join(frames)
+                elif overflowed:
+                    yield "event: resync\ndata: {}\n\n"
+                    return
+                elif closed:
+                    return
+                else:
+                    yield ": keepalive\n\n"
+        finally:
+            with self._lock:
+                self._subscribers.discard(subscriber)
@@ -0,0 +1,267 @@
+import logging
+import sys
+import threading
+import time
+from bisect import bisect_left
+
+from flask import g, request
+
+logger = logging.getLogger(__name__)
+
+PREFIX = 'vocal_village'
+
+# Histogram upper bounds: seconds for latency, bytes for payloads
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+# Requests slower than this are logged with their route
+SLOW_REQUEST_S = 2.0
+
+MAX_STACK_DEPTH = 64
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(**labels):
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + '}'
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Histogram:
+    __slots__ = ('bounds', 'counts', 'sum', 'count')
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def lines(self, name, **labels):
+        cumulative = 0
+        for bound, count in zip(self.bounds + ('+Inf',), self.counts):
+            cumulative += count
+            yield f"{name}_bucket{_labels(**labels, le=bound)} {cumulative}"
+        yield f"{name}_sum{_labels(**labels)} {_number(self.sum)}"
+        yield f"{name}_count{_labels(**labels)} {self.count}"
+
+
+class RequestMetrics:
+    """Per-route request metrics in Prometheus text format.
+
+    Routes are labelled by their URL rule ("/api/report/<report_id>"), not
+    the concrete path, so label cardinality stays bounded. Latency covers
+    the handler up to the response headers; streamed bodies are not
+    included. Gauges are callables evaluated at scrape time. Counts are
+    per process, so scrape each worker.
+    """
+
+    def __init__(self, slow_threshold=SLOW_REQUEST_S):
+        self.slow_threshold = slow_threshold
+        self._lock = threading.Lock()
+        self._requests = {}
+        self._latency = {}
+        self._request_size = {}
+        self._response_size = {}
+        self._gauges = []
+        self._active = {}
+        self.started_at = time.time()
+
+    def init_app(self, app):
+        app.before_request(self._before)
+        app.after_request(self._after)
+        app.teardown_request(self._teardown)
+
+    def gauge(self, name, help_text, read):
+        self._gauges.append((f"{PREFIX}_{name}", help_text, read))
+
+    # ---------- request hooks ----------
+
+    def _before(self):
+        g.metrics_started = time.perf_counter()
+        self._active[threading.get_ident()] = request.endpoint
+
+    def _after(self, response):
+        self._record(response.status_code, response.content_length)
+        return response
+
+    def _teardown(self, exc):
+        self._active.pop(threading.get_ident(), None)
+        if exc is not None and 'metrics_started' in g:
+            # Raised past every handler; Flask answers 500
+            self._record(500, None)
+
+    def _record(self, status, response_bytes):
+        started = g.pop('metrics_started', None)
+        if started is None:
+            return
+        elapsed = time.perf_counter() - started
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        key = (route, request.method)
+        with self._lock:
+            self._requests[key + (status,)] = self._requests.get(key + (status,), 0) + 1
+            histogram = self._latency.get(key)
+            if histogram is None:
+                histogram = self._latency[key] = _Histogram(LATENCY_BUCKETS)
+                self._request_size[key] = _Histogram(SIZE_BUCKETS)
+                self._response_size[key] = _Histogram(SIZE_BUCKETS)
+            histogram.observe(elapsed)
+            if request.content_length is not None:
+                self._request_size[key].observe(request.content_length)
+            if response_bytes is not None:
+                self._response_size[key].observe(response_bytes)
+        if status >= 500:
+            logger.warning("%s %s -> %d in %.1f ms", request.method, route, status, elapsed * 1000)
+        elif elapsed >= self.slow_threshold:
+            logger.warning("Slow request: %s %s took %.1f ms", request.method, route, elapsed * 1000)
+
+    def active(self):
+        # (thread ident, endpoint) for requests currently being handled
+        return list(self._active.items())
+
+    # ---------- exposition ----------
+
+    def render(self):
+        with self._lock:
+            requests = sorted(self._requests.items())
+            histograms = [(name, help_text, sorted((key, _copy(h)) for key, h in series.items()))
+                          for name, help_text, series in (
+                              ('http_request_duration_seconds', 'Request latency up to response headers',
+                               self._latency),
+                              ('http_request_size_bytes', 'Request body size', self._request_size),
+                              ('http_response_size_bytes', 'Response body size (non-streamed)',
+                               self._response_size))]
+        lines = [f"# HELP {PREFIX}_http_requests_total Requests by route, method and status",
+                 f"# TYPE {PREFIX}_http_requests_total counter"]
+        for (route, method, status), count in requests:
+            lines.append(f"{PREFIX}_http_requests_total"
+                         f"{_labels(route=route, method=method, status=status)} {count}")
+        lines += [f"# HELP {PREFIX}_http_errors_total Requests answered with a 5xx status",
+                  f"# TYPE {PREFIX}_http_errors_total counter"]
+        errors = {}
+        for (route, method, status), count in requests:
+            if status >= 500:
+                errors[(route, method)] = errors.get((route, method), 0) + count
+        for (route, method), count in sorted(errors.items()):
+            lines.append(f"{PREFIX}_http_errors_total{_labels(route=route, method=method)} {count}")
+        for name, help_text, series in histograms:
+            lines += [f"# HELP {PREFIX}_{name} {help_text}", f"# TYPE {PREFIX}_{name} histogram"]
+            for (route, method), histogram in series:
+                if histogram.count:
+                    lines.extend(histogram.lines(f"{PREFIX}_{name}", route=route, method=method))
+        lines += [f"# HELP {PREFIX}_in_flight_requests Requests being handled",
+                  f"# TYPE {PREFIX}_in_flight_requests gauge",
+                  f"{PREFIX}_in_flight_requests {len(self._active)}",
+                  f"# HELP {PREFIX}_process_start_time_seconds Process start time",
+                  f"# TYPE {PREFIX}_process_start_time_seconds gauge",
+                  f"{PREFIX}_process_start_time_seconds {_number(self.started_at)}"]
+        for name, help_text, read in self._gauges:
+            try:
+                value = read()
+            except Exception as e:
+                logger.warning("Gauge %s failed: %s", name, e)
+                continue
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} gauge", f"{name} {_number(value)}"]
+        return '\n'.join(lines) + '\n'
+
+
+def _copy(histogram):
+    copy = _Histogram(histogram.bounds)
+    copy.counts = list(histogram.counts)
+    copy.sum, copy.count = histogram.sum, histogram.count
+    return copy
+
+
+class SamplingProfiler:
+    """Statistical profiler for request threads, switched on at runtime.
+
+    While running, a background thread samples the stacks of threads that
+    are handling `endpoint` (any endpoint if None) every `interval`
+    seconds and counts them in collapsed-stack form, ready for
+    flamegraph.pl or speedscope. Costs nothing while stopped.
+    """
+
+    def __init__(self, metrics):
+        self.metrics = metrics
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+        self._stacks = {}
+        self._samples = 0
+        self.endpoint = None
+        self.interval = None
+        self.started_at = None
+
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, endpoint=None, seconds=30, interval=0.005):
+        with self._lock:
+            if self.running():
+                raise ValueError("Profiler is already running")
+            self._stop.clear()
+            self._stacks = {}
+            self._samples = 0
+            self.endpoint = endpoint
+            self.interval = interval
+            self.started_at = time.time()
+            self._thread = threading.Thread(target=self._run, args=(time.monotonic() + seconds,),
+                                            name='sampling-profiler', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout=2)
+
+    def _run(self, deadline):
+        own = threading.get_ident()
+        while not self._stop.is_set() and time.monotonic() < deadline:
+            targets = [ident for ident, endpoint in self.metrics.active()
+                       if ident != own and (self.endpoint is None or endpoint == self.endpoint)]
+            if targets:
+                frames = sys._current_frames()
+                for ident in targets:
+                    frame = frames.get(ident)
+                    if frame is not None:
+                        stack = _collapse(frame)
+                        with self._lock:
+                            self._stacks[stack] = self._stacks.get(stack, 0) + 1
+                            self._samples += 1
+            self._stop.wait(self.interval)
+
+    def report(self, limit=50):
+        with self._lock:
+            stacks = sorted(self._stacks.items(), key=lambda item: -item[1])
+            samples = self._samples
+        return {
+            "running": self.running(),
+            "endpoint": self.endpoint,
+            "interval": self.interval,
+            "started_at": self.started_at,
+            "samples": samples,
+            "stacks": [{"stack": stack, "count": count} for stack, count in stacks[:limit]]
+        }
+
+    def collapsed(self):
+        with self._lock:
+            return ''.join(f"{stack} {count}\n" for stack, count in self._stacks.items())
+
+
+def _collapse(frame):
+    parts = []
+    while frame is not None and len(parts) < MAX_STACK_DEPTH:
+        code = frame.f_code
+        parts.append(f"{code.co_filename.rsplit('/', 1)[-1]}:{code.co_name}")
+        frame = frame.f_back
+    return ';'.join(reversed(parts))
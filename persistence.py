@@ -0,0 +1,297 @@
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+SNAPSHOT_FILE = 'snapshot.json'
+SEGMENT_PREFIX = 'journal-'
+SEGMENT_SUFFIX = '.jsonl'
+
+logger = logging.getLogger(__name__)
+
+
+class ReportJournal:
+    """Append-only JSONL write-ahead log for reports and users.
+
+    Every change is written as one line tagged with a sequence number.
+    A background thread batches pending lines and fsyncs them together
+    (group commit), so concurrent writers share one fsync. Every
+    `snapshot_every` entries the log rolls over to a new segment and a
+    separate thread writes the full state to a snapshot, so commits carry
+    on while it is written; older segments are deleted once the snapshot
+    is on disk. Recovery loads the snapshot and replays only entries newer
+    than it.
+
+    The journal subscribes to a ReportStore, so route handlers only need
+    to call `sync()` before answering to make sure their change is durable.
+    Only the writer thread opens and appends to segment files.
+    """
+
+    def __init__(self, data_dir, snapshot_every=50000, commit_interval=0.002):
+        self.data_dir = data_dir
+        self.snapshot_every = snapshot_every
+        self.commit_interval = commit_interval
+
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+        self._pending = []
+        self._seq = 0
+        self._durable_seq = 0
+        self._since_snapshot = 0
+        self._checkpoint_requested = False
+        self._checkpoints = 0
+        self._snapshotting = False
+        self._snapshotter = None
+        self._segment = None
+        self._store = None
+        self._users = None
+        self._closed = False
+        self._writer = None
+        self._local = threading.local()
+
+        os.makedirs(data_dir, exist_ok=True)
+
+    # ---------- recovery ----------
+
+    def _segments(self):
+        names = [n for n in os.listdir(self.data_dir)
+                 if n.startswith(SEGMENT_PREFIX) and n.endswith(SEGMENT_SUFFIX)]
+        return sorted(names, key=lambda n: int(n[len(SEGMENT_PREFIX):-len(SEGMENT_SUFFIX)]))
+
+    def recover(self, store, users):
+        """Load the latest snapshot into `store`/`users` and replay the log tail.
+
+        Must run before `start()`, otherwise replayed entries would be
+        logged again.
+        """
+        snapshot_seq = 0
+        snapshot_path = os.path.join(self.data_dir, SNAPSHOT_FILE)
+        if os.path.exists(snapshot_path):
+            with open(snapshot_path, 'r', encoding='utf-8') as f:
+                snapshot = json.load(f)
+            snapshot_seq = snapshot['seq']
+            for report in snapshot['reports']:
+                store.add(report)
+            users.update(snapshot['users'])
+
+        last_seq = snapshot_seq
+        replayed = 0
+        for name in self._segments():
+            with open(os.path.join(self.data_dir, name), 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        # Torn write at the tail of the last segment
+                        break
+                    if entry['seq'] <= snapshot_seq:
+                        continue
+                    self._apply(entry, store, users)
+                    last_seq = entry['seq']
+                    replayed += 1
+
+        self._seq = self._durable_seq = last_seq
+        self._since_snapshot = replayed
+        return replayed
+
+    @staticmethod
+    def _apply(entry, store, users):
+        # Replay is idempotent: an entry may already be reflected in the
+        # snapshot if the process died between snapshot and segment cleanup.
+        op = entry['op']
+        if op == 'submit':
+            store.remove(entry['report']['report_id'])
+            store.add(entry['report'])
+        elif op == 'update':
+            store.update(entry['report_id'], entry['changes'])
+        elif op == 'delete':
+            store.remove(entry['report_id'])
+        elif op == 'user':
+            users[entry['user_id']] = entry['user']
+        elif op == 'batch':
+            for item in entry['entries']:
+                ReportJournal._apply(item, store, users)
+
+    # ---------- lifecycle ----------
+
+    def start(self, store, users):
+        """Subscribe to `store`, open a fresh segment and start the writer."""
+        self._store = store
+        self._users = users
+        self._open_segment(self._seq + 1)
+        store.subscribe(self)
+        self._writer = threading.Thread(target=self._run, name='report-journal', daemon=True)
+        self._writer.start()
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+            self._changed.notify_all()
+        if self._writer:
+            self._writer.join()
+        if self._snapshotter:
+            self._snapshotter.join()
+        if self._segment:
+            self._segment.close()
+            self._segment = None
+
+    def _open_segment(self, start_seq):
+        if self._segment:
+            self._segment.close()
+        path = os.path.join(self.data_dir, f"{SEGMENT_PREFIX}{start_seq:012d}{SEGMENT_SUFFIX}")
+        self._segment = open(path, 'a', encoding='utf-8')
+
+    # ---------- store listener ----------
+
+    def on_add(self, report):
+        self.append('submit', report=dict(report))
+
+    def on_update(self, old_report, report):
+        changes = {k: v for k, v in report.items() if old_report.get(k) != v}
+        self.append('update', report_id=report['report_id'], changes=changes)
+
+    def on_remove(self, report):
+        self.append('delete', report_id=report['report_id'])
+
+    def log_user(self, user_id, user):
+        return self.append('user', user_id=user_id, user=user)
+
+    # ---------- writes ----------
+
+    @contextmanager
+    def group(self):
+        """Log the changes this thread makes inside the block as one
+        'batch' entry, so recovery applies all of them or none. Enter it
+        inside the store lock, so the entry follows the changes."""
+        if getattr(self._local, 'group', None) is not None:
+            yield
+            return
+        self._local.group = []
+        try:
+            yield
+        finally:
+            entries, self._local.group = self._local.group, None
+            if entries:
+                self.append('batch', entries=entries)
+
+    def append(self, op, **payload):
+        group = getattr(self._local, 'group', None)
+        if group is not None:
+            group.append({'op': op, **payload})
+            return None
+        with self._lock:
+            self._seq += 1
+            entry = {'seq': self._seq, 'op': op, 'ts': time.time(), **payload}
+            self._pending.append(json.dumps(entry, ensure_ascii=False))
+            self._changed.notify_all()
+            return self._seq
+
+    def sync(self, seq=None):
+        """Block until `seq` (default: everything appended so far) is fsynced."""
+        with self._lock:
+            target = self._seq if seq is None else seq
+            while self._durable_seq < target and not self._closed:
+                self._changed.wait()
+
+    def _write(self, batch):
+        if batch:
+            self._segment.write('\n'.join(batch) + '\n')
+            self._segment.flush()
+            os.fsync(self._segment.fileno())
+
+    def _run(self):
+        while True:
+            with self._lock:
+                while (not self._pending and not self._closed
+                       and not (self._checkpoint_requested and not self._snapshotting)):
+                    self._changed.wait()
+                if self._closed and not self._pending:
+                    return
+                wait = bool(self._pending) and not self._closed
+            # Let concurrent writers pile onto this batch
+            if wait and self.commit_interval:
+                time.sleep(self.commit_interval)
+            with self._lock:
+                batch, self._pending = self._pending, []
+                batch_seq = self._seq
+            self._write(batch)
+            with self._lock:
+                self._durable_seq = batch_seq
+                self._since_snapshot += len(batch)
+                self._changed.notify_all()
+                # One snapshot at a time; a due checkpoint waits for the
+                # next batch after the current snapshot is written
+                checkpoint = not self._snapshotting and (
+                    self._checkpoint_requested or self._since_snapshot >= self.snapshot_every)
+            if checkpoint:
+                self._checkpoint()
+
+    # ---------- snapshots ----------
+
+    def checkpoint(self):
+        """Ask the writer for a snapshot and wait until it is on disk."""
+        with self._lock:
+            # A snapshot already being written predates this request
+            done = self._checkpoints + (2 if self._snapshotting else 1)
+            self._checkpoint_requested = True
+            self._changed.notify_all()
+            while self._checkpoints < done and not self._closed:
+                self._changed.wait()
+
+    def _mark(self):
+        # Runs under the store lock, so no store change can slip between
+        # the sequence number recorded here and the copied reports.
+        with self._lock:
+            batch, self._pending = self._pending, []
+            self._since_snapshot = 0
+            self._checkpoint_requested = False
+            self._snapshotting = True
+            return batch, self._seq
+
+    def _checkpoint(self):
+        # On the writer thread: close out the current segment at the mark
+        # and roll over, then leave the snapshot to its own thread.
+        (batch, snapshot_seq), records = self._store.snapshot(before=self._mark)
+        # Users are logged after the dict is written, so copying them after
+        # the mark covers every user entry up to snapshot_seq.
+        users = dict(self._users)
+
+        # Anything appended from now on goes to the next segment.
+        self._write(batch)
+        with self._lock:
+            self._durable_seq = snapshot_seq
+            self._changed.notify_all()
+        old_segments = self._segments()
+        self._open_segment(snapshot_seq + 1)
+        current = os.path.basename(self._segment.name)
+
+        self._snapshotter = threading.Thread(
+            target=self._write_snapshot, name='report-snapshot', daemon=True,
+            args=(snapshot_seq, records, users, [name for name in old_segments if name != current]))
+        self._snapshotter.start()
+
+    def _write_snapshot(self, snapshot_seq, records, users, old_segments):
+        try:
+            path = os.path.join(self.data_dir, SNAPSHOT_FILE)
+            tmp_path = path + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'seq': snapshot_seq, 'reports': [record.to_dict() for record in records],
+                           'users': users}, f, ensure_ascii=False)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+
+            # Segments up to snapshot_seq are only needed until now
+            for name in old_segments:
+                os.remove(os.path.join(self.data_dir, name))
+        except OSError:
+            # The old snapshot and segments are still complete; the next
+            # checkpoint tries again
+            logger.exception("Journal snapshot failed")
+        finally:
+            with self._lock:
+                self._snapshotting = False
+                self._checkpoints += 1
+                self._changed.notify_all()
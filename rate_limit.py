@@ -0,0 +1,189 @@
+import math
+import os
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+
+# Sustained `rate` requests per second with bursts of up to `burst`
+Limit = namedtuple('Limit', 'rate burst')
+
+# Buckets are checked for eviction every this many takes
+SWEEP_EVERY = 1024
+
+
+class MemoryBuckets:
+    """Token buckets for one process: key -> (tokens, updated, full_at).
+
+    A bucket that would have refilled completely carries no information,
+    so sweeps drop it; memory stays proportional to recently active
+    clients.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._buckets = {}
+        self._takes = 0
+
+    def take(self, limits, cost=1, now=None):
+        """Take `cost` tokens from every bucket in `limits` (key -> Limit)
+        or from none. Returns seconds until all of them could pay; 0 if
+        taken now."""
+        now = time.time() if now is None else now
+        with self._lock:
+            self._takes += 1
+            if self._takes % SWEEP_EVERY == 0:
+                self._sweep(now)
+            levels = {}
+            for key, limit in limits.items():
+                tokens, updated, _ = self._buckets.get(key, (limit.burst, now, now))
+                levels[key] = min(limit.burst, tokens + (now - updated) * limit.rate)
+            wait = max((_take(levels[key], limit, cost) for key, limit in limits.items()), default=0)
+            for key, limit in limits.items():
+                tokens = levels[key] if wait else levels[key] - cost
+                self._buckets[key] = (tokens, now, now + (limit.burst - tokens) / limit.rate)
+            return wait
+
+    def _sweep(self, now):
+        idle = [key for key, (_, _, full_at) in self._buckets.items() if full_at <= now]
+        for key in idle:
+            del self._buckets[key]
+
+    def __len__(self):
+        return len(self._buckets)
+
+
+class SqliteBuckets:
+    """Token buckets in a SQLite file so every worker process draws from
+    the same buckets. Each take is one short write transaction on a
+    per-thread connection; full buckets are deleted by periodic sweeps.
+    """
+
+    def __init__(self, path):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.path = path
+        self._local = threading.local()
+        self._takes = 0
+        self._connection().execute(
+            "CREATE TABLE IF NOT EXISTS buckets (key TEXT PRIMARY KEY, tokens REAL NOT NULL, "
+            "updated REAL NOT NULL, full_at REAL NOT NULL) WITHOUT ROWID")
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0, isolation_level=None,
+                                   check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=OFF")
+            self._local.conn = conn
+        return conn
+
+    def take(self, limits, cost=1, now=None):
+        now = time.time() if now is None else now
+        conn = self._connection()
+        self._takes += 1
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if self._takes % SWEEP_EVERY == 0:
+                conn.execute("DELETE FROM buckets WHERE full_at <= ?", (now,))
+            levels = {}
+            for key, limit in limits.items():
+                row = conn.execute("SELECT tokens, updated FROM buckets WHERE key = ?", (key,)).fetchone()
+                tokens, updated = row if row else (limit.burst, now)
+                levels[key] = min(limit.burst, tokens + max(0.0, now - updated) * limit.rate)
+            wait = max((_take(levels[key], limit, cost) for key, limit in limits.items()), default=0)
+            for key, limit in limits.items():
+                tokens = levels[key] if wait else levels[key] - cost
+                conn.execute("INSERT OR REPLACE INTO buckets (key, tokens, updated, full_at) VALUES (?, ?, ?, ?)",
+                             (key, tokens, now, now + (limit.burst - tokens) / limit.rate))
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+        return wait
+
+    def __len__(self):
+        return self._connection().execute("SELECT COUNT(*) FROM buckets").fetchone()[0]
+
+
+def _take(tokens, limit, cost):
+    if tokens >= cost:
+        return 0
+    if cost > limit.burst:
+        # The bucket never holds this many tokens
+        return math.inf
+    return (cost - tokens) / limit.rate
+
+
+class RateLimiter:
+    """Per-client token buckets for named rules.
+
+    A rule maps client kinds ('ip', 'user', ...) to a Limit. `check()`
+    charges `cost` tokens to every client's bucket at once, or to none of
+    them if any is short, and returns the wait in whole seconds until all
+    could pay, 0 when the request may proceed, or math.inf when `cost` is
+    more than a bucket can ever hold.
+    """
+
+    def __init__(self, buckets, rules):
+        self.buckets = buckets
+        self.rules = rules
+
+    def check(self, rule, clients, cost=1):
+        limits = self.rules.get(rule, {})
+        buckets = {f"{rule}:{kind}:{client}": limits[kind] for kind, client in clients.items()
+                   if client is not None and kind in limits}
+        if not buckets:
+            return 0
+        wait = self.buckets.take(buckets, cost)
+        if not wait or math.isinf(wait):
+            return wait
+        return max(1, math.ceil(wait))
+
+
+class Overloaded(Exception):
+    """Raised when no request slot frees up in time."""
+
+
+class AdmissionControl:
+    """Caps concurrent expensive requests in a worker.
+
+    Up to `max_active` run at once and at most `max_queued` more wait, each
+    for no longer than `max_wait` seconds. Anything beyond that is refused
+    straight away, so overload costs a quick rejection instead of a
+    blocked worker thread.
+    """
+
+    def __init__(self, max_active=16, max_queued=32, max_wait=0.5):
+        self.max_queued = max_queued
+        self.max_wait = max_wait
+        self._slots = threading.BoundedSemaphore(max_active)
+        self._lock = threading.Lock()
+        self._queued = 0
+        self.rejected = 0
+
+    def __enter__(self):
+        if self._slots.acquire(blocking=False):
+            return self
+        with self._lock:
+            if self._queued >= self.max_queued:
+                self.rejected += 1
+                raise Overloaded("Server is busy")
+            self._queued += 1
+        try:
+            acquired = self._slots.acquire(timeout=self.max_wait)
+        finally:
+            with self._lock:
+                self._queued -= 1
+        if not acquired:
+            with self._lock:
+                self.rejected += 1
+            raise Overloaded("Server is busy")
+        return self
+
+    def __exit__(self, *exc):
+        self._slots.release()
+        return False
+
+    def queued(self):
+        return self._queued
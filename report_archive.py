@@ -0,0 +1,471 @@
+import base64
+import heapq
+import json
+import logging
+import os
+import re
+import threading
+import time
+import zlib
+from array import array
+from bisect import bisect_left
+from datetime import datetime, timedelta
+
+from report_record import ReportRecord, report_json
+from report_stats import resolution_seconds, village_name
+
+logger = logging.getLogger(__name__)
+
+# Statuses that end a report's working life
+ARCHIVED_STATUSES = ('resolved', 'rejected')
+
+# Reports per compressed block; a lookup decompresses one block
+BLOCK_SIZE = 256
+
+# Most reports written to one segment file
+SEGMENT_LIMIT = 50000
+
+# Reports removed from the hot store per write transaction
+REMOVE_BATCH = 256
+
+SEGMENT_SUFFIX = '.seg'
+INDEX_SUFFIX = '.idx'
+COMPRESSION_LEVEL = 6
+
+# Archived counts kept per value, so dashboard totals can include them
+COUNTED_FIELDS = ('status', 'problem_type', 'language')
+
+# Counts per village name, for villages covered; segments written before
+# this was added simply have none
+VILLAGE_COUNTS = 'village'
+
+
+# Segments that only supersede (drop) archived copies live here
+TOMBSTONE_PARTITION = 'tombstones'
+
+# Segments written by other processes are picked up at most this often
+REFRESH_INTERVAL = 1.0
+
+# Generated report ids; these get a packed 4-byte index entry
+_HEX_ID = re.compile(r'^[0-9a-f]{8}$')
+
+
+def closed_at(report):
+    # When the report reached its current status
+    history = report.get('status_history')
+    if history:
+        return history[-1].get('at') or ''
+    return report.get('resolved_at') or report.get('updated_at') or ''
+
+
+def _order(report):
+    return (report.get('created_at') or '', report['report_id'])
+
+
+def _partition(report):
+    # Segments are grouped by month of submission
+    created_at = report.get('created_at') or ''
+    return created_at[:7] if len(created_at) >= 7 else 'undated'
+
+
+def _record(line):
+    return ReportRecord(json.loads(line), line)
+
+
+class _Segment:
+    """One immutable segment file and its index.
+
+    Reports are sorted by (created_at, report_id) and compressed in blocks
+    of BLOCK_SIZE. The sparse index holds each block's first created_at
+    and byte range; report ids map to their block through a sorted packed
+    array, about 6 bytes per report. `user_blocks` lists the blocks
+    holding each user's reports (None for segments written before it was
+    kept, which are searched in full).
+    """
+
+    __slots__ = ('name', 'path', 'count', 'first', 'last', 'starts', 'ranges',
+                 'ids', 'id_blocks', 'other_ids', 'user_blocks')
+
+    def __init__(self, path, index):
+        self.name = os.path.basename(path)[:-len(SEGMENT_SUFFIX)]
+        self.path = path
+        self.count = index['count']
+        self.first = index['first']
+        self.last = index['last']
+        self.starts = [start for start, _, _ in index['blocks']]
+        self.ranges = [(offset, length) for _, offset, length in index['blocks']]
+        self.ids = array('I')
+        self.ids.frombytes(base64.b64decode(index['ids']))
+        self.id_blocks = array('H')
+        self.id_blocks.frombytes(base64.b64decode(index['id_blocks']))
+        self.other_ids = index['other_ids']
+        self.user_blocks = index.get('user_blocks')
+
+    def block_of(self, report_id):
+        if not _HEX_ID.match(report_id):
+            return self.other_ids.get(report_id)
+        key = int(report_id, 16)
+        i = bisect_left(self.ids, key)
+        if i < len(self.ids) and self.ids[i] == key:
+            return self.id_blocks[i]
+        return None
+
+    def read_block(self, block):
+        offset, length = self.ranges[block]
+        with open(self.path, 'rb') as f:
+            f.seek(offset)
+            return zlib.decompress(f.read(length)).split(b'\n')
+
+
+class ReportArchive:
+    """Closed reports in compressed, immutable segment files.
+
+    Each `write()` adds new segments under a directory per month of
+    submission and never touches existing ones. Only the segment indexes
+    are held in memory. A report archived again (after a crash, or after
+    being reopened and closed) supersedes its older copy; the newest
+    segment wins for lookups and scans. `forget()` writes a tombstone
+    segment that supersedes copies without replacing them.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._segments = []
+        self._superseded = {}
+        self._counts = {field: {} for field in COUNTED_FIELDS}
+        self._count = 0
+        self._resolved = [0, 0.0]
+        self._written = 0
+        self._refreshed_at = 0.0
+        self.refresh()
+
+    # ---------- segment index ----------
+
+    def refresh(self):
+        """Load segments written since the last refresh (possibly by other
+        worker processes)."""
+        with self._lock:
+            self._refreshed_at = time.monotonic()
+            known = {segment.name for segment in self._segments}
+            found = []
+            for partition in os.listdir(self.directory):
+                folder = os.path.join(self.directory, partition)
+                if not os.path.isdir(folder):
+                    continue
+                for name in os.listdir(folder):
+                    if name.endswith(INDEX_SUFFIX) and name[:-len(INDEX_SUFFIX)] not in known:
+                        found.append((name, folder))
+            for name, folder in sorted(found):
+                with open(os.path.join(folder, name), 'r', encoding='utf-8') as f:
+                    index = json.load(f)
+                self._load(os.path.join(folder, name[:-len(INDEX_SUFFIX)] + SEGMENT_SUFFIX), index)
+
+    def _load(self, path, index):
+        # Caller holds the lock. Segments load in name (= write) order, so
+        # supersede entries only ever point at older segments.
+        segment = _Segment(path, index)
+        for report_id in index['supersedes']:
+            self._superseded[report_id] = segment.name
+        for field, counts in index['counts'].items():
+            totals = self._counts.setdefault(field, {})
+            for value, count in counts.items():
+                totals[value] = totals.get(value, 0) + count
+                if not totals[value]:
+                    del totals[value]
+        self._count += index['total']
+        self._resolved[0] += index['resolved_count']
+        self._resolved[1] += index['resolved_seconds']
+        self._segments = self._segments + [segment]
+
+    def _refresh_if_due(self):
+        if time.monotonic() - self._refreshed_at > REFRESH_INTERVAL:
+            self.refresh()
+
+    # ---------- reads ----------
+
+    def get(self, report_id):
+        report = self._find(report_id)
+        if report is None and time.monotonic() - self._refreshed_at > REFRESH_INTERVAL:
+            self.refresh()
+            report = self._find(report_id)
+        return report
+
+    def _find(self, report_id):
+        needle = b'"report_id":' + json.dumps(report_id, ensure_ascii=False).encode('utf-8')
+        for segment in reversed(self._segments):
+            block = segment.block_of(report_id)
+            if block is None:
+                continue
+            for line in segment.read_block(block):
+                if needle in line:
+                    report = _record(line)
+                    if report['report_id'] == report_id:
+                        # The newest copy; a later supersede is a tombstone
+                        if self._superseded.get(report_id, segment.name) != segment.name:
+                            return None
+                        return report
+        return None
+
+    def __len__(self):
+        return self._count
+
+    def counts_by(self, field):
+        with self._lock:
+            return dict(self._counts.get(field, {}))
+
+    def user_reports(self, user_id):
+        """A user's archived reports, ordered by (created_at, report_id).
+        Only the blocks listed for the user are read."""
+        self._refresh_if_due()
+        reports = []
+        for segment in self._segments:
+            if segment.user_blocks is None:
+                blocks = range(len(segment.starts))
+            else:
+                blocks = segment.user_blocks.get(user_id, ())
+            for block in blocks:
+                for line in segment.read_block(block):
+                    report = _record(line)
+                    if (report.get('user_id') == user_id
+                            and self._superseded.get(report['report_id'], segment.name) == segment.name):
+                        reports.append(report)
+        reports.sort(key=_order)
+        return reports
+
+    def resolution_totals(self):
+        # (resolved reports, summed seconds to resolution)
+        return tuple(self._resolved)
+
+    def scan(self, after=None, since=None, until=None, **filters):
+        """Yield archived reports matching equality `filters`, ordered by
+        (created_at, report_id).
+
+        `after` is a (created_at, report_id) position to resume past;
+        `since`/`until` bound created_at (half-open). Segments and blocks
+        outside the bounds are skipped without being read.
+        """
+        self._refresh_if_due()
+        filters = {field: value for field, value in filters.items() if value is not None}
+        lower = max(since or '', after[0] if after else '')
+        streams = [self._scan_segment(segment, lower, after, until, filters)
+                   for segment in self._segments
+                   if segment.last >= lower and (not until or segment.first < until)]
+        return heapq.merge(*streams, key=_order)
+
+    def _scan_segment(self, segment, lower, after, until, filters):
+        # Start in the block before the first one that begins at `lower`,
+        # since equal created_at values can straddle a block boundary
+        start = max(bisect_left(segment.starts, lower) - 1, 0) if lower else 0
+        for block in range(start, len(segment.starts)):
+            if until and segment.starts[block] >= until:
+                return
+            for line in segment.read_block(block):
+                report = _record(line)
+                created_at = report.get('created_at') or ''
+                if until and created_at >= until:
+                    return
+                if created_at < lower or (after and (created_at, report['report_id']) <= tuple(after)):
+                    continue
+                if self._superseded.get(report['report_id'], segment.name) != segment.name:
+                    continue
+                if all(report.get(field) == value for field, value in filters.items()):
+                    yield report
+
+    # ---------- writes ----------
+
+    def write(self, reports):
+        """Archive `reports` (records or dicts) in new segments; returns
+        the number written. Everything is on disk before this returns."""
+        groups = {}
+        for report in reports:
+            groups.setdefault(_partition(report), []).append(report)
+        for partition, group in sorted(groups.items()):
+            for i in range(0, len(group), SEGMENT_LIMIT):
+                self._write_segment(partition, group[i:i + SEGMENT_LIMIT])
+        return sum(len(group) for group in groups.values())
+
+    def forget(self, report_ids):
+        """Drop the archived copies of `report_ids` (deleted, or back in
+        the hot store) with a tombstone segment; returns how many had one."""
+        self._refresh_if_due()
+        report_ids = [report_id for report_id in report_ids if self.get(report_id) is not None]
+        if report_ids:
+            self._write_segment(TOMBSTONE_PARTITION, [], report_ids)
+        return len(report_ids)
+
+    def _write_segment(self, partition, reports, tombstones=()):
+        reports = sorted(reports, key=_order)
+        with self._lock:
+            self._written += 1
+            name = f"{time.time_ns() // 1000:017d}-{os.getpid()}-{self._written}"
+        folder = os.path.join(self.directory, partition)
+        os.makedirs(folder, exist_ok=True)
+        path = os.path.join(folder, name + SEGMENT_SUFFIX)
+
+        index = {
+            "partition": partition, "count": len(reports), "total": len(reports),
+            "first": (reports[0].get('created_at') or '') if reports else '',
+            "last": (reports[-1].get('created_at') or '') if reports else '',
+            "blocks": [], "other_ids": {}, "user_blocks": {}, "supersedes": [],
+            "counts": {field: {} for field in COUNTED_FIELDS + (VILLAGE_COUNTS,)},
+            "resolved_count": 0, "resolved_seconds": 0.0
+        }
+        keys = []
+        with open(path + '.tmp', 'wb') as f:
+            for block, i in enumerate(range(0, len(reports), BLOCK_SIZE)):
+                chunk = reports[i:i + BLOCK_SIZE]
+                payload = zlib.compress(b'\n'.join(report_json(report, cache=False) for report in chunk),
+                                        COMPRESSION_LEVEL)
+                index["blocks"].append([chunk[0].get('created_at') or '', f.tell(), len(payload)])
+                f.write(payload)
+                for report in chunk:
+                    report_id = report['report_id']
+                    if _HEX_ID.match(report_id):
+                        keys.append((int(report_id, 16), block))
+                    else:
+                        index["other_ids"][report_id] = block
+                    user_blocks = index["user_blocks"].setdefault(report.get('user_id') or '', [])
+                    if not user_blocks or user_blocks[-1] != block:
+                        user_blocks.append(block)
+                    self._tally(index, report, 1)
+                    self._supersede(index, report_id)
+            for report_id in tombstones:
+                self._supersede(index, report_id)
+            f.flush()
+            os.fsync(f.fileno())
+        keys.sort()
+        index["ids"] = base64.b64encode(array('I', [key for key, _ in keys]).tobytes()).decode('ascii')
+        index["id_blocks"] = base64.b64encode(array('H', [block for _, block in keys]).tobytes()).decode('ascii')
+
+        # The index appears last, so readers never see a partial segment
+        os.replace(path + '.tmp', path)
+        index_path = os.path.join(folder, name + INDEX_SUFFIX)
+        with open(index_path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump(index, f, ensure_ascii=False, separators=(',', ':'))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(index_path + '.tmp', index_path)
+        with self._lock:
+            self._load(path, index)
+
+    def _supersede(self, index, report_id):
+        previous = self._find(report_id)
+        if previous is not None:
+            index["supersedes"].append(report_id)
+            index["total"] -= 1
+            self._tally(index, previous, -1)
+        elif report_id in self._superseded:
+            # Archived again after a tombstone; nothing left to uncount
+            index["supersedes"].append(report_id)
+
+    @staticmethod
+    def _tally(index, report, sign):
+        for field in COUNTED_FIELDS:
+            counts = index["counts"][field]
+            value = report.get(field)
+            if value is not None:
+                counts[value] = counts.get(value, 0) + sign
+        village = village_name(report.get('location'))
+        if village is not None:
+            counts = index["counts"][VILLAGE_COUNTS]
+            counts[village] = counts.get(village, 0) + sign
+        seconds = resolution_seconds(report)
+        if seconds is not None:
+            index["resolved_count"] += sign
+            index["resolved_seconds"] += sign * seconds
+
+
+class ReportArchiver:
+    """Background pass moving reports closed for more than `after_days`
+    days from the hot store into a ReportArchive.
+
+    Reports are written to the archive first and only then removed from
+    the store (as on_archive events), each removal skipped if the report
+    changed in the meantime; the archived copies of skipped reports are
+    then forgotten again. A crash in between leaves a report in both
+    places; the store copy wins and the next pass archives it again.
+    With several worker processes, a lock file lets one of them run it.
+    """
+
+    def __init__(self, store, archive, after_days=30, interval=3600):
+        self.store = store
+        self.archive = archive
+        self.after_days = after_days
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock_file = None
+        self.archived = 0
+
+    def start(self):
+        if not self._acquire():
+            logger.info("Archiver running in another process")
+            return False
+        self._thread = threading.Thread(target=self._run, name='report-archiver', daemon=True)
+        self._thread.start()
+        return True
+
+    def _acquire(self):
+        import fcntl
+        self._lock_file = open(os.path.join(self.archive.directory, 'archiver.lock'), 'w')
+        try:
+            fcntl.flock(self._lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            self._lock_file.close()
+            self._lock_file = None
+            return False
+        return True
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
+
+    def _run(self):
+        while True:
+            try:
+                self.run_once()
+            except Exception:
+                logger.exception("Archive pass failed")
+            if self._stop.wait(self.interval):
+                return
+
+    def due(self, now=None):
+        cutoff = ((now or datetime.now()) - timedelta(days=self.after_days)).isoformat()
+        return [report for status in ARCHIVED_STATUSES
+                for report in self.store.scan(status=status)
+                if '' < closed_at(report) < cutoff]
+
+    def run_once(self, now=None):
+        """Archive every report due now; returns how many left the store."""
+        moved = 0
+        due = self.due(now)
+        for i in range(0, len(due), SEGMENT_LIMIT):
+            if self._stop.is_set():
+                break
+            chunk = [report for report in due[i:i + SEGMENT_LIMIT]
+                     if self.store.get(report['report_id']) == report]
+            if not chunk:
+                continue
+            self.archive.write(chunk)
+            changed = []
+            for j in range(0, len(chunk), REMOVE_BATCH):
+                with self.store.batch():
+                    for report in chunk[j:j + REMOVE_BATCH]:
+                        if self.store.get(report['report_id']) == report:
+                            self.store.remove(report['report_id'], archived=True)
+                            moved += 1
+                        else:
+                            changed.append(report['report_id'])
+            if changed:
+                # Changed while being written; the store copy is current
+                self.archive.forget(changed)
+        self.archived += moved
+        if moved:
+            logger.info("Archived %d closed reports", moved)
+        return moved
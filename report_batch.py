@@ -0,0 +1,60 @@
+import json
+from threading import Lock
+
+MAX_BATCH_SIZE = 200
+
+
+def parse_batch(body, content_type):
+    """Report payloads from a batch request body.
+
+    Accepts a JSON array, {"reports": [...]}, or NDJSON (one object per
+    line) when the content type says so.
+    """
+    text = body.decode('utf-8') if isinstance(body, bytes) else body
+    if 'ndjson' in (content_type or ''):
+        items = []
+        for number, line in enumerate(text.splitlines(), 1):
+            if not line.strip():
+                continue
+            try:
+                items.append(json.loads(line))
+            except ValueError:
+                raise ValueError(f"Invalid JSON on line {number}")
+    else:
+        try:
+            items = json.loads(text)
+        except ValueError:
+            raise ValueError("Invalid JSON body")
+        if isinstance(items, dict):
+            items = items.get('reports')
+    if not isinstance(items, list):
+        raise ValueError("Expected an array of reports")
+    if len(items) > MAX_BATCH_SIZE:
+        raise ValueError(f"Batch too large (max {MAX_BATCH_SIZE} reports)")
+    return items
+
+
+class IdempotencyIndex:
+    """(user_id, idempotency_key) -> report_id for reports submitted with a
+    client-generated key. Fed from ReportStore events, so it is rebuilt by
+    journal replay and replays stay deduplicated across restarts.
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self._keys = {}
+
+    def on_add(self, report):
+        key = report.get('idempotency_key')
+        if key:
+            with self._lock:
+                self._keys[(report.get('user_id'), key)] = report['report_id']
+
+    def on_remove(self, report):
+        key = report.get('idempotency_key')
+        if key:
+            with self._lock:
+                self._keys.pop((report.get('user_id'), key), None)
+
+    def get(self, user_id, key):
+        return self._keys.get((user_id, key))
@@ -0,0 +1,172 @@
+import math
+import threading
+import zlib
+
+import numpy as np
+
+from report_search import tokenize
+from speech_engine import CATEGORY_KEYWORDS
+
+# Hashed feature space: unigrams and bigrams
+DIM = 1 << 16
+
+CATEGORIES = tuple(CATEGORY_KEYWORDS) + ('other',)
+
+# Baseline urgency of each category, blended into priority
+CATEGORY_PRIOR = {
+    'health': 0.8, 'electricity': 0.6, 'water': 0.6, 'road': 0.4,
+    'animal': 0.4, 'education': 0.3, 'agriculture': 0.3, 'other': 0.2,
+}
+
+# Terms that raise urgency, with their logit weight
+URGENT_TERMS = {
+    'urgent': 1.5, 'emergency': 2.0, 'danger': 1.5, 'dangerous': 1.5, 'fire': 2.0,
+    'accident': 2.0, 'injured': 2.0, 'death': 2.5, 'died': 2.5, 'dead': 2.0,
+    'children': 0.8, 'sick': 1.0, 'fever': 1.0, 'snake': 1.5, 'flood': 2.0,
+    'live wire': 2.5, 'no water': 1.2, 'days': 0.5, 'week': 0.6, 'weeks': 0.8,
+    'तुरंत': 1.5, 'खतरा': 1.5, 'आग': 2.0, 'दुर्घटना': 2.0, 'मौत': 2.5, 'घायल': 2.0,
+    'बच्चे': 0.8, 'बीमार': 1.0, 'बुखार': 1.0, 'सांप': 1.5, 'बाढ़': 2.0,
+}
+URGENCY_BIAS = -1.5
+
+CENTROID_SCALE = 12.0
+TRAINING_SAMPLE = 50000
+
+
+def _bucket(feature):
+    return zlib.crc32(feature.encode('utf-8')) & (DIM - 1)
+
+
+def features(text):
+    tokens = tokenize(text)
+    grams = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+    return [_bucket(gram) for gram in grams]
+
+
+def report_text(report):
+    parts = []
+    for field in ('description', 'voice_text'):
+        value = report.get(field)
+        if isinstance(value, str) and value and value not in parts:
+            parts.append(value)
+    return ' '.join(parts)
+
+
+class ReportClassifier:
+    """Category and urgency suggestions from report text.
+
+    Text is hashed into unigram/bigram features and weighted by TF-IDF.
+    Categories are scored by a linear model whose rows are the normalised
+    class centroids (trained from the keyword lexicon plus the labels
+    already in the store); urgency is a logistic score over fixed term
+    weights. `score_many` scores a whole batch with a handful of NumPy
+    operations over the concatenated sparse features.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._idf = np.ones(DIM, dtype=np.float32)
+        self._weights = np.zeros((len(CATEGORIES), DIM), dtype=np.float32)
+        self._urgency = np.zeros(DIM, dtype=np.float32)
+        for term, weight in URGENT_TERMS.items():
+            self._urgency[_bucket(' '.join(tokenize(term)))] = weight
+        self.fit([], [])
+
+    # ---------- training ----------
+
+    def fit(self, texts, labels):
+        """Train on (text, problem_type) pairs plus the keyword lexicon."""
+        docs = [features(text) for text in texts]
+        targets = [CATEGORIES.index(label) for label in labels]
+        for category, keywords in CATEGORY_KEYWORDS.items():
+            for keyword in keywords:
+                docs.append(features(keyword))
+                targets.append(CATEGORIES.index(category))
+
+        df = np.zeros(DIM, dtype=np.float32)
+        for doc in docs:
+            df[np.unique(np.asarray(doc, dtype=np.int64))] += 1
+        idf = (np.log((1 + len(docs)) / (1 + df)) + 1).astype(np.float32)
+
+        weights = np.zeros((len(CATEGORIES), DIM), dtype=np.float32)
+        for doc, target in zip(docs, targets):
+            idx, vals = self._vector(doc, idf)
+            weights[target, idx] += vals
+        norms = np.linalg.norm(weights, axis=1, keepdims=True)
+        weights /= np.where(norms == 0, 1, norms)
+
+        with self._lock:
+            self._idf = idf
+            self._weights = weights * CENTROID_SCALE
+
+    def fit_store(self, store, limit=TRAINING_SAMPLE):
+        # Most recent labelled reports; the user's pick is mostly right
+        texts, labels = [], []
+        for report in store.scan(descending=True):
+            if report.get('problem_type') in CATEGORIES and report.get('status') != 'duplicate':
+                text = report_text(report)
+                if text:
+                    texts.append(text)
+                    labels.append(report['problem_type'])
+                    if len(texts) >= limit:
+                        break
+        self.fit(texts, labels)
+        return len(texts)
+
+    @staticmethod
+    def _vector(doc, idf):
+        if not doc:
+            return np.zeros(1, dtype=np.int64), np.zeros(1, dtype=np.float32)
+        idx, counts = np.unique(np.asarray(doc, dtype=np.int64), return_counts=True)
+        vals = (1 + np.log(counts)).astype(np.float32) * idf[idx]
+        norm = np.linalg.norm(vals)
+        return idx, vals / norm if norm else vals
+
+    # ---------- scoring ----------
+
+    def score_many(self, reports):
+        """Suggestion fields for each report, in order."""
+        if not reports:
+            return []
+        with self._lock:
+            idf, weights = self._idf, self._weights
+        count = len(reports)
+        docs = [features(report_text(report)) for report in reports]
+        lengths = np.fromiter((len(doc) for doc in docs), dtype=np.int64, count=count)
+        raw = np.fromiter((f for doc in docs for f in doc), dtype=np.int64, count=int(lengths.sum()))
+
+        # Term counts for every (report, feature) pair in one np.unique
+        keys, counts = np.unique(np.repeat(np.arange(count), lengths) * DIM + raw,
+                                 return_counts=True)
+        doc, idx = keys // DIM, keys % DIM
+        vals = (1 + np.log(counts)).astype(np.float32) * idf[idx]
+        norms = np.sqrt(np.bincount(doc, weights=vals * vals, minlength=count))
+        vals /= np.where(norms == 0, 1, norms)[doc]
+
+        logits = np.stack([np.bincount(doc, weights=row[idx] * vals, minlength=count)
+                           for row in weights], axis=1)
+        logits -= logits.max(axis=1, keepdims=True)
+        probs = np.exp(logits)
+        probs /= probs.sum(axis=1, keepdims=True)
+        urgency_logit = np.bincount(doc, weights=self._urgency[idx], minlength=count) + URGENCY_BIAS
+        urgency = 1 / (1 + np.exp(-urgency_logit))
+
+        # Reports with no known features get a flat distribution
+        flat = probs.max(axis=1) - probs.min(axis=1) < 1e-6
+        best = np.where(flat, CATEGORIES.index('other'), probs.argmax(axis=1))
+        results = []
+        for i, report in enumerate(reports):
+            suggested = CATEGORIES[best[i]]
+            category = report.get('problem_type')
+            prior = CATEGORY_PRIOR.get(category if category in CATEGORY_PRIOR else suggested)
+            priority = 100 * (0.7 * float(urgency[i]) + 0.3 * prior)
+            results.append({
+                'suggested_problem_type': suggested,
+                'category_confidence': round(float(probs[i, best[i]]), 3),
+                'urgency': 'high' if urgency[i] >= 0.6 else 'medium' if urgency[i] >= 0.3 else 'low',
+                'priority': int(math.floor(priority + 0.5))
+            })
+        return results
+
+    def score(self, report):
+        return self.score_many([report])[0]
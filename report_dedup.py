@@ -0,0 +1,195 @@
+import random
+import time
+from collections import deque
+from datetime import datetime
+from functools import lru_cache
+from threading import Lock
+
+from report_geo import haversine_m, parse_coordinates
+from report_search import tokenize
+
+# 24 MinHash values in 6 bands of 4: pairs with Jaccard ~0.6 and above
+# collide in at least one band with high probability.
+NUM_HASHES = 24
+BANDS = 6
+ROWS = NUM_HASHES // BANDS
+SHINGLE = 4
+
+DUPLICATE_SIMILARITY = 0.6
+DUPLICATE_WINDOW_S = 3600
+DUPLICATE_RADIUS_M = 300
+
+_PRIME = (1 << 61) - 1
+_rng = random.Random(0x5eed)
+_COEFFS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_HASHES)]
+
+
+def _text(report):
+    parts = []
+    for field in ('voice_text', 'description'):
+        value = report.get(field)
+        if isinstance(value, str) and value and value not in parts:
+            parts.append(value)
+    return ' '.join(parts)
+
+
+def shingles(text):
+    # Character shingles over the normalised tokens, so small wording or
+    # transcription differences still share most shingles
+    joined = ' '.join(tokenize(text))
+    if len(joined) <= SHINGLE:
+        return {joined} if joined else set()
+    return {joined[i:i + SHINGLE] for i in range(len(joined) - SHINGLE + 1)}
+
+
+def minhash(shingle_set):
+    hashes = [hash(s) & 0xFFFFFFFFFFFFFFFF for s in shingle_set]
+    return tuple(min((a * h + b) % _PRIME for h in hashes) for a, b in _COEFFS)
+
+
+@lru_cache(maxsize=4096)
+def signature_of(text):
+    # Cached so match() and the on_add that follows hash the text once
+    shingle_set = shingles(text)
+    return minhash(shingle_set) if shingle_set else None
+
+
+def similarity(sig_a, sig_b):
+    return sum(1 for x, y in zip(sig_a, sig_b) if x == y) / NUM_HASHES
+
+
+def _timestamp(report):
+    try:
+        return datetime.fromisoformat(report['created_at'].replace('Z', '+00:00')).timestamp()
+    except (KeyError, AttributeError, ValueError):
+        return time.time()
+
+
+def _place(report):
+    location = report.get('location')
+    point = parse_coordinates(location)
+    if point is not None:
+        return point
+    if isinstance(location, dict):
+        location = location.get('village') or location.get('address')
+    if isinstance(location, str) and location.strip():
+        return location.strip().casefold()
+    return None
+
+
+def _same_place(a, b, radius_m):
+    if isinstance(a, tuple) and isinstance(b, tuple):
+        return haversine_m(a[0], a[1], b[0], b[1]) <= radius_m
+    return a is not None and a == b
+
+
+class DuplicateDetector:
+    """MinHash/LSH index of recent canonical reports.
+
+    Every non-duplicate report is added (via the ReportStore listener) to
+    LSH buckets keyed by problem type and band. `match()` hashes a new
+    report once and only compares it with reports sharing a bucket, then
+    checks the place and time window. Entries older than the window are
+    evicted in arrival order.
+    """
+
+    def __init__(self, window_s=DUPLICATE_WINDOW_S, radius_m=DUPLICATE_RADIUS_M,
+                 threshold=DUPLICATE_SIMILARITY):
+        self.window_s = window_s
+        self.radius_m = radius_m
+        self.threshold = threshold
+        self._lock = Lock()
+        self._buckets = {}
+        self._entries = {}
+        self._arrivals = deque()
+        self._latest = 0.0
+
+    @staticmethod
+    def _band_keys(problem_type, signature):
+        return [(problem_type, band, signature[band * ROWS:(band + 1) * ROWS])
+                for band in range(BANDS)]
+
+    def _evict(self, now):
+        horizon = now - self.window_s
+        while self._arrivals and self._arrivals[0][0] < horizon:
+            _, report_id = self._arrivals.popleft()
+            self._drop(report_id)
+
+    def _drop(self, report_id):
+        entry = self._entries.pop(report_id, None)
+        if entry is None:
+            return
+        for key in entry['keys']:
+            bucket = self._buckets.get(key)
+            if bucket is not None:
+                bucket.discard(report_id)
+                if not bucket:
+                    del self._buckets[key]
+
+    # ---------- store listener ----------
+
+    def on_add(self, report):
+        if report.get('duplicate_of'):
+            return
+        signature = signature_of(_text(report))
+        if signature is None:
+            return
+        keys = self._band_keys(report.get('problem_type'), signature)
+        ts = _timestamp(report)
+        with self._lock:
+            self._latest = max(self._latest, ts)
+            self._evict(self._latest)
+            if ts < self._latest - self.window_s:
+                return
+            self._entries[report['report_id']] = {
+                'signature': signature, 'keys': keys, 'ts': ts, 'place': _place(report)
+            }
+            for key in keys:
+                self._buckets.setdefault(key, set()).add(report['report_id'])
+            self._arrivals.append((ts, report['report_id']))
+
+    def on_update(self, old_report, report):
+        # Closed reports stop attracting new duplicates
+        if report.get('status') in ('resolved', 'rejected'):
+            with self._lock:
+                self._drop(report['report_id'])
+
+    def on_remove(self, report):
+        with self._lock:
+            self._drop(report['report_id'])
+
+    # ---------- queries ----------
+
+    def prepare(self, reports):
+        # Hash reports ahead of match(), e.g. before taking the store lock;
+        # match() and on_add then find their signatures cached
+        for report in reports:
+            signature_of(_text(report))
+
+    def match(self, report):
+        """Report id of the most similar recent canonical report, or None."""
+        signature = signature_of(_text(report))
+        if signature is None:
+            return None
+        keys = self._band_keys(report.get('problem_type'), signature)
+        ts = _timestamp(report)
+        place = _place(report)
+        best, best_score = None, self.threshold
+        with self._lock:
+            self._evict(max(self._latest, ts))
+            candidates = set()
+            for key in keys:
+                candidates.update(self._buckets.get(key, ()))
+            for report_id in candidates:
+                entry = self._entries[report_id]
+                if abs(ts - entry['ts']) > self.window_s:
+                    continue
+                if not _same_place(place, entry['place'], self.radius_m):
+                    continue
+                score = similarity(signature, entry['signature'])
+                if score >= best_score:
+                    best, best_score = report_id, score
+        return best
+
+    def __len__(self):
+        return len(self._entries)
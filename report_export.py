@@ -0,0 +1,77 @@
+import csv
+import io
+import json
+
+from report_record import report_json
+from report_store import encode_cursor
+
+CSV_COLUMNS = ('report_id', 'user_id', 'problem_type', 'status', 'created_at', 'location')
+
+# Rows buffered into each chunk of the response body
+EXPORT_CHUNK = 500
+
+
+def report_cursor(report):
+    # Resume point after `report`; same format as the listing cursors
+    return encode_cursor(report['report_id'], report['created_at'])
+
+
+def _csv_value(value):
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, ensure_ascii=False)
+    return value
+
+
+def iter_csv(reports):
+    """CSV rows in chunks, quoted properly; the last column is the cursor
+    that resumes the export after that row."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(CSV_COLUMNS + ('cursor',))
+    rows = 0
+    for report in reports:
+        writer.writerow([_csv_value(report.get(column)) for column in CSV_COLUMNS]
+                        + [report_cursor(report)])
+        rows += 1
+        if rows % EXPORT_CHUNK == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def iter_ndjson(reports):
+    """One report per line, each carrying its resume cursor. Lines reuse
+    the report's encoded JSON, with the cursor spliced in at the end."""
+    lines = []
+    for report in reports:
+        encoded = report_json(report, cache=False)
+        lines.append(b'%s,"cursor":"%s"}' % (encoded[:-1], report_cursor(report).encode('ascii')))
+        if len(lines) == EXPORT_CHUNK:
+            yield b'\n'.join(lines) + b'\n'
+            lines = []
+    if lines:
+        yield b'\n'.join(lines) + b'\n'
+
+
+def iter_json(reports, exported_at):
+    """The legacy JSON export shape, written incrementally. Count and the
+    resume cursor come last since they are only known at the end."""
+    yield '{"success": true, "reports": ['
+    count = 0
+    last = None
+    parts = []
+    for report in reports:
+        parts.append(report_json(report, cache=False))
+        count += 1
+        last = report
+        if len(parts) == EXPORT_CHUNK:
+            yield (b',' if count > len(parts) else b'') + b','.join(parts)
+            parts = []
+    if parts:
+        yield (b',' if count > len(parts) else b'') + b','.join(parts)
+    yield '], ' + json.dumps({
+        'count': count,
+        'exported_at': exported_at,
+        'next_cursor': report_cursor(last) if last else None
+    })[1:]
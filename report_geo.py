@@ -0,0 +1,208 @@
+import math
+import re
+from threading import Lock
+
+EARTH_RADIUS_M = 6371008.8
+
+# Grid level L splits the world into cells of 360 / 2**L degrees. Points
+# are bucketed at POINT_LEVEL (~600 m at the equator); cluster counts are
+# kept for every level up to CLUSTER_LEVELS so any zoom is a lookup.
+POINT_LEVEL = 16
+CLUSTER_LEVELS = 18
+
+# A map tile is 256px; clustering at zoom z uses cells 1/8 of a tile
+CLUSTER_SUBDIVISIONS = 3
+
+# Past this many grid cells a bounding box is answered by walking the
+# occupied cells instead of enumerating the box
+MAX_CELL_WALK = 4096
+
+COORD_RE = re.compile(r'(-?\d{1,3}(?:\.\d+)?)\s*,\s*(-?\d{1,3}(?:\.\d+)?)')
+
+
+def _valid(lat, lng):
+    return -90 <= lat <= 90 and -180 <= lng <= 180
+
+
+def parse_coordinates(location):
+    """(lat, lng) from a report location, or None.
+
+    Accepts the geocode dict shape ({"coordinates": {"lat", "lng"}}), the
+    location.js shape ({"latitude", "longitude"}), and text such as
+    "Laxmi Nagar, Ravet (18.6500, 73.7500)" or "Coordinates: 18.65, 73.75".
+    """
+    if isinstance(location, dict):
+        if isinstance(location.get('coordinates'), dict):
+            return parse_coordinates(location['coordinates'])
+        for lat_key, lng_key in (('latitude', 'longitude'), ('lat', 'lng'), ('lat', 'lon')):
+            if lat_key in location and lng_key in location:
+                try:
+                    lat, lng = float(location[lat_key]), float(location[lng_key])
+                except (TypeError, ValueError):
+                    return None
+                return (lat, lng) if _valid(lat, lng) else None
+        location = location.get('address')
+    if not isinstance(location, str):
+        return None
+    for match in reversed(COORD_RE.findall(location)):
+        lat, lng = float(match[0]), float(match[1])
+        if _valid(lat, lng):
+            return lat, lng
+    return None
+
+
+def haversine_m(lat1, lng1, lat2, lng2):
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlmb = math.radians(lng2 - lng1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlmb / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(min(1.0, math.sqrt(a)))
+
+
+def cell_size(level):
+    return 360.0 / (1 << level)
+
+
+def cell_of(lat, lng, level):
+    size = cell_size(level)
+    return int(math.floor(lat / size)), int(math.floor(lng / size))
+
+
+def _cell_range(south, west, north, east, level):
+    (y0, x0), (y1, x1) = cell_of(south, west, level), cell_of(north, east, level)
+    return y0, x0, y1, x1
+
+
+class GeoIndex:
+    """Grid index over report coordinates.
+
+    Each report with parseable coordinates sits in one POINT_LEVEL cell;
+    radius and bounding-box queries only visit the cells they overlap.
+    Per-level cell aggregates (count and coordinate sums for a centroid)
+    are maintained on every change so map clustering never touches
+    individual reports.
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self._points = {}
+        self._cells = {}
+        self._clusters = [{} for _ in range(CLUSTER_LEVELS + 1)]
+
+    # ---------- store listener ----------
+
+    def on_add(self, report):
+        point = parse_coordinates(report.get('location'))
+        if point is None:
+            return
+        with self._lock:
+            self._add(report['report_id'], point)
+
+    def on_update(self, old_report, report):
+        if old_report.get('location') == report.get('location'):
+            return
+        point = parse_coordinates(report.get('location'))
+        with self._lock:
+            self._remove(report['report_id'])
+            if point is not None:
+                self._add(report['report_id'], point)
+
+    def on_remove(self, report):
+        with self._lock:
+            self._remove(report['report_id'])
+
+    def _add(self, report_id, point):
+        lat, lng = point
+        self._points[report_id] = point
+        self._cells.setdefault(cell_of(lat, lng, POINT_LEVEL), set()).add(report_id)
+        for level, clusters in enumerate(self._clusters):
+            cell = cell_of(lat, lng, level)
+            agg = clusters.get(cell)
+            if agg is None:
+                clusters[cell] = [1, lat, lng]
+            else:
+                agg[0] += 1
+                agg[1] += lat
+                agg[2] += lng
+
+    def _remove(self, report_id):
+        point = self._points.pop(report_id, None)
+        if point is None:
+            return
+        lat, lng = point
+        cell = cell_of(lat, lng, POINT_LEVEL)
+        members = self._cells[cell]
+        members.discard(report_id)
+        if not members:
+            del self._cells[cell]
+        for level, clusters in enumerate(self._clusters):
+            cell = cell_of(lat, lng, level)
+            agg = clusters[cell]
+            if agg[0] == 1:
+                del clusters[cell]
+            else:
+                agg[0] -= 1
+                agg[1] -= lat
+                agg[2] -= lng
+
+    # ---------- queries ----------
+
+    def location_of(self, report_id):
+        return self._points.get(report_id)
+
+    def _cells_in(self, cells, south, west, north, east, level):
+        y0, x0, y1, x1 = _cell_range(south, west, north, east, level)
+        if (y1 - y0 + 1) * (x1 - x0 + 1) > min(MAX_CELL_WALK, len(cells)):
+            return [(cell, value) for cell, value in cells.items()
+                    if y0 <= cell[0] <= y1 and x0 <= cell[1] <= x1]
+        found = []
+        for y in range(y0, y1 + 1):
+            for x in range(x0, x1 + 1):
+                value = cells.get((y, x))
+                if value is not None:
+                    found.append(((y, x), value))
+        return found
+
+    def within(self, south, west, north, east):
+        """Report ids inside a bounding box (degrees)."""
+        with self._lock:
+            ids = []
+            for _, members in self._cells_in(self._cells, south, west, north, east, POINT_LEVEL):
+                for report_id in members:
+                    lat, lng = self._points[report_id]
+                    if south <= lat <= north and west <= lng <= east:
+                        ids.append(report_id)
+            return ids
+
+    def nearby(self, lat, lng, radius_m):
+        """[(report_id, distance_m), ...] within `radius_m`, closest first."""
+        dlat = math.degrees(radius_m / EARTH_RADIUS_M)
+        dlng = dlat / max(math.cos(math.radians(lat)), 1e-6)
+        with self._lock:
+            hits = []
+            cells = self._cells_in(self._cells, lat - dlat, lng - dlng,
+                                   lat + dlat, lng + dlng, POINT_LEVEL)
+            for _, members in cells:
+                for report_id in members:
+                    plat, plng = self._points[report_id]
+                    distance = haversine_m(lat, lng, plat, plng)
+                    if distance <= radius_m:
+                        hits.append((report_id, distance))
+        hits.sort(key=lambda hit: hit[1])
+        return hits
+
+    def clusters(self, south, west, north, east, zoom):
+        """Aggregated cells for a map viewport at a web-map zoom level."""
+        level = max(0, min(int(zoom) + CLUSTER_SUBDIVISIONS, CLUSTER_LEVELS))
+        size = cell_size(level)
+        with self._lock:
+            cells = self._cells_in(self._clusters[level], south, west, north, east, level)
+            return [{
+                "lat": round(agg[1] / agg[0], 5),
+                "lng": round(agg[2] / agg[0], 5),
+                "count": agg[0],
+                "cell": [round(y * size, 5), round(x * size, 5), round(size, 6)]
+            } for (y, x), agg in cells]
+
+    def __len__(self):
+        return len(self._points)
@@ -0,0 +1,135 @@
+import json
+import sys
+
+# Fields most reports carry, stored in slots; anything else goes to `extra`
+SLOT_FIELDS = ('report_id', 'user_id', 'problem_type', 'description', 'voice_text',
+               'location', 'language', 'status', 'audio', 'created_at', 'updated_at',
+               'suggested_problem_type', 'category_confidence', 'urgency', 'priority')
+
+# Small vocabularies; equal values share one string object
+INTERNED_FIELDS = frozenset(('user_id', 'problem_type', 'language', 'status',
+                             'suggested_problem_type', 'urgency'))
+
+
+_encoder = json.JSONEncoder(ensure_ascii=False, separators=(',', ':'))
+_ascii_encoder = json.JSONEncoder(separators=(',', ':'))
+
+
+def encode_report(report):
+    """Compact UTF-8 JSON for one report, as used in list fragments."""
+    try:
+        return _encoder.encode(report).encode('utf-8')
+    except UnicodeEncodeError:
+        # Lone surrogates from a client payload cannot be written as UTF-8
+        return _ascii_encoder.encode(report).encode('ascii')
+
+
+def report_json(report, cache=True):
+    """Encoded JSON for a record or a plain report dict."""
+    if isinstance(report, ReportRecord):
+        return report.json(cache)
+    return encode_report(report)
+
+
+class ReportRecord:
+    """Read-only report with the same read interface as a report dict.
+
+    Common fields live in slots instead of a per-report dict; values of
+    INTERNED_FIELDS are interned. A change builds a new record with
+    `replace()`, so a record never changes once built and the JSON it
+    caches in `json()` stays valid for its whole life. Slots that were
+    never set are simply absent, like a missing dict key.
+    """
+
+    __slots__ = SLOT_FIELDS + ('extra', '_json')
+
+    def __init__(self, fields, encoded=None):
+        extra = None
+        for key, value in fields.items():
+            if key in INTERNED_FIELDS and type(value) is str:
+                value = sys.intern(value)
+            if key in _SLOTS:
+                setattr(self, key, value)
+            else:
+                if extra is None:
+                    extra = {}
+                extra[key] = value
+        self.extra = extra
+        self._json = encoded
+
+    @classmethod
+    def from_dict(cls, report, encoded=None):
+        return report if isinstance(report, cls) else cls(report, encoded)
+
+    def replace(self, changes):
+        return ReportRecord({**self.to_dict(), **changes})
+
+    def to_dict(self):
+        report = {}
+        for key in SLOT_FIELDS:
+            value = getattr(self, key, _MISSING)
+            if value is not _MISSING:
+                report[key] = value
+        if self.extra:
+            report.update(self.extra)
+        return report
+
+    def json(self, cache=True):
+        """Encoded JSON, computed once. Pass cache=False for one-off
+        encodings (exports) that should not keep the bytes around."""
+        encoded = self._json
+        if encoded is None:
+            encoded = encode_report(self.to_dict())
+            if cache:
+                self._json = encoded
+        return encoded
+
+    # ---------- dict-style reads ----------
+
+    def __getitem__(self, key):
+        if key in _SLOTS:
+            value = getattr(self, key, _MISSING)
+            if value is not _MISSING:
+                return value
+        elif self.extra and key in self.extra:
+            return self.extra[key]
+        raise KeyError(key)
+
+    def get(self, key, default=None):
+        if key in _SLOTS:
+            return getattr(self, key, default)
+        return self.extra.get(key, default) if self.extra else default
+
+    def __contains__(self, key):
+        if key in _SLOTS:
+            return hasattr(self, key)
+        return bool(self.extra) and key in self.extra
+
+    def keys(self):
+        return self.to_dict().keys()
+
+    def items(self):
+        return self.to_dict().items()
+
+    def values(self):
+        return self.to_dict().values()
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return sum(1 for key in SLOT_FIELDS if hasattr(self, key)) + len(self.extra or ())
+
+    def __eq__(self, other):
+        if isinstance(other, ReportRecord):
+            other = other.to_dict()
+        return self.to_dict() == other
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"ReportRecord({self.to_dict()!r})"
+
+
+_SLOTS = frozenset(SLOT_FIELDS)
+_MISSING = object()
@@ -0,0 +1,139 @@
+import heapq
+import math
+import re
+import unicodedata
+from threading import Lock
+
+SEARCH_FIELDS = ('description', 'voice_text')
+
+# Letters/digits plus the Indic blocks (Devanagari through Sinhala, minus
+# the danda punctuation) so vowel signs and viramas stay inside the word,
+# and ZWJ/ZWNJ used in conjuncts.
+TOKEN_RE = re.compile(r'[\w\u0300-\u036f\u0900-\u0963\u0966-\u0dff\u200c\u200d]+')
+
+STOPWORDS = frozenset((
+    'a', 'an', 'and', 'are', 'at', 'for', 'from', 'in', 'is', 'it', 'of', 'on',
+    'or', 'the', 'there', 'this', 'to', 'was', 'with',
+    'का', 'की', 'के', 'को', 'में', 'है', 'हैं', 'और', 'से', 'पर', 'भी', 'नहीं', 'था', 'थी',
+))
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+
+def tokenize(text):
+    if not text:
+        return []
+    text = unicodedata.normalize('NFC', text).casefold()
+    tokens = []
+    for token in TOKEN_RE.findall(text):
+        token = token.strip('_\u200c\u200d')
+        if token and token not in STOPWORDS:
+            tokens.append(token)
+    return tokens
+
+
+def _document(report):
+    # Description and transcript are often identical; index that text once
+    parts = []
+    for field in SEARCH_FIELDS:
+        value = report.get(field)
+        if isinstance(value, str) and value and value not in parts:
+            parts.append(value)
+    return ' '.join(parts)
+
+
+class SearchIndex:
+    """Inverted index over report text with BM25 ranking.
+
+    Postings map a term to {report_id: term frequency}; document lengths
+    and the running total length give the BM25 length normalisation.
+    Kept current from ReportStore events.
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self._postings = {}
+        self._lengths = {}
+        self._terms = {}
+        self._total_length = 0
+
+    # ---------- store listener ----------
+
+    def on_add(self, report):
+        with self._lock:
+            self._add(report['report_id'], tokenize(_document(report)))
+
+    def on_update(self, old_report, report):
+        if _document(old_report) == _document(report):
+            return
+        with self._lock:
+            self._remove(report['report_id'])
+            self._add(report['report_id'], tokenize(_document(report)))
+
+    def on_remove(self, report):
+        with self._lock:
+            self._remove(report['report_id'])
+
+    def _add(self, report_id, tokens):
+        counts = {}
+        for token in tokens:
+            counts[token] = counts.get(token, 0) + 1
+        for token, tf in counts.items():
+            self._postings.setdefault(token, {})[report_id] = tf
+        self._lengths[report_id] = len(tokens)
+        self._terms[report_id] = tuple(counts)
+        self._total_length += len(tokens)
+
+    def _remove(self, report_id):
+        length = self._lengths.pop(report_id, None)
+        if length is None:
+            return
+        self._total_length -= length
+        for token in self._terms.pop(report_id):
+            posting = self._postings.get(token)
+            if posting is None:
+                continue
+            posting.pop(report_id, None)
+            if not posting:
+                del self._postings[token]
+
+    # ---------- queries ----------
+
+    def search(self, query, limit=20, offset=0, predicate=None):
+        """Return [(report_id, score), ...] best first.
+
+        `predicate(report_id)` filters candidates before the top-k cut.
+        """
+        terms = set(tokenize(query))
+        with self._lock:
+            docs = len(self._lengths)
+            if not terms or not docs:
+                return []
+            avg_length = self._total_length / docs or 1.0
+            lengths = self._lengths
+            # BM25 denominator tf + k1 * (1 - b + b * len / avg), split into
+            # constants so the per-posting loop is a few multiplications
+            fixed = BM25_K1 * (1 - BM25_B)
+            per_token = BM25_K1 * BM25_B / avg_length
+            scores = {}
+            for term in terms:
+                posting = self._postings.get(term)
+                if not posting:
+                    continue
+                df = len(posting)
+                weight = math.log(1 + (docs - df + 0.5) / (df + 0.5)) * (BM25_K1 + 1)
+                if not scores:
+                    scores = {report_id: weight * tf / (tf + fixed + per_token * lengths[report_id])
+                              for report_id, tf in posting.items()}
+                    continue
+                for report_id, tf in posting.items():
+                    score = weight * tf / (tf + fixed + per_token * lengths[report_id])
+                    scores[report_id] = scores.get(report_id, 0.0) + score
+        items = scores.items()
+        if predicate is not None:
+            items = [(report_id, score) for report_id, score in items if predicate(report_id)]
+        return heapq.nlargest(offset + limit, items, key=lambda item: item[1])[offset:]
+
+    def __len__(self):
+        return len(self._lengths)
@@ -0,0 +1,519 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+from report_record import ReportRecord
+from report_store import INDEXED_FIELDS, SCAN_CHUNK, notify
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS reports (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    report_id TEXT NOT NULL UNIQUE,
+    user_id TEXT,
+    status TEXT,
+    problem_type TEXT,
+    language TEXT,
+    priority INTEGER NOT NULL DEFAULT 0,
+    created_at TEXT NOT NULL DEFAULT '',
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS reports_user_id ON reports (user_id, seq);
+CREATE INDEX IF NOT EXISTS reports_status ON reports (status, seq);
+CREATE INDEX IF NOT EXISTS reports_problem_type ON reports (problem_type, seq);
+CREATE INDEX IF NOT EXISTS reports_language ON reports (language, seq);
+CREATE INDEX IF NOT EXISTS reports_created_at ON reports (created_at, seq);
+CREATE INDEX IF NOT EXISTS reports_ranked ON reports (priority DESC, seq);
+CREATE TABLE IF NOT EXISTS report_changes (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    op TEXT NOT NULL,
+    report_id TEXT NOT NULL,
+    old TEXT,
+    new TEXT
+);
+CREATE TABLE IF NOT EXISTS users (
+    position INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id TEXT NOT NULL UNIQUE,
+    data TEXT NOT NULL
+);
+"""
+
+# How often other workers' writes are picked up for the listeners
+POLL_INTERVAL = 0.5
+
+# Change rows kept for workers that are catching up, and how many polls
+# pass between trims
+CHANGE_RETENTION = 100000
+PRUNE_EVERY = 600
+
+
+def _dumps(value):
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':'))
+
+
+def _record(data):
+    # The stored JSON doubles as the record's encoded form
+    return ReportRecord(json.loads(data), data.encode('utf-8'))
+
+
+def _where(filters, since=None, until=None):
+    # WHERE clause over indexed columns. Column names come from
+    # INDEXED_FIELDS only, so the set of distinct statements stays small
+    # and each one is prepared once per connection.
+    clauses, params = [], []
+    for field in sorted(filters):
+        value = filters[field]
+        if value is None:
+            continue
+        if field not in INDEXED_FIELDS:
+            raise ValueError(f"Field is not indexed: {field}")
+        clauses.append(f"{field} = ?")
+        params.append(value)
+    if since:
+        clauses.append("created_at >= ?")
+        params.append(since)
+    if until:
+        clauses.append("created_at < ?")
+        params.append(until)
+    return clauses, params
+
+
+class SqliteDatabase:
+    """Shared SQLite file (WAL mode) behind the report store and user
+    directory, so several worker processes can serve one data set.
+
+    Connections are pooled per thread and keep their prepared statements
+    cached. Every write also appends a row to `report_changes`; each
+    process replays new rows to its store listeners (search, geo, stats,
+    ...) right after its own writes and from a background poller for other
+    workers' writes. It stands in for ReportJournal in app.py: recover()
+    feeds existing rows to the listeners, start() begins polling and
+    sync()/log_user() are no-ops since each write is already committed.
+    """
+
+    def __init__(self, path, timeout=30.0):
+        self.path = path
+        self.timeout = timeout
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._local = threading.local()
+        self._connections = []
+        self._connections_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._poller = None
+        self.connection().executescript(SCHEMA)
+
+    # ---------- connection pool ----------
+
+    def connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None,
+                                   check_same_thread=False, cached_statements=256)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            self._local.conn = conn
+            self._local.depth = 0
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+
+    @contextmanager
+    def transaction(self):
+        # Write transaction for this thread; nested uses join the outer one.
+        # BEGIN IMMEDIATE takes the write lock up front so read-modify-write
+        # sequences cannot interleave with other workers.
+        conn = self.connection()
+        if self._local.depth:
+            self._local.depth += 1
+            try:
+                yield conn
+            finally:
+                self._local.depth -= 1
+            return
+        conn.execute("BEGIN IMMEDIATE")
+        self._local.depth = 1
+        try:
+            yield conn
+        except BaseException:
+            self._local.depth = 0
+            conn.execute("ROLLBACK")
+            raise
+        self._local.depth = 0
+        conn.execute("COMMIT")
+
+    def in_transaction(self):
+        return bool(getattr(self._local, 'depth', 0))
+
+    # ---------- journal role ----------
+
+    def recover(self, store, users):
+        return store.catch_up()
+
+    def start(self, store, users):
+        if self._poller is None:
+            self._poller = threading.Thread(target=self._poll, args=(store,),
+                                            name='sqlite-poller', daemon=True)
+            self._poller.start()
+
+    def _poll(self, store):
+        polls = 0
+        while not self._stop.wait(POLL_INTERVAL):
+            polls += 1
+            try:
+                store.catch_up()
+                if polls % PRUNE_EVERY == 0:
+                    store.prune_changes()
+            except sqlite3.Error as e:
+                logger.warning("Could not read report changes: %s", e)
+
+    def sync(self, seq=None):
+        return None
+
+    def log_user(self, user_id, user):
+        return None
+
+    @contextmanager
+    def group(self):
+        # Writes inside reports_db.batch() already commit as one transaction
+        yield
+
+    def close(self):
+        self._stop.set()
+        if self._poller is not None:
+            self._poller.join(timeout=2)
+        with self._connections_lock:
+            for conn in self._connections:
+                try:
+                    conn.close()
+                except sqlite3.Error:
+                    pass
+            self._connections.clear()
+
+
+class SqliteReportStore:
+    """ReportStore backed by SQLite; same interface as the in-memory store.
+
+    Seqs are the table's rowids, so cursors stay valid across restarts and
+    across workers. Reads go straight to the indexed columns; the full
+    report is stored as JSON in `data`, which reads hand back as the
+    ReportRecord's encoded form instead of serialising it again.
+    """
+
+    def __init__(self, database):
+        self.db = database
+        self._listeners = []
+        self._notify_lock = threading.RLock()
+        self._last_change = None
+
+    # ---------- listeners ----------
+
+    def subscribe(self, listener):
+        self._listeners.append(listener)
+
+    def _notify(self, event, *args):
+        notify(self._listeners, event, *args)
+
+    def last_change(self):
+        # Id of the newest report_changes row delivered to listeners (the
+        # one being delivered, during a notification). Every worker replays
+        # the same rows, so this numbers an event the same way in each.
+        return self._last_change
+
+    def catch_up(self):
+        """Feed listeners every change not yet seen by this process.
+
+        The first call replays the current table as additions (like journal
+        recovery); later calls replay `report_changes` in commit order.
+        Returns the number of events delivered.
+        """
+        conn = self.db.connection()
+        with self._notify_lock:
+            delivered = 0
+            if self._last_change is None:
+                # One read transaction so the table and the change mark agree
+                with self._reading(conn):
+                    mark = conn.execute("SELECT COALESCE(MAX(id), 0) FROM report_changes").fetchone()[0]
+                    for (data,) in conn.execute("SELECT data FROM reports ORDER BY seq"):
+                        self._notify('on_add', json.loads(data))
+                        delivered += 1
+                self._last_change = mark
+                return delivered
+            while True:
+                rows = conn.execute(
+                    "SELECT id, op, old, new FROM report_changes WHERE id > ? ORDER BY id LIMIT ?",
+                    (self._last_change, SCAN_CHUNK)).fetchall()
+                for change_id, op, old, new in rows:
+                    self._last_change = change_id
+                    if op == 'add':
+                        self._notify('on_add', json.loads(new))
+                    elif op == 'update':
+                        self._notify('on_update', json.loads(old), json.loads(new))
+                    elif op == 'remove':
+                        self._notify('on_remove', json.loads(old))
+                    elif op == 'archive':
+                        self._notify('on_archive', json.loads(old))
+                    elif op == 'restore':
+                        self._notify('on_restore', json.loads(new))
+                    elif op == 'forget':
+                        self._notify('on_forget', json.loads(old))
+                delivered += len(rows)
+                if len(rows) < SCAN_CHUNK:
+                    return delivered
+
+    # ---------- writes ----------
+
+    @contextmanager
+    def _write(self):
+        # Writes deliver their own events before commit so listeners are
+        # current within a batch. If the outermost transaction rolls back,
+        # rewind to the last change committed before it so the change ids
+        # SQLite hands out again are not skipped.
+        if self.db.in_transaction():
+            with self.db.transaction() as conn:
+                yield conn
+            return
+        mark = None
+        try:
+            with self.db.transaction() as conn:
+                mark = conn.execute("SELECT COALESCE(MAX(id), 0) FROM report_changes").fetchone()[0]
+                yield conn
+        except BaseException:
+            if mark is not None:
+                with self._notify_lock:
+                    if self._last_change is not None and self._last_change > mark:
+                        self._last_change = mark
+            raise
+
+    @staticmethod
+    def _columns(report):
+        return (report.get('user_id'), report.get('status'), report.get('problem_type'),
+                report.get('language'), report.get('priority') or 0, report.get('created_at') or '')
+
+    def add(self, report, restored=False):
+        data = _dumps(report)
+        with self._write() as conn:
+            try:
+                conn.execute(
+                    "INSERT INTO reports (report_id, user_id, status, problem_type, language, "
+                    "priority, created_at, data) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (report['report_id'],) + self._columns(report) + (data,))
+            except sqlite3.IntegrityError:
+                raise KeyError(f"Duplicate report id: {report['report_id']}")
+            conn.execute("INSERT INTO report_changes (op, report_id, new) VALUES (?, ?, ?)",
+                         ('restore' if restored else 'add', report['report_id'], data))
+            self.catch_up()
+        return report
+
+    def update(self, report_id, changes):
+        with self._write() as conn:
+            row = conn.execute("SELECT data FROM reports WHERE report_id = ?", (report_id,)).fetchone()
+            if row is None:
+                return None
+            report = json.loads(row[0])
+            report.update(changes)
+            data = _dumps(report)
+            conn.execute(
+                "UPDATE reports SET user_id = ?, status = ?, problem_type = ?, language = ?, "
+                "priority = ?, created_at = ?, data = ? WHERE report_id = ?",
+                self._columns(report) + (data, report_id))
+            conn.execute("INSERT INTO report_changes (op, report_id, old, new) VALUES ('update', ?, ?, ?)",
+                         (report_id, row[0], data))
+            self.catch_up()
+        return report
+
+    def batch(self):
+        # One write transaction across several writes, so readers (in any
+        # worker) see all of them or none
+        return self._write()
+
+    def remove(self, report_id, archived=False):
+        with self._write() as conn:
+            row = conn.execute("SELECT data FROM reports WHERE report_id = ?", (report_id,)).fetchone()
+            if row is None:
+                return None
+            conn.execute("DELETE FROM reports WHERE report_id = ?", (report_id,))
+            conn.execute("INSERT INTO report_changes (op, report_id, old) VALUES (?, ?, ?)",
+                         ('archive' if archived else 'remove', report_id, row[0]))
+            self.catch_up()
+        return json.loads(row[0])
+
+    def forget(self, report):
+        # Only a change row: the report left the table when it was archived
+        with self._write() as conn:
+            conn.execute("INSERT INTO report_changes (op, report_id, old) VALUES ('forget', ?, ?)",
+                         (report['report_id'], _dumps(dict(report))))
+            self.catch_up()
+
+    def prune_changes(self, keep=CHANGE_RETENTION):
+        with self.db.transaction() as conn:
+            conn.execute("DELETE FROM report_changes WHERE id <= "
+                         "(SELECT COALESCE(MAX(id), 0) FROM report_changes) - ?", (keep,))
+
+    # ---------- reads ----------
+
+    @staticmethod
+    @contextmanager
+    def _reading(conn):
+        # Consistent view across several statements, unless this thread is
+        # already inside a transaction
+        if conn.in_transaction:
+            yield
+            return
+        conn.execute("BEGIN")
+        try:
+            yield
+        finally:
+            conn.execute("COMMIT")
+
+    def _query(self, sql, params=()):
+        return self.db.connection().execute(sql, params)
+
+    def get(self, report_id):
+        row = self._query("SELECT data FROM reports WHERE report_id = ?", (report_id,)).fetchone()
+        return _record(row[0]) if row else None
+
+    def __contains__(self, report_id):
+        return self._query("SELECT 1 FROM reports WHERE report_id = ?", (report_id,)).fetchone() is not None
+
+    def __len__(self):
+        return self._query("SELECT COUNT(*) FROM reports").fetchone()[0]
+
+    def __iter__(self):
+        return self.scan()
+
+    def snapshot(self, before=None):
+        conn = self.db.connection()
+        with self._reading(conn):
+            mark = before() if before else None
+            reports = [json.loads(data) for (data,) in conn.execute("SELECT data FROM reports ORDER BY seq")]
+        return mark, reports
+
+    def ids_where(self, field, value):
+        clauses, params = _where({field: value})
+        sql = "SELECT report_id FROM reports WHERE " + " AND ".join(clauses) + " ORDER BY seq"
+        return [report_id for (report_id,) in self._query(sql, params)]
+
+    def count_where(self, field, value):
+        return self.count(**{field: value})
+
+    def counts_by(self, field):
+        if field not in INDEXED_FIELDS:
+            raise ValueError(f"Field is not indexed: {field}")
+        return dict(self._query(f"SELECT {field}, COUNT(*) FROM reports GROUP BY {field}"))
+
+    def find(self, **filters):
+        return list(self.scan(**filters))
+
+    # ---------- ordered scans ----------
+
+    def scan(self, after=None, since=None, until=None, descending=False, **filters):
+        """Yield reports matching `filters` in submission order, one
+        SCAN_CHUNK query at a time so streaming responses stay lazy."""
+        clauses, params = _where(filters, since, until)
+        clauses.append("seq < ?" if descending else "seq > ?")
+        sql = ("SELECT seq, data FROM reports WHERE " + " AND ".join(clauses) +
+               (" ORDER BY seq DESC" if descending else " ORDER BY seq") + " LIMIT ?")
+        position = after
+        if position is None:
+            position = 1 << 62 if descending else -1
+        while True:
+            rows = self._query(sql, params + [position, SCAN_CHUNK]).fetchall()
+            for seq, data in rows:
+                yield _record(data)
+            if len(rows) < SCAN_CHUNK:
+                return
+            position = rows[-1][0]
+
+    def scan_ranked(self, after=None, since=None, until=None, **filters):
+        """Yield reports by descending `priority`, oldest first within a
+        priority. `after` is a key from `rank_key()`."""
+        clauses, params = _where(filters, since, until)
+        clauses.append("(priority < ? OR (priority = ? AND seq > ?))")
+        sql = ("SELECT priority, seq, data FROM reports WHERE " + " AND ".join(clauses) +
+               " ORDER BY priority DESC, seq LIMIT ?")
+        priority, seq = (-after[0], after[1]) if after else (1 << 62, -1)
+        while True:
+            rows = self._query(sql, params + [priority, priority, seq, SCAN_CHUNK]).fetchall()
+            for _, _, data in rows:
+                yield _record(data)
+            if len(rows) < SCAN_CHUNK:
+                return
+            priority, seq = rows[-1][0], rows[-1][1]
+
+    def rank_key(self, priority, report_id, created_at):
+        return (-(priority or 0), self.cursor_seq(report_id, created_at))
+
+    def count(self, since=None, until=None, **filters):
+        clauses, params = _where(filters, since, until)
+        sql = "SELECT COUNT(*) FROM reports" + (" WHERE " + " AND ".join(clauses) if clauses else "")
+        return self._query(sql, params).fetchone()[0]
+
+    def cursor_seq(self, report_id, created_at, descending=False):
+        """Seq for a cursor position; falls back to created_at if the
+        report has been deleted since the cursor was issued."""
+        row = self._query("SELECT seq FROM reports WHERE report_id = ?", (report_id,)).fetchone()
+        if row:
+            return row[0]
+        if descending:
+            row = self._query("SELECT MIN(seq) FROM reports WHERE created_at >= ?", (created_at,)).fetchone()
+            return row[0] if row[0] is not None else 1 << 62
+        row = self._query("SELECT MAX(seq) FROM reports WHERE created_at <= ?", (created_at,)).fetchone()
+        return row[0] if row[0] is not None else -1
+
+    def clear(self):
+        with self.db.transaction() as conn:
+            conn.execute("DELETE FROM reports")
+
+
+class SqliteUserDirectory:
+    """users_db backed by the shared database; the dict operations app.py
+    uses plus UserDirectory.page()."""
+
+    def __init__(self, database):
+        self.db = database
+
+    def _query(self, sql, params=()):
+        return self.db.connection().execute(sql, params)
+
+    def __setitem__(self, user_id, user):
+        with self.db.transaction() as conn:
+            conn.execute("INSERT INTO users (user_id, data) VALUES (?, ?) "
+                         "ON CONFLICT (user_id) DO UPDATE SET data = excluded.data",
+                         (user_id, _dumps(user)))
+
+    def __getitem__(self, user_id):
+        user = self.get(user_id)
+        if user is None:
+            raise KeyError(user_id)
+        return user
+
+    def get(self, user_id, default=None):
+        row = self._query("SELECT data FROM users WHERE user_id = ?", (user_id,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def __contains__(self, user_id):
+        return self._query("SELECT 1 FROM users WHERE user_id = ?", (user_id,)).fetchone() is not None
+
+    def __len__(self):
+        return self._query("SELECT COUNT(*) FROM users").fetchone()[0]
+
+    def update(self, *args, **kwargs):
+        for user_id, user in dict(*args, **kwargs).items():
+            self[user_id] = user
+
+    def items(self):
+        return [(user_id, json.loads(data)) for user_id, data in
+                self._query("SELECT user_id, data FROM users ORDER BY position")]
+
+    def page(self, after=-1, limit=50):
+        # Positions are the table's rowids (from 1) shifted to start at 0
+        # like UserDirectory's, so cursors survive restarts
+        rows = self._query("SELECT position, user_id, data FROM users WHERE position > ? "
+                           "ORDER BY position LIMIT ?", (after + 1, limit)).fetchall()
+        return [(position - 1, user_id, json.loads(data)) for position, user_id, data in rows]
@@ -0,0 +1,153 @@
+import re
+from datetime import datetime, timedelta
+from threading import Lock
+
+from report_geo import COORD_RE, cell_of, parse_coordinates
+
+HOUR = 3600
+RECENT_HOURS = 7 * 24
+
+# Locations given only as coordinates count as one village per grid cell
+# of this level (~5 km at the equator)
+VILLAGE_CELL_LEVEL = 13
+
+# What the frontend shows in place of a location it doesn't have (en.json,
+# hi.json, location.js), compared without trailing dots
+PLACEHOLDER_LOCATIONS = frozenset(('loading', 'लोड हो रहा है', 'your location: loading',
+                                   'loading your location', 'location not available'))
+
+_COORDINATE_NOISE = re.compile(r'coordinates\s*:?|[()\[\]]', re.IGNORECASE)
+
+
+def _parse_time(value):
+    try:
+        return datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except (AttributeError, ValueError):
+        return None
+
+
+def village_name(location):
+    """Key a location counts under for villages covered, or None.
+
+    Locations are geocoded dicts or the text the frontend shows, such as
+    "Laxmi Nagar, Ravet (18.6500, 73.7500)" or "Coordinates: 18.65, 73.75".
+    Coordinates are dropped from names so every GPS fix in one place counts
+    once; text that is only coordinates counts per grid cell, and
+    placeholders ("Loading...", "Unknown, Unknown, Unknown") not at all.
+    """
+    village = location.get('village') if isinstance(location, dict) else None
+    if isinstance(village, str) and village.strip():
+        return village.strip().casefold()
+    text = location.get('address') if isinstance(location, dict) else location
+    if isinstance(text, str):
+        name = _COORDINATE_NOISE.sub(' ', COORD_RE.sub(' ', text))
+        name = ' '.join(name.split()).strip(' ,.-').casefold()
+        if (name and name not in PLACEHOLDER_LOCATIONS
+                and {part.strip() for part in name.split(',')} != {'unknown'}):
+            return name
+    point = parse_coordinates(location)
+    if point is None:
+        return None
+    return 'cell:%d:%d' % cell_of(point[0], point[1], VILLAGE_CELL_LEVEL)
+
+
+def resolution_seconds(report):
+    if report.get('status') != 'resolved':
+        return None
+    created = _parse_time(report.get('created_at'))
+    resolved = _parse_time(report.get('resolved_at'))
+    if created is None or resolved is None:
+        return None
+    return max((resolved - created).total_seconds(), 0.0)
+
+
+class ReportStats:
+    """Running dashboard aggregates kept up to date from ReportStore events.
+
+    Submissions are counted in hourly and daily buckets keyed by their
+    `created_at`, so the "recent" and "today" figures cost a fixed number
+    of bucket lookups. Resolution time and covered villages are running
+    sums/reference counts adjusted on every add, update and remove.
+    """
+
+    def __init__(self):
+        self._lock = Lock()
+        self._hourly = {}
+        self._daily = {}
+        self._villages = {}
+        self._resolved_count = 0
+        self._resolved_seconds = 0.0
+
+    # ---------- store listener ----------
+
+    def on_add(self, report):
+        with self._lock:
+            self._apply(report, 1)
+
+    def on_update(self, old_report, report):
+        with self._lock:
+            self._apply(old_report, -1)
+            self._apply(report, 1)
+
+    def on_remove(self, report):
+        with self._lock:
+            self._apply(report, -1)
+
+    def _apply(self, report, sign):
+        created = _parse_time(report.get('created_at'))
+        if created is not None:
+            hour = int(created.timestamp() // HOUR)
+            self._bump(self._hourly, hour, sign)
+            self._bump(self._daily, created.date().isoformat(), sign)
+
+        village = village_name(report.get('location'))
+        if village is not None:
+            self._bump(self._villages, village, sign)
+
+        seconds = resolution_seconds(report)
+        if seconds is not None:
+            self._resolved_count += sign
+            self._resolved_seconds += sign * seconds
+
+    @staticmethod
+    def _bump(counts, key, sign):
+        value = counts.get(key, 0) + sign
+        if value:
+            counts[key] = value
+        else:
+            counts.pop(key, None)
+
+    # ---------- reads ----------
+
+    def recent_count(self, now=None, hours=RECENT_HOURS):
+        # Rolling window at hour granularity, current hour included
+        now = now or datetime.now()
+        current = int(now.timestamp() // HOUR)
+        with self._lock:
+            return sum(self._hourly.get(h, 0) for h in range(current - hours + 1, current + 1))
+
+    def day_count(self, day=None):
+        day = day or datetime.now().date()
+        return self._daily.get(day.isoformat(), 0)
+
+    def daily_counts(self, days=7, today=None):
+        today = today or datetime.now().date()
+        with self._lock:
+            return {
+                (today - timedelta(days=i)).isoformat():
+                    self._daily.get((today - timedelta(days=i)).isoformat(), 0)
+                for i in range(days - 1, -1, -1)
+            }
+
+    def avg_resolution_days(self, archived=(0, 0.0)):
+        # `archived` adds (count, seconds) for reports no longer in the store
+        with self._lock:
+            count = self._resolved_count + archived[0]
+            if not count:
+                return None
+            return (self._resolved_seconds + archived[1]) / count / 86400
+
+    def villages_covered(self, archived=()):
+        # `archived` adds village names of reports no longer in the store
+        with self._lock:
+            return len(self._villages.keys() | set(archived))
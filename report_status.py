@@ -0,0 +1,154 @@
+import hashlib
+import json
+import re
+from collections import OrderedDict
+from threading import Lock
+
+# "VV-1A2B3C4D" as handed out by submit_report, or the raw report id
+REFERENCE_RE = re.compile(r'^(?:VV-)?([0-9A-F]{8})$', re.IGNORECASE)
+
+# Fields a status page shows; changes to anything else (priority re-scores,
+# admin-only fields) leave cached responses valid
+PUBLIC_FIELDS = ('status', 'problem_type', 'updated_at', 'duplicate_of',
+                 'duplicate_count', 'status_history', 'admin_notes')
+
+
+def parse_reference(reference):
+    """Report id for a reference number, or None if it is malformed."""
+    match = REFERENCE_RE.match((reference or '').strip())
+    return match.group(1).lower() if match else None
+
+
+def reference_number(report_id):
+    return f"VV-{report_id.upper()}"
+
+
+def status_history(report):
+    # Transitions are recorded by update_report_status; the first entry is
+    # the status the report was created with
+    changes = report.get('status_history') or []
+    initial = changes[0]['from'] if changes else report.get('status')
+    history = [{"status": initial, "at": report.get('created_at')}]
+    history += [{"status": change['status'], "at": change['at']} for change in changes]
+    return history
+
+
+def status_view(report):
+    view = {
+        "reference_number": reference_number(report['report_id']),
+        "problem_type": report.get('problem_type'),
+        "status": report.get('status'),
+        "created_at": report.get('created_at'),
+        "updated_at": report.get('updated_at'),
+        "history": status_history(report)
+    }
+    if report.get('duplicate_of'):
+        view["duplicate_of"] = reference_number(report['duplicate_of'])
+    if report.get('duplicate_count'):
+        view["duplicate_count"] = report['duplicate_count']
+    return view
+
+
+def _payload(data):
+    body = json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    return body, hashlib.sha1(body).hexdigest()
+
+
+class StatusCache:
+    """LRU cache of serialised status responses for citizens.
+
+    Entries are keyed by report (public lookup by reference number) and by
+    user (the "my reports" timeline) and are built from the store's id and
+    user_id indexes on a miss. Store events drop the affected entries when
+    a public field changes. A miss only caches its result if nothing was
+    invalidated while it was being built, so a lookup that raced with an
+    update cannot cache the older state. Reports that have moved to
+    `archive` are still found by reference number and listed in their
+    user's timeline.
+    """
+
+    def __init__(self, store, max_entries=4096, archive=None):
+        self.store = store
+        self.archive = archive
+        self.max_entries = max_entries
+        self._lock = Lock()
+        self._entries = OrderedDict()
+        self._version = 0
+
+    # ---------- store listener ----------
+
+    def _invalidate(self, *keys):
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+            self._version += 1
+
+    def on_add(self, report):
+        self._invalidate(('user', report.get('user_id')))
+
+    def on_update(self, old_report, report):
+        if any(old_report.get(f) != report.get(f) for f in PUBLIC_FIELDS):
+            self._invalidate(('report', report['report_id']), ('user', report.get('user_id')))
+
+    def on_remove(self, report):
+        self._invalidate(('report', report['report_id']), ('user', report.get('user_id')))
+
+    # Archived reports are served from the archive, so deleting one must
+    # drop its entries too
+    on_forget = on_remove
+
+    # ---------- lookups ----------
+
+    def _cached(self, key, build):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return entry
+            version = self._version
+        entry = build()
+        if entry is None:
+            return None
+        with self._lock:
+            if self._version == version:
+                self._entries[key] = entry
+                if len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return entry
+
+    def report_status(self, report_id):
+        """(body, etag) for one report's public status, or None."""
+        def build():
+            report = self.store.get(report_id)
+            if report is None and self.archive is not None:
+                report = self.archive.get(report_id)
+            if report is None:
+                return None
+            return _payload({"success": True, "report": status_view(report)})
+        return self._cached(('report', report_id), build)
+
+    def user_timeline(self, user_id):
+        """(body, etag) for a user's reports, newest first."""
+        def build():
+            found = [self.store.get(report_id) for report_id in self.store.ids_where('user_id', user_id)]
+            found = [report for report in found if report is not None]
+            if self.archive is not None:
+                # Skip archived copies of reports back in the store
+                found += [report for report in self.archive.user_reports(user_id)
+                          if report['report_id'] not in self.store]
+            found.sort(key=lambda report: report.get('created_at') or '', reverse=True)
+            reports = []
+            for report in found:
+                report_id = report['report_id']
+                view = status_view(report)
+                view["report_id"] = report_id
+                view["description"] = report.get('description')
+                view["location"] = report.get('location')
+                if report.get('admin_notes'):
+                    view["admin_notes"] = report['admin_notes']
+                reports.append(view)
+            return _payload({"success": True, "reports": reports, "count": len(reports)})
+        return self._cached(('user', user_id), build)
+
+    def __len__(self):
+        return len(self._entries)
@@ -0,0 +1,440 @@
+import base64
+import json
+from bisect import bisect_left, bisect_right, insort
+from threading import RLock
+
+from report_record import ReportRecord
+
+# Fields that get a secondary index: value -> sorted list of report seqs
+INDEXED_FIELDS = ('user_id', 'status', 'problem_type', 'language')
+
+# Reports copied out per lock acquisition while scanning
+SCAN_CHUNK = 256
+
+# Gap between the seqs of consecutive new reports, so a report arriving
+# out of created_at order (restored from the archive, or replayed after
+# one) can take a seq between its neighbours
+SEQ_STEP = 1 << 32
+
+# Listeners without a handler for an event get this one instead; a report
+# moved to the archive has left the store just like a deleted one, and one
+# moved back has arrived like a new one
+FALLBACK_EVENTS = {'on_archive': 'on_remove', 'on_restore': 'on_add'}
+
+
+def encode_cursor(*parts):
+    """Opaque, URL-safe pagination cursor for a tuple of JSON values."""
+    raw = json.dumps(parts, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(token, *types):
+    """Parts of a cursor from `encode_cursor`, one per type in `types`.
+
+    Cursors come back from clients, so anything that doesn't decode to
+    values of the expected types raises ValueError("Invalid cursor").
+    """
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        parts = json.loads(raw)
+    except (TypeError, ValueError):
+        raise ValueError("Invalid cursor")
+    if (not isinstance(parts, list) or len(parts) != len(types)
+            or not all(isinstance(part, kind) and not isinstance(part, bool)
+                       for part, kind in zip(parts, types))):
+        raise ValueError("Invalid cursor")
+    return parts
+
+
+def _contains(ordered, value):
+    i = bisect_left(ordered, value)
+    return i < len(ordered) and ordered[i] == value
+
+
+def _discard(ordered, value):
+    i = bisect_left(ordered, value)
+    if i < len(ordered) and ordered[i] == value:
+        del ordered[i]
+        return i
+    return None
+
+
+def notify(listeners, event, *args):
+    for listener in listeners:
+        handler = getattr(listener, event, None)
+        if handler is None and event in FALLBACK_EVENTS:
+            handler = getattr(listener, FALLBACK_EVENTS[event], None)
+        if handler:
+            handler(*args)
+
+
+class ReportStore:
+    """In-memory report store with a primary index on report_id and
+    secondary indexes on the fields in INDEXED_FIELDS.
+
+    Every report gets a sequence number on insert. The store keeps all
+    seqs in one sorted list (with the matching `created_at` values next to
+    it) and each secondary index maps a field value to a sorted list of
+    seqs, so filtered listings come back in submission order and can be
+    resumed from any position with a binary search instead of a scan.
+    Seqs follow `created_at`: a report older than the newest one (such as
+    a report restored from the archive) gets a seq between its neighbours.
+
+    Reports are held as immutable ReportRecords: `update()` swaps in a new
+    record, so readers and listeners never see one half-changed.
+    """
+
+    def __init__(self):
+        self._lock = RLock()
+        self._reports = {}
+        self._seq_of = {}
+        self._id_at = {}
+        self._order = []
+        self._times = []
+        self._next_seq = SEQ_STEP
+        self._ranked = []
+        self._indexes = {field: {} for field in INDEXED_FIELDS}
+        self._listeners = []
+
+    # ---------- listeners ----------
+
+    def subscribe(self, listener):
+        # Listener may implement any of on_add(report),
+        # on_update(old_report, new_report), on_remove(report),
+        # on_archive(report), on_restore(report) and on_forget(report)
+        self._listeners.append(listener)
+
+    def _notify(self, event, *args):
+        notify(self._listeners, event, *args)
+
+    # ---------- index maintenance ----------
+
+    def _index(self, report, seq):
+        for field in INDEXED_FIELDS:
+            bucket = self._indexes[field].setdefault(report.get(field), [])
+            if not bucket or bucket[-1] < seq:
+                bucket.append(seq)
+            else:
+                insort(bucket, seq)
+
+    def _unindex(self, report, seq):
+        for field in INDEXED_FIELDS:
+            index = self._indexes[field]
+            value = report.get(field)
+            bucket = index.get(value)
+            if bucket is None:
+                continue
+            _discard(bucket, seq)
+            if not bucket:
+                del index[value]
+
+    # ---------- writes ----------
+
+    def add(self, report, restored=False):
+        # `restored` reports come back from the archive and go out as
+        # on_restore
+        report = ReportRecord.from_dict(report)
+        with self._lock:
+            report_id = report['report_id']
+            if report_id in self._reports:
+                raise KeyError(f"Duplicate report id: {report_id}")
+            seq = self._place(report.get('created_at') or '')
+            self._reports[report_id] = report
+            self._seq_of[report_id] = seq
+            self._id_at[seq] = report_id
+            insort(self._ranked, (-(report.get('priority') or 0), seq))
+            self._index(report, seq)
+            self._notify('on_restore' if restored else 'on_add', report)
+        return report
+
+    def _place(self, created_at):
+        # Seq for a new report, with its created_at entered in the time
+        # column. Caller holds the lock.
+        position = bisect_right(self._times, created_at)
+        if position < len(self._times):
+            before = self._order[position - 1] if position else 0
+            seq = (before + self._order[position]) // 2
+            if seq > before:
+                self._order.insert(position, seq)
+                self._times.insert(position, created_at)
+                return seq
+            # No seq left in this gap: file it as the newest report, with
+            # the time clamped so the column stays sorted
+            created_at = self._times[-1]
+        seq = self._next_seq
+        self._next_seq += SEQ_STEP
+        self._order.append(seq)
+        self._times.append(created_at)
+        return seq
+
+    def update(self, report_id, changes):
+        with self._lock:
+            report = self._reports.get(report_id)
+            if report is None:
+                return None
+            seq = self._seq_of[report_id]
+            old_report = report
+            report = self._reports[report_id] = old_report.replace(changes)
+            if any(field in changes for field in INDEXED_FIELDS):
+                self._unindex(old_report, seq)
+                self._index(report, seq)
+            old_rank = old_report.get('priority') or 0
+            new_rank = report.get('priority') or 0
+            if old_rank != new_rank:
+                _discard(self._ranked, (-old_rank, seq))
+                insort(self._ranked, (-new_rank, seq))
+            self._notify('on_update', old_report, report)
+        return report
+
+    def batch(self):
+        # Context manager holding the store lock across several writes, so
+        # readers see all of them or none
+        return self._lock
+
+    def remove(self, report_id, archived=False):
+        # `archived` reports go out as on_archive: gone from the store, but
+        # not deleted
+        with self._lock:
+            report = self._reports.pop(report_id, None)
+            if report is None:
+                return None
+            seq = self._seq_of.pop(report_id)
+            del self._id_at[seq]
+            position = _discard(self._order, seq)
+            del self._times[position]
+            _discard(self._ranked, (-(report.get('priority') or 0), seq))
+            self._unindex(report, seq)
+            self._notify('on_archive' if archived else 'on_remove', report)
+        return report
+
+    def forget(self, report):
+        # An archived report was deleted. It left the store on archiving,
+        # so this only tells listeners that look it up in the archive too;
+        # on_forget has no fallback, the others dropped it back then.
+        self._notify('on_forget', report)
+
+    # ---------- reads ----------
+
+    def get(self, report_id):
+        return self._reports.get(report_id)
+
+    def __contains__(self, report_id):
+        return report_id in self._reports
+
+    def __len__(self):
+        return len(self._reports)
+
+    def __iter__(self):
+        with self._lock:
+            reports = list(self._reports.values())
+        return iter(reports)
+
+    def snapshot(self, before=None):
+        # Every report, taken atomically. `before` runs under the store lock
+        # first so a listener can record a matching position. Records never
+        # change, so the caller can encode them later, on any thread.
+        with self._lock:
+            mark = before() if before else None
+            return mark, list(self._reports.values())
+
+    def ids_where(self, field, value):
+        # Ordered ids for a single indexed field value
+        with self._lock:
+            bucket = self._indexes[field].get(value)
+            return [self._id_at[seq] for seq in bucket] if bucket else []
+
+    def count_where(self, field, value):
+        bucket = self._indexes[field].get(value)
+        return len(bucket) if bucket else 0
+
+    def counts_by(self, field):
+        with self._lock:
+            return {value: len(bucket) for value, bucket in self._indexes[field].items()}
+
+    def find(self, **filters):
+        # Equality filters on indexed fields, in submission order.
+        # Values of None are ignored.
+        return list(self.scan(**filters))
+
+    # ---------- ordered scans ----------
+
+    def _buckets(self, filters):
+        # Sorted seq lists for the filters, smallest first; None if a
+        # filter matches nothing.
+        filters = {f: v for f, v in filters.items() if v is not None}
+        if not filters:
+            return [self._order]
+        buckets = []
+        for field, value in filters.items():
+            if field not in self._indexes:
+                raise ValueError(f"Field is not indexed: {field}")
+            bucket = self._indexes[field].get(value)
+            if not bucket:
+                return None
+            buckets.append(bucket)
+        buckets.sort(key=len)
+        return buckets
+
+    def _seq_range(self, since, until):
+        # Inclusive seq bounds for since <= created_at < until
+        lo = bisect_left(self._times, since) if since else 0
+        hi = bisect_left(self._times, until) if until else len(self._times)
+        if lo >= hi:
+            return None
+        return self._order[lo], self._order[hi - 1]
+
+    def _scan_chunk(self, buckets, lo, hi, descending, limit):
+        # Up to `limit` matching reports within [lo, hi]; returns them with
+        # the last seq examined, or None once the range is exhausted.
+        driver, rest = buckets[0], buckets[1:]
+        matches = []
+        if descending:
+            i = bisect_right(driver, hi) - 1
+            step, in_range = -1, lambda s: s >= lo
+        else:
+            i = bisect_left(driver, lo)
+            step, in_range = 1, lambda s: s <= hi
+        # Bound the work done under the lock when other filters are sparse
+        budget = limit * 4
+        while 0 <= i < len(driver):
+            seq = driver[i]
+            if not in_range(seq):
+                break
+            if all(_contains(bucket, seq) for bucket in rest):
+                matches.append(self._reports[self._id_at[seq]])
+                if len(matches) == limit:
+                    return matches, seq
+            i += step
+            budget -= 1
+            if not budget:
+                return matches, seq
+        return matches, None
+
+    def scan(self, after=None, since=None, until=None, descending=False, **filters):
+        """Yield reports matching `filters` in submission order.
+
+        `after` is a seq from `cursor_seq()`; scanning resumes just past
+        it. `since`/`until` bound `created_at` (ISO strings, half-open).
+        The lock is only held while copying out each chunk, so the
+        generator can be consumed lazily by a streaming response.
+        """
+        position = after
+        while True:
+            with self._lock:
+                buckets = self._buckets(filters)
+                bounds = self._seq_range(since, until)
+                if buckets is None or bounds is None:
+                    return
+                lo, hi = bounds
+                if position is not None:
+                    if descending:
+                        hi = min(hi, position - 1)
+                    else:
+                        lo = max(lo, position + 1)
+                if lo > hi:
+                    return
+                chunk, position = self._scan_chunk(buckets, lo, hi, descending, SCAN_CHUNK)
+            yield from chunk
+            if position is None:
+                return
+
+    def scan_ranked(self, after=None, since=None, until=None, **filters):
+        """Yield reports matching `filters` by descending `priority`, oldest
+        first within a priority. `after` is a key from `rank_key()`.
+        """
+        position = after
+        while True:
+            with self._lock:
+                buckets = self._buckets(filters)
+                bounds = self._seq_range(since, until)
+                if buckets is None or bounds is None:
+                    return
+                lo, hi = bounds
+                i = bisect_right(self._ranked, position) if position else 0
+                chunk = []
+                budget = SCAN_CHUNK * 4
+                while i < len(self._ranked) and budget and len(chunk) < SCAN_CHUNK:
+                    key = self._ranked[i]
+                    seq = key[1]
+                    if lo <= seq <= hi and all(_contains(bucket, seq) for bucket in buckets
+                                               if bucket is not self._order):
+                        chunk.append(self._reports[self._id_at[seq]])
+                    position = key
+                    i += 1
+                    budget -= 1
+                done = i >= len(self._ranked)
+            yield from chunk
+            if done:
+                return
+
+    def rank_key(self, priority, report_id, created_at):
+        # Position in the priority order for a cursor
+        return (-(priority or 0), self.cursor_seq(report_id, created_at))
+
+    def count(self, since=None, until=None, **filters):
+        with self._lock:
+            buckets = self._buckets(filters)
+            bounds = self._seq_range(since, until)
+            if buckets is None or bounds is None:
+                return 0
+            lo, hi = bounds
+            driver, rest = buckets[0], buckets[1:]
+            start, end = bisect_left(driver, lo), bisect_right(driver, hi)
+            if not rest:
+                return end - start
+            return sum(1 for seq in driver[start:end]
+                       if all(_contains(bucket, seq) for bucket in rest))
+
+    def cursor_seq(self, report_id, created_at, descending=False):
+        """Resolve a cursor position to a seq usable as `scan(after=...)`.
+
+        Seqs are not persisted, so cursors carry the report id and its
+        `created_at`; if the report is gone (or the process restarted and
+        renumbered) the position falls back to the created_at column.
+        """
+        with self._lock:
+            seq = self._seq_of.get(report_id)
+            if seq is not None:
+                return seq
+            if descending:
+                i = bisect_left(self._times, created_at)
+                return self._order[i] if i < len(self._order) else self._next_seq
+            i = bisect_right(self._times, created_at)
+            return self._order[i - 1] if i else -1
+
+    def clear(self):
+        with self._lock:
+            self._reports.clear()
+            self._seq_of.clear()
+            self._id_at.clear()
+            del self._order[:]
+            del self._times[:]
+            del self._ranked[:]
+            for index in self._indexes.values():
+                index.clear()
+
+
+class UserDirectory(dict):
+    """users_db: a plain dict that also remembers first-insertion positions
+    so admin listings can page by cursor without materialising every user.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__()
+        self._order = []
+        self.update(*args, **kwargs)
+
+    def __setitem__(self, user_id, user):
+        if user_id not in self:
+            self._order.append(user_id)
+        super().__setitem__(user_id, user)
+
+    def update(self, *args, **kwargs):
+        for user_id, user in dict(*args, **kwargs).items():
+            self[user_id] = user
+
+    def page(self, after=-1, limit=50):
+        # Returns ((position, user_id, user), ...) after `after`
+        start = after + 1
+        ids = self._order[start:start + limit]
+        return [(start + i, user_id, self[user_id]) for i, user_id in enumerate(ids)]
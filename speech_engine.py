@@ -0,0 +1,136 @@
+import importlib
+import re
+import unicodedata
+
+from report_search import TOKEN_RE
+
+# Languages offered in index.html / voice-input.html, by script
+SCRIPT_RANGES = (
+    ('hi', 0x0900, 0x097F),   # Devanagari
+    ('bn', 0x0980, 0x09FF),   # Bengali
+    ('ta', 0x0B80, 0x0BFF),   # Tamil
+    ('te', 0x0C00, 0x0C7F),   # Telugu
+)
+SUPPORTED_LANGUAGES = ('en', 'hi', 'ta', 'te', 'bn')
+
+SENTENCE_END = {'en': '.', 'hi': '।', 'bn': '।', 'ta': '.', 'te': '.'}
+
+FILLERS = frozenset(('um', 'umm', 'uh', 'uhh', 'hmm', 'er', 'ah', 'अं', 'हम्म', 'अच्छा'))
+
+# Keywords per problem_type (the categories in issue-select / en.json)
+CATEGORY_KEYWORDS = {
+    'water': ('water', 'pump', 'handpump', 'tap', 'well', 'pipeline', 'tank', 'borewell', 'drinking',
+              'पानी', 'नल', 'हैंडपंप', 'कुआँ', 'कुआं', 'टंकी', 'পানি', 'নলকূপ', 'தண்ணீர்', 'கிணறு', 'నీరు', 'బావి'),
+    'electricity': ('electricity', 'power', 'light', 'transformer', 'wire', 'pole', 'current', 'voltage',
+                    'बिजली', 'ट्रांसफार्मर', 'तार', 'খুঁটি', 'বিদ্যুৎ', 'மின்சாரம்', 'கரண்ட்', 'కరెంట్', 'విద్యుత్'),
+    'road': ('road', 'bridge', 'pothole', 'street', 'path', 'culvert',
+             'सड़क', 'पुल', 'गड्ढा', 'रास्ता', 'রাস্তা', 'সেতু', 'சாலை', 'பாலம்', 'రోడ్డు', 'వంతెన'),
+    'health': ('doctor', 'hospital', 'medicine', 'nurse', 'clinic', 'ambulance', 'fever', 'sick',
+               'डॉक्टर', 'अस्पताल', 'दवा', 'दवाई', 'बुखार', 'ডাক্তার', 'হাসপাতাল', 'மருத்துவமனை', 'డాక్టర్', 'ఆసుపత్రి'),
+    'education': ('school', 'teacher', 'classroom', 'books', 'students', 'midday',
+                  'स्कूल', 'शिक्षक', 'विद्यालय', 'মাস্টার', 'স্কুল', 'பள்ளி', 'ஆசிரியர்', 'పాఠశాల', 'టీచర్'),
+    'agriculture': ('crop', 'seed', 'fertilizer', 'irrigation', 'farm', 'harvest', 'pest',
+                    'फसल', 'बीज', 'खाद', 'सिंचाई', 'খেত', 'ফসল', 'பயிர்', 'விதை', 'పంట', 'విత్తనాలు'),
+    'animal': ('cattle', 'cow', 'buffalo', 'goat', 'dog', 'stray', 'veterinary', 'snake',
+               'पशु', 'गाय', 'भैंस', 'कुत्ता', 'গরু', 'மாடு', 'நாய்', 'ఆవు', 'కుక్క'),
+}
+
+def detect_language(text, hint=None):
+    """(language, confidence) from the share of letters in each script."""
+    counts = {}
+    letters = 0
+    for char in text:
+        if not (char.isalpha() or unicodedata.category(char) in ('Mn', 'Mc')):
+            continue
+        letters += 1
+        code = ord(char)
+        language = 'en' if code < 0x0250 else None
+        for candidate, start, end in SCRIPT_RANGES:
+            if start <= code <= end:
+                language = candidate
+                break
+        if language:
+            counts[language] = counts.get(language, 0) + 1
+    if not letters:
+        return (hint if hint in SUPPORTED_LANGUAGES else 'en'), 0.0
+    language, count = max(counts.items(), key=lambda item: item[1]) if counts else ('en', 0)
+    # Devanagari is shared by several languages; trust the user's choice
+    # when it is consistent with the script
+    if hint in SUPPORTED_LANGUAGES and counts.get(hint, 0) == count:
+        language = hint
+    return language, round(count / letters, 3)
+
+
+def normalise(text, language):
+    text = unicodedata.normalize('NFC', text)
+    words = [w for w in text.split() if w.casefold().strip('.,!?।') not in FILLERS]
+    text = ' '.join(words)
+    text = re.sub(r'\s+([,.!?।])', r'\1', text)
+    text = re.sub(r'([,.!?।])(?=\S)', r'\1 ', text)
+    if not text:
+        return text
+    if text[0].isalpha() and text[0].islower():
+        text = text[0].upper() + text[1:]
+    if text[-1] not in '.!?।':
+        text += SENTENCE_END.get(language, '.')
+    return text
+
+
+def extract_keywords(text):
+    """Matched keywords and problem_type suggestions ranked by hits."""
+    words = [w.casefold() for w in TOKEN_RE.findall(unicodedata.normalize('NFC', text))]
+    hits = {}
+    keywords = []
+    for word in words:
+        for category, vocabulary in CATEGORY_KEYWORDS.items():
+            if any(word.startswith(term) for term in vocabulary):
+                hits[category] = hits.get(category, 0) + 1
+                if word not in keywords:
+                    keywords.append(word)
+    total = sum(hits.values())
+    suggestions = [{"problem_type": category, "score": round(count / total, 3)}
+                   for category, count in sorted(hits.items(), key=lambda item: -item[1])]
+    return keywords, suggestions
+
+
+class LocalSpeechEngine:
+    """CPU-only, offline post-processing of browser transcripts: script
+    based language identification, punctuation/normalisation and keyword
+    matching into problem_type suggestions."""
+
+    name = 'local'
+
+    def process(self, text, language_hint=None):
+        language, confidence = detect_language(text, language_hint)
+        keywords, suggestions = extract_keywords(text)
+        return {
+            "text": normalise(text, language),
+            "language": f"{language}-IN",
+            "confidence": confidence,
+            "keywords": keywords,
+            "suggested_problem_types": suggestions
+        }
+
+
+ENGINES = {'local': LocalSpeechEngine}
+
+
+def load_engine(name):
+    # Registered name, or "package.module:ClassName" for a custom engine
+    if name in ENGINES:
+        return ENGINES[name]()
+    module_name, _, class_name = name.partition(':')
+    if not class_name:
+        raise ValueError(f"Unknown speech engine: {name}")
+    return getattr(importlib.import_module(module_name), class_name)()
+
+
+_engines = {}
+
+
+def run(engine_name, text, language_hint=None):
+    """Worker entry point; engines are created once per worker process."""
+    engine = _engines.get(engine_name)
+    if engine is None:
+        engine = _engines[engine_name] = load_engine(engine_name)
+    return engine.process(text, language_hint)
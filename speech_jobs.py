@@ -0,0 +1,160 @@
+import multiprocessing
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import speech_engine
+
+JOB_TTL = 600
+
+# In pool workers: where to report the job ids they start
+_started = None
+
+
+def _init_worker(started):
+    global _started
+    _started = started
+
+
+def _run_job(job_id, engine, text, language_hint):
+    _started.put(job_id)
+    return speech_engine.run(engine, text, language_hint)
+
+
+def _mp_context():
+    # The app process has request, journal and archiver threads; a forked
+    # worker could inherit a lock one of them held, so workers start from
+    # a forkserver (spawn where there is none) with the engine preloaded
+    if 'forkserver' not in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context('spawn')
+    context = multiprocessing.get_context('forkserver')
+    context.set_forkserver_preload(['speech_engine'])
+    return context
+
+
+class QueueFull(Exception):
+    """Raised when the speech queue is at capacity; callers should retry."""
+
+
+class SpeechJobQueue:
+    """Bounded queue of speech post-processing jobs run in a process pool.
+
+    At most `max_pending` jobs may be queued or running; `submit()` raises
+    QueueFull beyond that so request threads shed load instead of piling
+    up. Jobs go from 'queued' to 'running' when a worker picks them up
+    (workers report it over a queue read by a watcher thread), then to
+    'done' or 'failed'. Finished jobs are kept for JOB_TTL seconds for
+    polling. The pool is created on first use so importing the app stays
+    cheap, and again after a worker dies and breaks it.
+    """
+
+    def __init__(self, engine='local', max_workers=2, max_pending=64):
+        self.engine = engine
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._lock = threading.Lock()
+        self._done = threading.Condition(self._lock)
+        self._jobs = {}
+        self._active = 0
+        self._executor = None
+        self._started = None
+
+    def _pool(self):
+        if self._executor is None:
+            context = _mp_context()
+            self._started = context.SimpleQueue()
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=context,
+                                                 initializer=_init_worker, initargs=(self._started,))
+            threading.Thread(target=self._watch_started, args=(self._started,),
+                             name='speech-started', daemon=True).start()
+        return self._executor
+
+    def _watch_started(self, started):
+        while True:
+            job_id = started.get()
+            if job_id is None:
+                return
+            with self._lock:
+                job = self._jobs.get(job_id)
+                # The result may already have arrived
+                if job is not None and job['status'] == 'queued':
+                    job['status'] = 'running'
+                    job['started_at'] = time.time()
+
+    def _expire(self, now):
+        stale = [job_id for job_id, job in self._jobs.items()
+                 if job['finished_at'] and now - job['finished_at'] > JOB_TTL]
+        for job_id in stale:
+            del self._jobs[job_id]
+
+    def submit(self, text, language_hint=None):
+        with self._lock:
+            self._expire(time.time())
+            if self._active >= self.max_pending:
+                raise QueueFull("Speech queue is full")
+            job_id = uuid.uuid4().hex
+            self._jobs[job_id] = {
+                'job_id': job_id, 'status': 'queued', 'result': None, 'error': None,
+                'created_at': time.time(), 'started_at': None, 'finished_at': None
+            }
+            self._active += 1
+            try:
+                try:
+                    future = self._pool().submit(_run_job, job_id, self.engine, text, language_hint)
+                except BrokenProcessPool:
+                    # A worker died (killed, crashed in the engine) and took
+                    # the pool with it; its jobs have failed, start a new one
+                    self._discard_pool()
+                    future = self._pool().submit(_run_job, job_id, self.engine, text, language_hint)
+            except Exception:
+                # Broken or shut down pool: give the slot back
+                self._active -= 1
+                del self._jobs[job_id]
+                raise
+        future.add_done_callback(lambda f: self._finish(job_id, f))
+        return job_id
+
+    def _finish(self, job_id, future):
+        with self._lock:
+            self._active -= 1
+            job = self._jobs.get(job_id)
+            if job is None:
+                return
+            try:
+                job['result'] = future.result()
+                job['status'] = 'done'
+            except Exception as e:
+                job['error'] = str(e)
+                job['status'] = 'failed'
+            job['finished_at'] = time.time()
+            self._done.notify_all()
+
+    def get(self, job_id, wait=0):
+        """Job state, optionally blocking up to `wait` seconds for the result."""
+        deadline = time.monotonic() + wait
+        with self._lock:
+            job = self._jobs.get(job_id)
+            while job is not None and not job['finished_at']:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._done.wait(remaining)
+                job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def pending(self):
+        return self._active
+
+    def _discard_pool(self):
+        # Called with the lock held; a broken pool has already failed its
+        # futures, so there is nothing to cancel
+        self._executor.shutdown(wait=False)
+        self._started.put(None)
+        self._executor = None
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._started.put(None)
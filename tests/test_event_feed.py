@@ -0,0 +1,45 @@
+import os
+
+from event_feed import EventBroadcaster
+from report_sqlite import SqliteDatabase, SqliteReportStore
+
+
+def worker(path):
+    # One app worker: its own connection to the shared file and its own feed
+    store = SqliteReportStore(SqliteDatabase(path))
+    store.catch_up()
+    events = EventBroadcaster(event_ids=store.last_change)
+    store.subscribe(events)
+    return store, events
+
+
+def frames(events, last_event_id):
+    stream = events.stream(last_event_id, keepalive=0)
+    next(stream)
+    return next(stream)
+
+
+def test_event_ids_agree_across_workers(tmp_path):
+    path = os.path.join(tmp_path, 'reports.db')
+    first, first_events = worker(path)
+    second, second_events = worker(path)
+    for i in range(3):
+        first.add({'report_id': f'{i:08x}', 'created_at': f'2026-10-0{i + 1}T10:00:00',
+                   'status': 'pending'})
+    ids = [line for line in frames(first_events, 0).split('\n') if line.startswith('id: ')]
+    assert len(ids) == 3
+
+    # The client saw two events on the first worker and reconnects to the
+    # second before that worker has caught up with them
+    stream = second_events.stream(int(ids[1][4:]), keepalive=0)
+    next(stream)
+    second.catch_up()
+    resumed = next(stream)
+    assert resumed.count('event: report.created') == 1 and ids[2] + '\n' in resumed
+
+
+def test_counted_ids_from_before_a_restart_resync():
+    events = EventBroadcaster()
+    events.publish('report.deleted', {'report_id': '00000000'})
+    assert frames(events, 41).startswith('event: resync')
+    assert 'id: 1\n' in frames(events, 0)
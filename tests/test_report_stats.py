@@ -0,0 +1,39 @@
+from report_stats import ReportStats, village_name
+
+# Locations as the frontend submits them: location.js geocoded text and its
+# coordinates-only and IP fallbacks, the translated placeholders shown while
+# it waits, and a manually typed village
+FRONTEND_LOCATIONS = [
+    'Laxmi Nagar, Ravet (18.6500, 73.7500)',
+    'Laxmi Nagar, Ravet (18.6512, 73.7498)',
+    'Coordinates: 18.6500, 73.7500',
+    'Coordinates: 18.6503, 73.7504',
+    'Loading...',
+    'लोड हो रहा है...',
+    'Your Location: Loading...',
+    'Location not available',
+    'Unknown, Unknown, Unknown',
+    'Pune, Maharashtra, India',
+    '  ravet ',
+    {'village': 'Ravet', 'coordinates': {'lat': 18.65, 'lng': 73.75}},
+]
+
+
+def test_placeholders_and_coordinates_are_not_villages():
+    assert village_name('Loading...') is None
+    assert village_name('लोड हो रहा है...') is None
+    assert village_name('Location not available') is None
+    assert village_name('Unknown, Unknown, Unknown') is None
+    assert village_name('Laxmi Nagar, Ravet (18.6500, 73.7500)') == 'laxmi nagar, ravet'
+    assert village_name('Coordinates: 18.6500, 73.7500') == village_name(
+        {'latitude': 18.6503, 'longitude': 73.7504})
+
+
+def test_villages_covered_counts_frontend_payloads():
+    stats = ReportStats()
+    for i, location in enumerate(FRONTEND_LOCATIONS):
+        stats.on_add({'report_id': f'{i:08x}', 'created_at': '2026-10-01T10:00:00',
+                      'status': 'pending', 'location': location})
+    # laxmi nagar, ravet; one grid cell; pune, maharashtra, india; ravet
+    assert stats.villages_covered() == 4
+    assert stats.villages_covered(archived=['ravet', 'kiwale']) == 5
@@ -0,0 +1,49 @@
+import json
+
+from report_archive import ReportArchive
+from report_status import StatusCache
+from report_store import ReportStore
+
+
+def archived_setup(tmp_path):
+    store = ReportStore()
+    archive = ReportArchive(str(tmp_path / 'archive'))
+    cache = StatusCache(store, archive=archive)
+    store.subscribe(cache)
+    report = store.add({'report_id': '0000aaaa', 'user_id': 'user_1', 'created_at': '2026-01-05T10:00:00',
+                        'status': 'resolved', 'problem_type': 'water'})
+    archive.write([report])
+    store.remove('0000aaaa', archived=True)
+    return store, archive, cache
+
+
+def test_archived_report_status_is_served_from_archive(tmp_path):
+    store, archive, cache = archived_setup(tmp_path)
+    assert cache.report_status('0000aaaa') is not None
+
+
+def test_deleting_archived_report_invalidates_status(tmp_path):
+    store, archive, cache = archived_setup(tmp_path)
+    report = archive.get('0000aaaa')
+    assert cache.report_status('0000aaaa') is not None
+
+    archive.forget(['0000aaaa'])
+    store.forget(report)
+    assert cache.report_status('0000aaaa') is None
+
+
+def test_timeline_includes_archived_reports(tmp_path):
+    store, archive, cache = archived_setup(tmp_path)
+    store.add({'report_id': '0000bbbb', 'user_id': 'user_1', 'created_at': '2026-10-01T10:00:00',
+               'status': 'submitted', 'problem_type': 'road'})
+    store.add({'report_id': '0000cccc', 'user_id': 'user_2', 'created_at': '2026-10-02T10:00:00',
+               'status': 'submitted', 'problem_type': 'road'})
+
+    body, _ = cache.user_timeline('user_1')
+    assert json.loads(body)['count'] == 2
+    assert [r['report_id'] for r in json.loads(body)['reports']] == ['0000bbbb', '0000aaaa']
+
+    # Restored to the store: listed once
+    store.add(archive.get('0000aaaa'), restored=True)
+    body, _ = cache.user_timeline('user_1')
+    assert [r['report_id'] for r in json.loads(body)['reports']] == ['0000bbbb', '0000aaaa']
@@ -0,0 +1,61 @@
+import pytest
+
+from report_store import ReportStore, decode_cursor, encode_cursor
+
+
+def make_store(days):
+    store = ReportStore()
+    for i, day in enumerate(days):
+        store.add({'report_id': f'{i:08x}', 'created_at': f'2026-{day}T10:00:00',
+                   'status': 'resolved', 'problem_type': 'water'})
+    return store
+
+
+def test_restored_report_keeps_its_date_range():
+    store = make_store(['01-03', '01-05', '01-09', '06-01', '10-03'])
+    archived = store.remove('00000001', archived=True)
+    store.add(archived, restored=True)
+
+    january = [r['report_id'] for r in store.scan(since='2026-01-01', until='2026-02-01')]
+    assert january == ['00000000', '00000001', '00000002']
+    assert store.count(since='2026-01-01', until='2026-02-01') == 3
+    assert store.count(since='2026-10-01', until='2026-11-01') == 1
+    assert [r['report_id'] for r in store.scan(since='2026-01-04', until='2026-01-06',
+                                               problem_type='water')] == ['00000001']
+
+
+def test_out_of_order_reports_scan_in_created_at_order():
+    store = make_store(['01-05', '03-01'])
+    store.add({'report_id': 'old', 'created_at': '2026-01-01T00:00:00'})
+    store.add({'report_id': 'mid', 'created_at': '2026-02-01T00:00:00'})
+    assert [r['report_id'] for r in store.scan()] == ['old', '00000000', 'mid', '00000001']
+    assert [r['report_id'] for r in store.scan(descending=True)] == ['00000001', 'mid', '00000000', 'old']
+    after = store.cursor_seq('00000000', '2026-01-05T10:00:00')
+    assert [r['report_id'] for r in store.scan(after=after)] == ['mid', '00000001']
+
+
+def test_seq_gap_exhausted_falls_back_to_newest():
+    store = make_store(['01-01', '01-02'])
+    for i in range(40):
+        store.add({'report_id': f'late{i}', 'created_at': '2026-01-01T12:00:00'})
+    assert len(list(store.scan())) == 42
+    assert store.count(since='2026-01-01', until='2026-01-03') == 42
+
+
+
+@pytest.mark.parametrize('token, types', [
+    ('!!!', (str, str)),
+    ('é', (str, str)),
+    (encode_cursor('00000001'), (str, str)),
+    (encode_cursor('00000001', 7), (str, str)),
+    (encode_cursor('00000001', '2026-01-05T10:00:00', 'high'), (str, str, int)),
+    (encode_cursor(True), (int,)),
+])
+def test_tampered_cursor_is_invalid(token, types):
+    with pytest.raises(ValueError, match='Invalid cursor'):
+        decode_cursor(token, *types)
+
+
+def test_cursor_round_trips():
+    token = encode_cursor('00000001', '2026-01-05T10:00:00', 3)
+    assert decode_cursor(token, str, str, int) == ['00000001', '2026-01-05T10:00:00', 3]
@@ -0,0 +1,103 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+from threading import Lock
+
+logger = logging.getLogger(__name__)
+
+# Bundle files are named by language code: en.json, hi.json, pt-BR.json
+BUNDLE_RE = re.compile(r'^([a-z]{2,3}(?:-[A-Za-z]{2,4})?)\.json$')
+
+
+def _load_bundle(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    if not isinstance(data, dict):
+        raise ValueError("bundle must be a JSON object")
+    for key, value in data.items():
+        if not isinstance(value, str):
+            raise ValueError(f"value for {key!r} must be a string")
+    return data
+
+
+class TranslationRegistry:
+    """Language bundles loaded once, merged over the default language and
+    pre-serialised for the translate endpoint.
+
+    Each language is held as ready-to-send response bytes plus an ETag.
+    Bundle mtimes are re-checked at most every `check_interval` seconds;
+    changed files are reloaded, and a bundle that fails validation keeps
+    serving its last good version.
+    """
+
+    def __init__(self, directory, default='en', check_interval=2.0):
+        self.directory = directory
+        self.default = default
+        self.check_interval = check_interval
+        self._lock = Lock()
+        self._raw = {}
+        self._mtimes = {}
+        self._payloads = {}
+        self._checked_at = 0.0
+        self.reload()
+
+    def _scan(self):
+        found = {}
+        for name in os.listdir(self.directory):
+            match = BUNDLE_RE.match(name)
+            if match:
+                path = os.path.join(self.directory, name)
+                try:
+                    found[match.group(1)] = (path, os.stat(path).st_mtime_ns)
+                except OSError:
+                    continue
+        return found
+
+    def reload(self):
+        """Reload bundles whose mtime changed; returns True if any did."""
+        with self._lock:
+            self._checked_at = time.monotonic()
+            found = self._scan()
+            changed = False
+            for language, (path, mtime) in found.items():
+                if self._mtimes.get(language) == mtime:
+                    continue
+                try:
+                    self._raw[language] = _load_bundle(path)
+                except (OSError, ValueError) as e:
+                    logger.warning("Skipping translation bundle %s: %s", path, e)
+                self._mtimes[language] = mtime
+                changed = True
+            for language in set(self._raw) - set(found):
+                del self._raw[language]
+                self._mtimes.pop(language, None)
+                changed = True
+            if changed or not self._payloads:
+                self._build()
+            return changed
+
+    def _build(self):
+        base = self._raw.get(self.default, {})
+        payloads = {}
+        for language, bundle in self._raw.items():
+            merged = {**base, **bundle}
+            body = json.dumps({
+                "success": True,
+                "language": language,
+                "translations": merged,
+                "missing": sorted(set(base) - set(bundle))
+            }, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+            payloads[language] = (body, hashlib.sha1(body).hexdigest())
+        self._payloads = payloads
+
+    def get(self, language):
+        """(body bytes, etag) for a language, or None if unsupported."""
+        if time.monotonic() - self._checked_at >= self.check_interval:
+            self.reload()
+        return self._payloads.get(language)
+
+    def languages(self):
+        return sorted(self._payloads)